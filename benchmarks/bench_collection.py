@@ -0,0 +1,62 @@
+"""
+collection construction and sweeps over mu
+"""
+
+import lnPi
+
+from .common import SOLVER_CASES, get_case
+
+
+class Collection(object):
+    params = SOLVER_CASES
+    param_names = ['case']
+
+    def setup(self, case):
+        c = get_case(case)
+        self.ref = c.ref
+        self.mus = c.mus
+        self.mu_in = c.mu_in
+        self.x = c.x
+
+    def time_from_mu_iter(self, case):
+        lnPi.lnPi_collection.from_mu_iter(self.ref, self.mus)
+
+    def time_from_mu_iter_build(self, case):
+        lnPi.lnPi_collection.from_mu_iter(self.ref, self.mus).has_phaseIDs
+
+    def peakmem_from_mu_iter_build(self, case):
+        lnPi.lnPi_collection.from_mu_iter(self.ref, self.mus).has_phaseIDs
+
+    def time_lazy_build(self, case):
+        C = lnPi.lnPi_collection_lazy.from_mu_iter(self.ref, self.mus)
+        for c in C:
+            c.phaseIDs
+
+    def peakmem_lazy_build(self, case):
+        C = lnPi.lnPi_collection_lazy.from_mu_iter(self.ref, self.mus)
+        for c in C:
+            c.phaseIDs
+
+    def time_from_mu_adaptive(self, case):
+        lnPi.lnPi_collection.from_mu_adaptive(
+            self.ref, self.mu_in, self.x[::4],
+            dx_min=(self.x[1] - self.x[0]) / 4)
+
+    def time_reweight_batch(self, case):
+        lnPi.reweight_batch(self.ref, self.mus)
+
+
+class Sweep(object):
+    params = SOLVER_CASES
+    param_names = ['case']
+
+    def setup(self, case):
+        c = get_case(case)
+        self.ref = c.ref
+        self.mus = c.mus
+
+    def time_sweep_reweight(self, case):
+        lnPi.sweep_reweight(self.ref, self.mus)
+
+    def peakmem_sweep_reweight(self, case):
+        lnPi.sweep_reweight(self.ref, self.mus)
@@ -0,0 +1,25 @@
+"""
+file loading
+"""
+
+import numpy as np
+
+from .common import FILE_1D, FILE_2D, load_1D, load_2D
+
+
+class LoadFile(object):
+    params = ['1D', '2D']
+    param_names = ['case']
+
+    def setup(self, case):
+        self.load = {'1D': load_1D, '2D': load_2D}[case]
+        self.filename = {'1D': FILE_1D, '2D': FILE_2D}[case]
+
+    def time_loadtxt(self, case):
+        np.loadtxt(self.filename)
+
+    def time_from_file(self, case):
+        self.load()
+
+    def peakmem_from_file(self, case):
+        self.load()
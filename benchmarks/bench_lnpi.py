@@ -0,0 +1,95 @@
+"""
+single state point: reweight, moments and the segmentation pipeline
+
+Classes with cached results use number=1 so that setup (which builds a fresh
+object) runs before every sample.
+"""
+
+from .common import CASES, get_case, fresh
+
+
+class Reweight(object):
+    params = CASES
+    param_names = ['case']
+
+    def setup(self, case):
+        c = get_case(case)
+        self.ref = c.ref
+        mus = c.mus
+        self.mu = mus[len(mus) // 2]
+
+    def time_reweight(self, case):
+        self.ref.reweight(self.mu)
+
+    def time_reweight_build(self, case):
+        self.ref.reweight(self.mu).phaseIDs
+
+    def peakmem_reweight_build(self, case):
+        self.ref.reweight(self.mu).phaseIDs
+
+
+class Moments(object):
+    params = CASES
+    param_names = ['case']
+    number = 1
+
+    def setup(self, case):
+        self.base = fresh(get_case(case).ref).base
+
+    def time_moments(self, case):
+        self.base.Nave
+        self.base.Ncov
+        self.base.Omega()
+
+    def peakmem_moments(self, case):
+        self.base.Nave
+        self.base.Ncov
+        self.base.Omega()
+
+
+class Segmentation(object):
+    params = CASES
+    param_names = ['case']
+    number = 1
+
+    def setup(self, case):
+        ref = get_case(case).ref
+        self.c = fresh(ref)
+        self.base = self.c.base
+        self.argmax_kwargs = ref._argmax_kwargs
+        self.phases_kwargs = ref._phases_kwargs
+        self.indices = self.base.argmax_local(**self.argmax_kwargs)
+
+    def time_argmax_local(self, case):
+        self.base.argmax_local(**self.argmax_kwargs)
+
+    def time_watershed(self, case):
+        self.base.get_labels_watershed(self.indices, **self.phases_kwargs)
+
+    def time_build_phases(self, case):
+        self.c.phaseIDs
+
+    def peakmem_build_phases(self, case):
+        self.c.phaseIDs
+
+
+class Phases(object):
+    params = CASES
+    param_names = ['case']
+    number = 1
+
+    def setup(self, case):
+        self.c = fresh(get_case(case).ref)
+        self.c.phaseIDs
+
+    def time_DeltabetaE_matrix(self, case):
+        self.c.DeltabetaE_matrix()
+
+    def peakmem_DeltabetaE_matrix(self, case):
+        self.c.DeltabetaE_matrix()
+
+    def time_merge_phases(self, case):
+        self.c.merge_phases(inplace=False)
+
+    def peakmem_merge_phases(self, case):
+        self.c.merge_phases(inplace=False)
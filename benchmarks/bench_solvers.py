@@ -0,0 +1,135 @@
+"""
+spinodal, binodal, molfrac and critical point solvers
+
+Starting points come from a collection with spinodals and binodals set (see
+common.get_coexistence), built once per process.  Cases where a starting point
+is missing are skipped.
+"""
+
+import lnPi
+
+from .common import SOLVER_CASES, get_case, get_coexistence, memo
+
+
+def _spinodal_bracket(C, IDs):
+    S = C.spinodals
+    if S is None or any(S[i] is None for i in IDs):
+        raise NotImplementedError('no spinodal bracket')
+    return S[IDs[0]].mu, S[IDs[1]].mu
+
+
+def _binodal(C):
+    B = C.binodals
+    if B is None or len(B) == 0 or B[0] is None:
+        raise NotImplementedError('no binodal')
+    return B[0]
+
+
+class CollectionSolvers(object):
+    params = SOLVER_CASES
+    param_names = ['case']
+    number = 1
+
+    def setup(self, case):
+        self.C = get_case(case).collection()
+        self.C.has_phaseIDs
+        self.spinodals = get_coexistence(case)[1].spinodals
+
+    def time_get_spinodals(self, case):
+        self.C.get_spinodals(append=False)
+
+    def peakmem_get_spinodals(self, case):
+        self.C.get_spinodals(append=False)
+
+    def time_get_binodals(self, case):
+        self.C.get_binodals(spinodals=self.spinodals, append=False)
+
+
+class PointSolvers(object):
+    params = SOLVER_CASES
+    param_names = ['case']
+
+    def setup(self, case):
+        c, C = get_coexistence(case)
+        self.ref = c.ref
+        self.C = C
+        self.IDs = c.IDs
+        self.muA, self.muB = _spinodal_bracket(C, c.IDs)
+
+    def time_get_spinodal(self, case):
+        lnPi.get_spinodal(self.C, self.IDs[0])
+
+    def time_get_binodal_point(self, case):
+        lnPi.get_binodal_point(self.ref, self.IDs, self.muA, self.muB)
+
+    def time_get_binodal_point_frozen(self, case):
+        lnPi.get_binodal_point(
+            self.ref, self.IDs, self.muA, self.muB, frozen=True)
+
+    def time_get_binodal_point_newton(self, case):
+        lnPi.get_binodal_point_newton(self.ref, self.IDs, self.muA, self.muB)
+
+    def peakmem_get_binodal_point(self, case):
+        lnPi.get_binodal_point(self.ref, self.IDs, self.muA, self.muB)
+
+    def time_get_binodal_points_batch(self, case):
+        lnPi.get_binodal_points_batch(self.ref, self.IDs, [self.muA],
+                                      [self.muB])
+
+    def time_surrogate_binodals(self, case):
+        lnPi.Surrogate(self.C).get_binodals(self.IDs)
+
+    def time_surrogate_spinodals(self, case):
+        lnPi.Surrogate(self.C).get_spinodals(self.IDs[0])
+
+
+class MultiComponentSolvers(object):
+    params = [x for x in SOLVER_CASES if x != '1D' and '-1D-' not in x]
+    param_names = ['case']
+
+    def setup(self, case):
+        c, C = get_coexistence(case)
+        self.ref = c.ref
+        self.IDs = c.IDs
+        self.mu_in = c.mu_in
+        self.x = c.x
+        self.binodal = _binodal(C)
+
+        #molfrac target midway between two states with phase 0
+        L = [p for p in C if 0 in p.phaseIDs]
+        if len(L) < 2:
+            raise NotImplementedError('phase 0 at fewer than two states')
+        self.muA, self.muB = L[0].mu, L[-1].mu
+        self.target = 0.5 * (L[0].molfracs_phaseIDs[0, 0] +
+                             L[-1].molfracs_phaseIDs[0, 0])
+
+        self.isopleth = memo(
+            case + ':isopleth', lambda: lnPi.find_mu_molfrac(
+                self.ref, 0, self.target, self.muA, self.muB))
+
+    def time_find_mu_molfrac(self, case):
+        lnPi.find_mu_molfrac(self.ref, 0, self.target, self.muA, self.muB)
+
+    def time_find_mu_molfrac_newton(self, case):
+        lnPi.find_mu_molfrac_newton(self.ref, 0, self.target, self.muA)
+
+    def time_trace_binodal(self, case):
+        lnPi.trace_binodal(self.ref, self.IDs, self.binodal, npoints=10)
+
+    def peakmem_trace_binodal(self, case):
+        lnPi.trace_binodal(self.ref, self.IDs, self.binodal, npoints=10)
+
+    def time_trace_isopleth(self, case):
+        lnPi.trace_isopleth(self.ref, 0, self.target, self.isopleth,
+                            npoints=10)
+
+    def time_get_multiphase_point(self, case):
+        lnPi.get_multiphase_point(self.ref, self.IDs, self.binodal.mu)
+
+    def time_get_critical_point(self, case):
+        lnPi.get_critical_point(self.ref, self.IDs, self.binodal)
+
+    def time_phase_map(self, case):
+        mu1 = self.mu_in[1]
+        lnPi.phase_map(self.ref, (self.x.min(), self.x.max()),
+                       (mu1 - 1.0, mu1 + 1.0), n0=4, n1=4, depth=2)
@@ -0,0 +1,276 @@
+"""
+reference systems for benchmarks
+
+Cases are named by a string so they can be used as benchmark parameters:
+
+'1D' : examples/1D ljsf bulk lnPi (single component)
+'2D' : examples/2D nahs asymmetric binary mixture
+'synth-<ndim>D-<size>' : synthetic multi-well surface (see multiwell), with
+    random well depths (seed 0).  With equal depths the binodal lies where the
+    phase boundary is symmetric, and the Omega difference jumps there
+
+Each case is built once per process and cached.
+"""
+
+import os
+
+import numpy as np
+
+import lnPi
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples')
+
+#cases used by parameterized benchmarks.  Edit sizes here
+CASES = ['1D', '2D', 'synth-1D-500', 'synth-1D-5000', 'synth-2D-60',
+         'synth-2D-200', 'synth-3D-20', 'synth-3D-40']
+
+#cases small enough for the solvers
+SOLVER_CASES = ['1D', '2D', 'synth-1D-500', 'synth-2D-60']
+
+FILE_1D = os.path.join(EXAMPLES, '1D', 'PiofN',
+                       'ljsf.t070.bulk.v729.r1.lnpi.dat')
+FILE_2D = os.path.join(EXAMPLES, '2D', 'nahs_asym_mix.07_07_07.r1.lnpi_o.dat')
+
+
+class Case(object):
+    """
+    reference object and mu line for benchmarks
+
+    Attributes
+    ----------
+    ref : lnPi_phases object
+
+    mu_in : list
+        static chem pots, None for varied (see get_mu_iter)
+
+    x : array
+        values of varied chem pot for collections
+
+    IDs : tuple
+        phaseIDs of pair for binodal solvers
+    """
+
+    def __init__(self, ref, mu_in, x, IDs=(0, 1)):
+        self.ref = ref
+        self.mu_in = mu_in
+        self.x = np.asarray(x, dtype=float)
+        self.IDs = IDs
+
+    @property
+    def mus(self):
+        return lnPi.get_mu_iter(self.mu_in, self.x)
+
+    def collection(self):
+        return lnPi.lnPi_collection.from_mu(self.ref, self.mu_in, self.x)
+
+
+################################################################################
+#file data
+################################################################################
+def _tag_density(x, density_cut=0.5):
+    """
+    tag_phases_single from the density of each phase
+
+    tag_phases_single orders phases by argmax, which need not follow the
+    order of x.phases (markers are labeled in raster order), and then swaps
+    the phaseIDs of the two phases
+    """
+    d = x.densities[:, 0]
+    if x.nphase == 1:
+        return np.array([0 if d[0] < density_cut else 1])
+    return np.argsort(np.argsort(d))
+
+
+def load_1D():
+    return lnPi.lnPi_phases.from_file(
+        FILE_1D,
+        mu=-8.6160,
+        volume=729.0,
+        beta=1.0 / 0.7,
+        num_phases_max=2,
+        argmax_kwargs=dict(min_distance=[5, 10, 20, 40]),
+        ftag_phases=_tag_density)
+
+
+def load_2D():
+    return lnPi.lnPi_phases.from_file(
+        FILE_2D,
+        mu=[0.5, 0.5],
+        fill_value=np.nan,
+        ZeroMax=True,
+        num_phases_max=2,
+        beta=1.0,
+        build_kwargs=dict(num_phases_max=5),
+        ftag_phases=lnPi.tag_phases_binary)
+
+
+################################################################################
+#synthetic data
+################################################################################
+def multiwell(shape, centers=None, depths=None, width=None):
+    """
+    synthetic lnPi surface with gaussian wells
+
+    lnPi(N) = log sum_k exp(depths[k] - |N-centers[k]|**2 / (2 width**2))
+
+    Parameters
+    ----------
+    shape : tuple of ints
+        shape of lnPi
+
+    centers : array (nwell,ndim), optional
+        default two wells on the diagonal at 1/4 and 3/4 of shape
+
+    depths : array (nwell,), optional
+        default zeros (equal depths)
+
+    width : float, optional
+        default min(shape)/10
+
+    Returns
+    -------
+    Z : array of shape `shape`
+    """
+    shape = tuple(shape)
+    if centers is None:
+        centers = np.array([[0.25 * n for n in shape],
+                            [0.75 * n for n in shape]])
+    centers = np.atleast_2d(np.asarray(centers, dtype=float))
+    if depths is None:
+        depths = np.zeros(len(centers))
+    if width is None:
+        width = min(shape) / 10.0
+
+    coords = np.indices(shape, dtype=float)
+    Z = np.full(shape, -np.inf)
+    for c, d in zip(centers, depths):
+        r2 = sum((x - cc)**2 for x, cc in zip(coords, c))
+        Z = np.logaddexp(Z, d - r2 / (2.0 * width**2))
+    return Z
+
+
+def _tag_nearest(centers):
+    """
+    tag function giving each phase the ID of the well nearest its <N>
+    """
+    centers = np.asarray(centers, dtype=float)
+
+    def ftag(x):
+        N = np.asarray(x.Naves, dtype=float)
+        d = ((N[:, None, :] - centers[None, :, :])**2).sum(axis=-1)
+        return np.argmin(d, axis=-1)
+
+    return ftag
+
+
+def make_synthetic(ndim=2, size=60, nwell=2, width=None, seed=None):
+    """
+    lnPi_phases object and mu line for synthetic multi-well surface
+
+    Parameters
+    ----------
+    ndim : int
+        number of components
+
+    size : int
+        span of each dimension
+
+    nwell : int (Default 2)
+        number of wells, placed evenly along the diagonal
+
+    width : float, optional
+        well width.  Default size/(5*(nwell+1))
+
+    seed : int, optional
+        if not None, add random depths in [0,1) to the wells
+
+    Returns
+    -------
+    case : Case object
+    """
+    shape = (size, ) * ndim
+    frac = (np.arange(nwell) + 1.0) / (nwell + 1)
+    centers = frac[:, None] * (size - 1) * np.ones(ndim)
+    if width is None:
+        width = size / (5.0 * (nwell + 1))
+    depths = None
+    if seed is not None:
+        depths = np.random.RandomState(seed).rand(nwell)
+
+    Z = multiwell(shape, centers, depths, width)
+    sep = max(1, int(size / (nwell + 1)))
+
+    ref = lnPi.lnPi_phases.from_matrix(
+        Z,
+        mu=np.zeros(ndim),
+        volume=1.0,
+        beta=1.0,
+        num_phases_max=nwell,
+        argmax_kwargs=dict(min_distance=[max(1, sep // 4), max(1, sep // 2)]),
+        ftag_phases=_tag_nearest(centers))
+
+    #tilt by mu[0] of order (depth)/(separation) moves between wells.  The
+    #range spans both spinodals, so each phase disappears inside it
+    mu_in = [None] + [0.0] * (ndim - 1)
+    x = np.linspace(-1.0, 1.0, 21) * 12.0 / sep
+    return Case(ref, mu_in, x, IDs=(0, 1))
+
+
+################################################################################
+#cases
+################################################################################
+_cases = {}
+
+
+def get_case(name):
+    """
+    Case object for name (cached)
+    """
+    if name not in _cases:
+        if name == '1D':
+            case = Case(load_1D(), [None], np.linspace(-12.0, -5.0, 20))
+        elif name == '2D':
+            case = Case(load_2D(), [None, 0.0], np.linspace(-10.0, 10.0, 21))
+        elif name.startswith('synth-'):
+            _, d, size = name.split('-')
+            case = make_synthetic(ndim=int(d[:-1]), size=int(size), seed=0)
+        else:
+            raise ValueError('unknown case %s' % name)
+        _cases[name] = case
+    return _cases[name]
+
+
+def memo(key, func):
+    """
+    func() cached under key for the life of the process
+    """
+    if key not in _cases:
+        _cases[key] = func()
+    return _cases[key]
+
+
+def get_coexistence(name):
+    """
+    (case, collection) with spinodals and binodals set (cached)
+
+    the solutions are not appended, so the collection stays sorted in mu
+    """
+
+    def build():
+        case = get_case(name)
+        C = case.collection()
+        C.get_spinodals(append=False)
+        C.get_binodals(append=False)
+        return case, C
+
+    return memo(name + ':coexistence', build)
+
+
+def fresh(ref, mu=None):
+    """
+    newly reweighted copy of ref (nothing cached, phases not built)
+    """
+    if mu is None:
+        mu = ref.mu
+    return ref.reweight(mu)
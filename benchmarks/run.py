@@ -0,0 +1,105 @@
+"""
+run the benchmarks
+
+Benchmarks are classes in the bench_* modules of this directory, with
+optional params (and param_names), setup and teardown, and time_* and
+peakmem_* methods.  This script runs them in-process from the repository
+root:
+
+    python -m benchmarks.run [pattern ...] [--repeat n]
+
+time_* benchmarks report the best of `repeat` samples.  peakmem_* benchmarks
+report the peak traced allocation (tracemalloc) of a single call.
+Benchmarks raising NotImplementedError in setup are reported as skipped.
+"""
+
+import argparse
+import importlib
+import itertools
+import os
+import pkgutil
+import re
+import time
+import tracemalloc
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+def _modules():
+    for _, name, _ in pkgutil.iter_modules([_here]):
+        if name.startswith('bench_'):
+            yield importlib.import_module('benchmarks.' + name)
+
+
+def _benchmarks():
+    for mod in _modules():
+        for cname, cls in sorted(vars(mod).items()):
+            if not isinstance(cls, type) or cls.__module__ != mod.__name__:
+                continue
+            for mname in sorted(dir(cls)):
+                if mname.startswith(('time_', 'peakmem_')):
+                    yield '%s.%s.%s' % (mod.__name__.split('.')[-1], cname,
+                                        mname), cls, mname
+
+
+def _params(cls):
+    params = getattr(cls, 'params', [])
+    if len(params) == 0:
+        return [()]
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _run_one(cls, mname, p, repeat):
+    out = []
+    for _ in range(repeat if mname.startswith('time_') else 1):
+        obj = cls()
+        if hasattr(obj, 'setup'):
+            obj.setup(*p)
+        func = getattr(obj, mname)
+        if mname.startswith('time_'):
+            t0 = time.time()
+            func(*p)
+            out.append(time.time() - t0)
+        else:
+            tracemalloc.start()
+            try:
+                func(*p)
+                out.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        if hasattr(obj, 'teardown'):
+            obj.teardown(*p)
+    return min(out)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='run lnPi benchmarks')
+    parser.add_argument('patterns', nargs='*',
+                        help='regex patterns selecting benchmark names')
+    parser.add_argument('--repeat', type=int, default=3)
+    opts = parser.parse_args(args)
+
+    for name, cls, mname in _benchmarks():
+        if opts.patterns and not any(
+                re.search(x, name) for x in opts.patterns):
+            continue
+        for p in _params(cls):
+            label = '%s(%s)' % (name, ', '.join(map(str, p)))
+            try:
+                v = _run_one(cls, mname, p, opts.repeat)
+            except NotImplementedError:
+                print('%-70s skipped' % label)
+                continue
+            except Exception as e:
+                print('%-70s failed: %r' % (label, e))
+                continue
+            if mname.startswith('time_'):
+                print('%-70s %12.4g s' % (label, v))
+            else:
+                print('%-70s %12.4g MB' % (label, v / 1e6))
+
+
+if __name__ == '__main__':
+    main()
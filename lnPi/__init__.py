@@ -2,8 +2,9 @@
 utilities to work with lnPi(N)
 """
 
+import hashlib
 import itertools
-from collections import defaultdict, Iterable
+from collections import defaultdict, Iterable, OrderedDict
 
 import numpy as np
 from scipy.ndimage import filters
@@ -17,12 +18,25 @@ from skimage.graph import route_through_array
 import h5py
 import xarray as xr
 
-from lnPi.cached_decorators import cached_clear, cached, cached_func
-from lnPi._utils import _interp_matrix, get_mu_iter
+from lnPi.cached_decorators import cached_clear, cached, cached_func, cache_stats, reset_cache_stats, dump_cache_stats, _get_sync
+from lnPi._utils import _interp_matrix, get_mu_iter, MuLine
 from lnPi._segment import _indices_to_markers, _labels_watershed, labels_to_masks, masks_to_labels
+from lnPi._mu_index import MuIndex
+from lnPi.shared import _rebuild_lnPi, lnPi_shared, lnPi_phases_shared, to_shared
+from lnPi.driver import TaskResult, map_tasks, _spinodal_task, _binodal_task, _line_task, _share_collection
 from lnPi.spinodal import *
 from lnPi.binodal import *
 from lnPi.molfrac import *
+from lnPi.sweep import *
+from lnPi.adaptive import *
+from lnPi.phasemap import *
+from lnPi.batch import *
+from lnPi.state_cache import *
+from lnPi.surrogate import *
+from lnPi.critical import *
+from lnPi.trace import SolverTrace, SolveInfo
+from lnPi.instrument import *
+from lnPi.instrument import profile, stage, progress, _profiling_active
 
 
 class lnPi(np.ma.MaskedArray):
@@ -150,6 +164,56 @@ class lnPi(np.ma.MaskedArray):
     def _clear_cache(self):
         self._cache = {}
 
+    ##################################################
+    #serialization
+    def to_state(self):
+        """
+        minimal state needed to rebuild self (no cache)
+
+        Returns
+        -------
+        state : dict
+            with keys data, mask, fill_value, optinfo
+        """
+        return dict(
+            data=self.data,
+            mask=np.ma.getmaskarray(self),
+            fill_value=self.fill_value,
+            optinfo=dict(self._optinfo))
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        create lnPi from output of to_state.
+
+        data and mask are not copied or adjusted
+        """
+        return cls(
+            state['data'],
+            mask=state['mask'],
+            fill_value=state['fill_value'],
+            ZeroMax=False,
+            Pad=False,
+            **state['optinfo'])
+
+    def __reduce__(self):
+        #pickle only data, mask and metadata.  cache is rebuilt on demand
+        return (_rebuild_lnPi, (self.__class__, self.to_state()))
+
+    def __reduce_ex__(self, protocol):
+        return self.__reduce__()
+
+    def to_shared(self, name=None):
+        """
+        copy self to shared memory
+
+        Returns
+        -------
+        handle : lnPi_shared
+            handle.attach() returns read only lnPi viewing shared memory
+        """
+        return lnPi_shared(self, name=name)
+
     ##################################################
     #properties
     @property
@@ -200,6 +264,19 @@ class lnPi(np.ma.MaskedArray):
         return np.indices(self.shape)
 
     #calculated properties
+    @property
+    @cached()
+    def content_hash(self):
+        """
+        hash of data, mask and metadata (used as state cache key)
+        """
+        h = hashlib.sha1()
+        h.update(np.ascontiguousarray(self.data).tobytes())
+        h.update(np.ascontiguousarray(np.ma.getmaskarray(self)).tobytes())
+        h.update(repr((self.shape, self.mu.tolist(), self.beta, self.volume,
+                       self.num_phases_max)).encode())
+        return h.hexdigest()
+
     @property
     @cached()
     def pi(self):
@@ -233,6 +310,17 @@ class lnPi(np.ma.MaskedArray):
         x = (self.coords - self.Nave.reshape((-1, ) + (1, ) * self.ndim))**2
         return (self.pi_norm * x).reshape(self.ndim, -1).sum(axis=-1).data
 
+    @property
+    @cached()
+    def Ncov(self):
+        """
+        covariance of N, cov[i,j] = <N_i N_j> - <N_i><N_j>
+        """
+        dx = (self.coords - self.Nave.reshape((-1, ) + (1, ) * self.ndim))\
+             .reshape(self.ndim, -1)
+        w = self.pi_norm.filled(0.0).reshape(-1)
+        return np.dot(dx * w, dx.T)
+
     @property
     def molfrac(self):
         n = self.Nave
@@ -316,6 +404,7 @@ class lnPi(np.ma.MaskedArray):
 
         return x, n
 
+    @profile('argmax_local')
     def argmax_local(self,
                      min_distance=[5, 10, 15, 20, 25],
                      threshold_rel=0.00,
@@ -402,6 +491,7 @@ class lnPi(np.ma.MaskedArray):
 
     ##################################################
     #segmentation
+    @profile('watershed')
     def get_labels_watershed(self,
                              indices,
                              structure='set',
@@ -1047,19 +1137,66 @@ class lnPi_phases(object):
                 _k = '_' + k
                 d[k] = getattr(self, _k)
 
-        return self.__class__(**d)
+        new = self.__class__(**d)
+        if 'base' not in kwargs and hasattr(self, '_root_hash'):
+            new._root_hash = self._root_hash
+        return new
+
+    @property
+    def root_hash(self):
+        """
+        content hash of the root reference (used as state cache key)
+
+        Objects created by reweight (with Pad=False) carry the root hash of the
+        object they were reweighted from (once it has been computed), so the
+        same state point reached from different intermediate objects has the
+        same key
+        """
+        try:
+            return self._root_hash
+        except AttributeError:
+            self._root_hash = self.base.content_hash
+            return self._root_hash
+
+    def to_shared(self, name=None):
+        """
+        copy self.base to shared memory
+
+        Returns
+        -------
+        handle : lnPi_phases_shared
+            handle.attach() returns lnPi_phases with base in shared memory
+        """
+        return lnPi_phases_shared(self, name=name)
 
     ##################################################
     #reweight
-    def reweight(self, mu, ZeroMax=True, Pad=False, **kwargs):
+    @profile('reweight')
+    def reweight(self, mu, ZeroMax=True, Pad=False, cache=True, **kwargs):
         """
         create a new lnpi_phases reweighted to new mu
+
+        if the state cache is enabled (see enable_state_cache) and cache is
+        True, a previously built object for the same reference, mu and
+        settings is returned (and the new object is kept in the cache).
+        Pass cache=False for objects which should not be kept alive
         """
 
-        return self.copy(
-            base=self.base.reweight(mu, ZeroMax=ZeroMax, Pad=Pad, **kwargs),
-            phases='get',
-            argmax='get')
+        def build():
+            new = self.copy(
+                base=self.base.reweight(mu, ZeroMax=ZeroMax, Pad=Pad, **kwargs),
+                phases='get',
+                argmax='get')
+            #padding changes the data, so a padded object is its own root
+            if hasattr(self, '_root_hash') and not Pad:
+                new._root_hash = self._root_hash
+            return new
+
+        states = get_state_cache() if cache else None
+        if states is None or kwargs:
+            return build()
+        return states.get_or_build(
+            states.key(self, mu, ZeroMax, Pad), build)
 
     ##################################################
     #properties
@@ -1073,12 +1210,30 @@ class lnPi_phases(object):
             raise ValueError('base must be type lnPi %s' % (type(val)))
         self._base = val
 
+    def _build_lazy(self):
+        """
+        build argmax/phases on first access
+
+        Phases are built on a copy under the object's lock, and only the
+        finished values are assigned to self.  Other threads therefore never
+        see a partially built state.
+        """
+        with _get_sync(self).lock:
+            if self._argmax != 'get' and self._phases != 'get':
+                return
+            if self._argmax == 'get':
+                t = self.build_phases(inplace=False, **self._build_kwargs)
+                self._phases = t._phases
+                self._argmax = t._argmax
+            else:
+                self._phases = self.base.get_list_indices(
+                    self._argmax, **self._phases_kwargs)
+
     @property
     def argmax(self):
         #set on access
         if self._argmax == 'get':
-            #self.argmax = self.base.argmax_local(**self._argmax_kwargs)
-            self.build_phases(inplace=True, **self._build_kwargs)
+            self._build_lazy()
         return self._argmax
 
     @argmax.setter
@@ -1106,12 +1261,7 @@ class lnPi_phases(object):
     @property
     def phases(self):
         if self._phases == 'get':
-            #self.phases = self.base.get_list_indices(self.argmax,**self._phases_kwargs)
-            if self._argmax == 'get':
-                self.build_phases(inplace=True, **self._build_kwargs)
-            else:
-                self._phases = self.base.get_list_indices(
-                    self.argmax, **self._phases_kwargs)
+            self._build_lazy()
 
         if self._phases is None:
             return [self.base]
@@ -1157,7 +1307,10 @@ class lnPi_phases(object):
 
     @property
     def phaseIDs(self):
-        return self._ftag_phases(self, **self._ftag_phases_kwargs)
+        if not _profiling_active():
+            return self._ftag_phases(self, **self._ftag_phases_kwargs)
+        with stage('tagging'):
+            return self._ftag_phases(self, **self._ftag_phases_kwargs)
 
     #     if not hasattr(self,'_phaseIDs'):
     #         self._phaseIDs = self._ftag_phases(self,**self._ftag_phases_kwargs)
@@ -1255,6 +1408,19 @@ class lnPi_phases(object):
         ret[self.phaseIDs, :] = self.Nvars
         return ret
 
+    @property
+    def Ncovs(self):
+        return np.array([x.Ncov for x in self.phases])
+
+    @property
+    def Ncovs_phaseIDs(self):
+        ret = np.empty(
+            (self.base.num_phases_max, self.base.ndim, self.base.ndim),
+            dtype=float) * np.nan
+
+        ret[self.phaseIDs, ...] = self.Ncovs
+        return ret
+
     @property
     def pis(self):
         return np.array([x.pi for x in self])
@@ -1281,6 +1447,7 @@ class lnPi_phases(object):
 
     ##################################################
     #query
+    @profile('boundaries')
     def _get_boundaries(self, IDs, mode='thick', connectivity=None, **kwargs):
         """
         get the boundary between phase pair
@@ -1506,6 +1673,7 @@ k        """
         np.fill_diagonal(DE, np.nan)
         return DE
 
+    @profile('merge_phases')
     def merge_phases(self,
                      efac=1.0,
                      vmax=1e20,
@@ -1619,7 +1787,11 @@ k        """
         else:
             new = self.copy()
 
-        phaseIDs = self._ftag_phases(self, **self._ftag_phases_kwargs)
+        if not _profiling_active():
+            phaseIDs = self._ftag_phases(self, **self._ftag_phases_kwargs)
+        else:
+            with stage('tagging'):
+                phaseIDs = self._ftag_phases(self, **self._ftag_phases_kwargs)
         if len(phaseIDs) > 0:
             #find distance between phaseIDs
             dist = pdist(phaseIDs.reshape(-1, 1)).astype(int)
@@ -1652,6 +1824,7 @@ k        """
         if not inplace:
             return new
 
+    @profile('segmentation')
     def build_phases(self,
                      merge='full',
                      nmax_start=10,
@@ -2069,6 +2242,7 @@ class lnPi_collection(object):
     @lnpis.setter
     def lnpis(self, val):
         self._lnpis = self._parse_lnpis(val)
+        self._mu_index_reset()
 
     ##################################################
     #list props
@@ -2084,8 +2258,10 @@ class lnPi_collection(object):
         if unique:
             if len(self._unique_mus(val.mu, decimals)) > 0:
                 self._lnpis.append(self._parse_lnpi(val))
+                self._mu_index_add(val.mu)
         else:
             self._lnpis.append(self._parse_lnpi(val))
+            self._mu_index_add(val.mu)
 
     def extend(self, x, unique=True, decimals=5):
         """extend lnpis"""
@@ -2096,6 +2272,7 @@ class lnPi_collection(object):
             if unique:
                 x = self._unique_list(x, decimals)
             self._lnpis.extend(self._parse_lnpis(x))
+            self._mu_index_reset()
         else:
             raise ValueError('only lists or lnPi_collections can be added')
 
@@ -2130,6 +2307,7 @@ class lnPi_collection(object):
             raise ValueError('only list or lnPi_collections can be added')
 
         self._lnpis += L
+        self._mu_index_reset()
         return self
 
     def sort_by_mu(self, comp=0, inplace=False):
@@ -2140,21 +2318,68 @@ class lnPi_collection(object):
         L = [self._lnpis[i] for i in order]
         if inplace:
             self._lnpis = L
+            self._mu_index_reset()
         else:
             return self.copy(lnpis=L)
 
-    def _unique_list(self, L, decimals=5):
+    ##################################################
+    #mu index
+    def _mu_source(self):
+        """list defining order of self"""
+        return self._lnpis
+
+    @staticmethod
+    def _mu_of(x):
+        return x.mu
+
+    def _mu_index_reset(self):
         """
-        limit list such that output[i].mu not in self.mus
+        mark index stale.  Every mutator other than append must call this
         """
+        self._mu_version = getattr(self, '_mu_version', 0) + 1
 
-        tol = 0.5 * 10**(-decimals)
-        mus = np.array([x.mu for x in L])
-        new = np.atleast_2d(mus)
+    def _get_mu_index(self, decimals=5):
+        """
+        MuIndex of self.mus.  Rebuilt if self changed since last call
+        """
+        L = self._mu_source()
+        stamp = (getattr(self, '_mu_version', 0), len(L), decimals)
+        if getattr(self, '_mu_index_stamp', None) != stamp:
+            self._mu_index = MuIndex([self._mu_of(x) for x in L], decimals)
+            self._mu_index_stamp = stamp
+        return self._mu_index
 
-        msk = np.all(cdist(self.mus, new) > tol, axis=0)
+    def _mu_index_add(self, mu):
+        """
+        update index after appending mu to self
+        """
+        stamp = getattr(self, '_mu_index_stamp', None)
+        if stamp is None:
+            return
+        L = self._mu_source()
+        if stamp[:2] == (getattr(self, '_mu_version', 0), len(L) - 1):
+            self._mu_index.add(mu)
+            self._mu_index_stamp = (stamp[0], len(L), stamp[2])
 
-        return [x for x, m in zip(L, msk) if m]
+    def nearest_index(self, mu, decimals=5):
+        """
+        index of state point in self with mu closest to mu
+        """
+        dist, i = self._get_mu_index(decimals).nearest(mu)
+        return int(i)
+
+    def nearest(self, mu, decimals=5):
+        """
+        state point in self with mu closest to mu (e.g., to warm start a solve)
+        """
+        return self[self.nearest_index(mu, decimals)]
+
+    def _unique_list(self, L, decimals=5):
+        """
+        limit list such that output[i].mu not in self.mus
+        """
+        idx = self._get_mu_index(decimals)
+        return [x for x in L if idx.find(x.mu) is None]
 
     def _unique_mus(self, mus, decimals=5):
         """
@@ -2167,36 +2392,29 @@ class lnPi_collection(object):
 
         decimals : int (Default 5)
             consider mu replicated if dist between any mu already in
-            self and mus[i] <0.5*10**(-decimals)
+            self and mus[i] <=0.5*10**(-decimals)
 
         Returns
         -------
         output : bool or array of bools
         """
 
-        tol = 0.5 * 10**(-decimals)
-        mus = np.asarray(mus)
-        new = np.atleast_2d(mus)
-        msk = np.all(cdist(self.mus, new) > tol, axis=0)
+        idx = self._get_mu_index(decimals)
+        new = np.atleast_2d(np.asarray(mus))
+        msk = np.array([idx.find(m) is None for m in new], dtype=bool)
         return new[msk, :]
 
     def drop_duplicates(self, decimals=5):
         """
         drop doubles of given mu
         """
-        tol = 0.5 * 10**(-decimals)
-
-        mus = self.mus
-        msk = squareform(pdist(mus)) < tol
-        np.fill_diagonal(msk, False)
-
-        a, b = np.where(msk)
-        b = b[b > a]
-
-        keep = np.ones(mus.shape[0], dtype=bool)
-        keep[b] = False
-
+        keep = MuIndex.first_mask(self.mus, decimals)
         self._lnpis = [x for x, m in zip(self._lnpis, keep) if m]
+        self._mu_index_reset()
+
+    def __setitem__(self, i, val):
+        self._lnpis[i] = self._parse_lnpi(val)
+        self._mu_index_reset()
 
     def __getitem__(self, i):
         if isinstance(i, (np.int, np.integer)):
@@ -2332,25 +2550,70 @@ class lnPi_collection(object):
                       close_kwargs={},
                       solve_kwargs={},
                       inplace=True,
-                      append=True):
+                      append=True,
+                      executor=None,
+                      errors='raise'):
+        """
+        locate spinodal for each phaseID
+
+        Parameters
+        ----------
+        executor : executor or None (Default None)
+            if not None, solve each phaseID as a separate task on executor.
+            see lnPi.driver.map_tasks.  For ProcessPoolExecutor, tasks get a
+            shared memory handle to self[0] instead of a pickled copy of self
+
+        errors : str (Default 'raise')
+            if 'raise', raise the error of a failed phaseID.
+            if 'capture', failed phaseID has spinodal None and
+            info TaskResult holding the error.
+
+        other parameters are passed to get_spinodal_phaseID
+
+        Notes
+        -----
+        a SolverTrace of all solves is stored as self.spinodals_trace.
+        tasks run on an executor are only in the trace of their own info
+        """
+
+        if errors not in ('raise', 'capture'):
+            raise ValueError('bad errors parameter %s' % errors)
+
+        kwargs = dict(
+            efac=efac,
+            dmu=dmu,
+            vmin=vmin,
+            vmax=vmax,
+            ntry=ntry,
+            step=step,
+            nmax=nmax,
+            reweight_kwargs=reweight_kwargs,
+            DeltabetaE_kwargs=DeltabetE_kwargs,
+            close_kwargs=close_kwargs,
+            solve_kwargs=solve_kwargs)
+
+        arg, handle = _share_collection(self, executor)
+        try:
+            with SolverTrace('get_spinodals') as trace:
+                results = map_tasks(
+                    _spinodal_task,
+                    [(arg, ID, kwargs)
+                     for ID in range(self[0].base.num_phases_max)],
+                    executor=executor)
+        finally:
+            if handle is not None:
+                handle.unlink()
+        self._spinodals_trace = trace
 
         L = []
         info = []
-        for ID in range(self[0].base.num_phases_max):
-            s, r = self.get_spinodal_phaseID(
-                ID,
-                efac=efac,
-                dmu=dmu,
-                vmin=vmin,
-                vmax=vmax,
-                ntry=ntry,
-                step=step,
-                nmax=nmax,
-                reweight_kwargs=reweight_kwargs,
-                DeltabetaE_kwargs=DeltabetE_kwargs,
-                close_kwargs=close_kwargs,
-                solve_kwargs=solve_kwargs,
-                full_output=True)
+        for res in results:
+            if res.ok:
+                s, r = res.value
+            elif errors == 'capture':
+                s, r = None, res
+            else:
+                raise res.error
 
             L.append(s)
             info.append(r)
@@ -2373,6 +2636,15 @@ class lnPi_collection(object):
 
         return self._spinodals
 
+    @property
+    def spinodals_trace(self):
+        """
+        SolverTrace of last get_spinodals
+        """
+        if not hasattr(self, '_spinodals_trace'):
+            raise AttributeError('spinodal not set')
+        return self._spinodals_trace
+
     ##################################################
     #binodal
     def get_binodal_pair(self,
@@ -2380,17 +2652,36 @@ class lnPi_collection(object):
                          spinodals=None,
                          reweight_kwargs={},
                          full_output=False,
+                         method='brentq',
                          **kwargs):
+        """
+        locate binodal between phaseIDs IDs, bracketed by their spinodals
+
+        Parameters
+        ----------
+        method : str (Default 'brentq')
+            if 'brentq', use binodal.get_binodal_point.
+            if 'newton', use binodal.get_binodal_point_newton
+
+        **kwargs : extra arguments to solver
+        """
+
+        if method == 'brentq':
+            solver = binodal.get_binodal_point
+        elif method == 'newton':
+            solver = binodal.get_binodal_point_newton
+        else:
+            raise ValueError('bad method %s' % method)
 
         if spinodals is None:
             spinodals = self.spinodals
-        spin = [self.spinodals[i] for i in IDs]
+        spin = [spinodals[i] for i in IDs]
 
         if None in spin:
             #raise ValueError('one of spinodals is Zero')
             b, r = None, None
         else:
-            b, r = binodal.get_binodal_point(
+            b, r = solver(
                 self[0],
                 IDs,
                 spin[0].mu,
@@ -2409,22 +2700,62 @@ class lnPi_collection(object):
                      reweight_kwargs={},
                      inplace=True,
                      append=True,
+                     executor=None,
+                     errors='raise',
                      **kwargs):
+        """
+        locate binodal for each pair of phaseIDs
+
+        Parameters
+        ----------
+        executor : executor or None (Default None)
+            if not None, solve each pair as a separate task on executor.
+            see lnPi.driver.map_tasks.  For ProcessPoolExecutor, tasks get a
+            shared memory handle to self[0] instead of a pickled copy of self
+
+        errors : str (Default 'raise')
+            if 'raise', raise the error of a failed pair.
+            if 'capture', failed pair has binodal None and
+            info TaskResult holding the error.
+
+        **kwargs : extra arguments to get_binodal_pair
+
+        Notes
+        -----
+        a SolverTrace of all solves is stored as self.binodals_trace.
+        tasks run on an executor are only in the trace of their own info
+        """
+
+        if errors not in ('raise', 'capture'):
+            raise ValueError('bad errors parameter %s' % errors)
 
         if spinodals is None:
             spinodals = self.spinodals
 
+        kwargs = dict(kwargs, reweight_kwargs=reweight_kwargs)
+        pairs = itertools.combinations(range(self[0].base.num_phases_max), 2)
+
+        arg, handle = _share_collection(self, executor)
+        try:
+            with SolverTrace('get_binodals') as trace:
+                results = map_tasks(
+                    _binodal_task,
+                    [(arg, IDs, spinodals, kwargs) for IDs in pairs],
+                    executor=executor)
+        finally:
+            if handle is not None:
+                handle.unlink()
+        self._binodals_trace = trace
+
         L = []
         info = []
-        for IDs in itertools.combinations(
-                range(self[0].base.num_phases_max), 2):
-
-            b, r = self.get_binodal_pair(
-                IDs,
-                spinodals,
-                reweight_kwargs=reweight_kwargs,
-                full_output=True,
-                **kwargs)
+        for res in results:
+            if res.ok:
+                b, r = res.value
+            elif errors == 'capture':
+                b, r = None, res
+            else:
+                raise res.error
 
             L.append(b)
             info.append(r)
@@ -2448,6 +2779,15 @@ class lnPi_collection(object):
 
         return self._binodals
 
+    @property
+    def binodals_trace(self):
+        """
+        SolverTrace of last get_binodals
+        """
+        if not hasattr(self, '_binodals_trace'):
+            raise AttributeError('binodals not set')
+        return self._binodals_trace
+
     def get_binodal_interp(self, mu_axis, IDs=(0, 1)):
         """
         get position of Omega[i]==Omega[j] by interpolation
@@ -2499,7 +2839,10 @@ class lnPi_collection(object):
 
         kwargs = dict(dict(ZeroMax=True), **kwargs)
 
-        L = [ref.reweight(mu, **kwargs) for mu in mus]
+        L = []
+        for i, mu in enumerate(mus):
+            L.append(ref.reweight(mu, **kwargs))
+            progress('from_mu_iter', index=i, mu=L[-1].mu)
 
         return cls(L)
 
@@ -2532,6 +2875,127 @@ class lnPi_collection(object):
         mus = get_mu_iter(mu, x)
         return cls.from_mu_iter(ref, mus, **kwargs)
 
+    @classmethod
+    def from_mu_adaptive(cls, ref, mu, x, dx_min, full_output=False, **kwargs):
+        """
+        build lnPi_collection on adaptively refined mu grid
+
+        Parameters
+        ----------
+        ref : lnpi_phases object
+            lnpi_phases to reweight
+
+        mu : list
+            list with one element equal to None (see from_mu)
+
+        x : array
+            coarse values to insert for variable component
+
+        dx_min : float
+            target resolution of x near phase changes
+
+        full_output : bool (Default False)
+            if True, return info dict
+
+        **kwargs : arguments to lnPi.adaptive.get_lnpis_adaptive
+
+        Returns
+        -------
+        out : lnPi_collection object
+
+        info : dict (optional, returned if full_output is True)
+        """
+
+        assert isinstance(ref, lnPi_phases)
+        L, info = get_lnpis_adaptive(
+            ref, mu, x, dx_min, full_output=True, **kwargs)
+
+        if full_output:
+            return cls(L), info
+        else:
+            return cls(L)
+
+    @classmethod
+    def from_mu_lines(cls,
+                      ref,
+                      mu_list,
+                      x,
+                      executor=None,
+                      spin_kwargs=None,
+                      bin_kwargs=None,
+                      build_kwargs=None,
+                      full_output=False):
+        """
+        build collections along several lines and locate spinodals/binodals
+
+        Parameters
+        ----------
+        ref : lnpi_phases object or shared handle
+            reference to reweight.  For process executors, passing
+            ref.to_shared() avoids copying ref.base to each task
+
+        mu_list : list
+            list of mu lists (see from_mu), one per line
+
+        x : array or list of arrays
+            values of variable component.  if list, one per line
+
+        executor : executor or None (Default None)
+            lines are run as separate tasks on executor.
+            see lnPi.driver.map_tasks
+
+        spin_kwargs : dict or None
+            arguments to get_spinodals.  if None, use defaults.
+            errors defaults to 'capture', so a failed phaseID does not lose
+            the line
+
+        bin_kwargs : dict or None
+            arguments to get_binodals.  if None, use defaults.
+            errors defaults to 'capture'
+
+        build_kwargs : dict or None
+            arguments to from_mu
+
+        full_output : bool (Default False)
+            if True, return list of TaskResult objects
+
+        Returns
+        -------
+        out : list of lnPi_collection
+            in order of mu_list.  Lines which failed are None
+
+        results : list of TaskResult (optional, if full_output is True)
+        """
+
+        if spin_kwargs is None:
+            spin_kwargs = {}
+        if bin_kwargs is None:
+            bin_kwargs = {}
+        if build_kwargs is None:
+            build_kwargs = {}
+
+        mu_list = list(mu_list)
+        if len(x) > 0 and isinstance(x[0], Iterable):
+            x_list = list(x)
+        else:
+            x_list = [x] * len(mu_list)
+
+        if len(x_list) != len(mu_list):
+            raise ValueError('x must have one entry per line')
+
+        results = map_tasks(
+            _line_task,
+            [(cls.from_mu, ref, mu, xx, build_kwargs, spin_kwargs, bin_kwargs)
+             for mu, xx in zip(mu_list, x_list)],
+            executor=executor)
+
+        out = [r.value for r in results]
+
+        if full_output:
+            return out, results
+        else:
+            return out
+
     def to_hdf(self, path_or_buff, key, ref=None, overwrite=False):
         """
         push self to h5py file
@@ -2660,3 +3124,354 @@ class lnPi_collection(object):
             ]
 
         return new
+
+
+class lnPi_collection_lazy(lnPi_collection):
+    """
+    collection storing only a reference and mu values
+
+    lnPi_phases objects are built on access with ref.reweight(mu).  The
+    `maxsize` most recently used objects are kept.  Scalar summaries (nphase,
+    has_phaseIDs, Omegas_phaseIDs, DeltabetaE_phaseIDs, ...) are kept for
+    every state point once computed, so the solvers in spinodal and binodal
+    work without rebuilding objects.
+
+    Notes
+    -----
+    Objects evicted from the LRU are rebuilt from ref, so in place
+    modifications (e.g., merge_phases(inplace=True)) are not persistent.
+    Pass such options through ref's build_kwargs instead.  Objects set
+    (``C[i] = x``) or appended are kept outside the LRU, and replace the
+    summaries stored for their mu.
+
+    `lnpis` and `merge_phases` build every state point (up to maxsize are
+    kept afterwards).  `to_hdf` and iteration build them one at a time.
+    Omegas with zval build every state point; all other summaries are
+    cached.
+    """
+
+    def __init__(self, ref, mus, maxsize=32, reweight_kwargs=None):
+        """
+        Parameters
+        ----------
+        ref : lnpi_phases object
+            reference to reweight
+
+        mus : iterable
+            chem. pots. of state points
+
+        maxsize : int (Default 32)
+            max number of built objects to keep
+
+        reweight_kwargs : dict, optional
+            arguments to ref.reweight.  Default ZeroMax=True
+        """
+        if reweight_kwargs is None:
+            reweight_kwargs = {}
+
+        self.ref = ref
+        self.maxsize = maxsize
+        self.reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+
+        self._mus = [np.asarray(m, dtype=float) for m in mus]
+        #mu key -> lnPi_phases
+        self._lru = OrderedDict()
+        #mu key -> lnPi_phases set or appended (never evicted)
+        self._pinned = {}
+        #mu key -> dict of summaries
+        self._summaries = {}
+
+    @staticmethod
+    def _key(mu):
+        return tuple(np.asarray(mu, dtype=float).tolist())
+
+    def _get(self, i):
+        """
+        build (or get from LRU) object at index i
+        """
+        mu = self._mus[i]
+        key = self._key(mu)
+        x = self._pinned.get(key)
+        if x is not None:
+            return x
+        x = self._lru.pop(key, None)
+        if x is None:
+            x = self.ref.reweight(mu, **self.reweight_kwargs)
+        self._put(key, x)
+        return x
+
+    def _put(self, key, x):
+        self._lru[key] = x
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def _summary(self, i, name, func):
+        """
+        summary value `name` at index i, computed by func(lnpi_phases)
+        """
+        d = self._summaries.setdefault(self._key(self._mus[i]), {})
+        try:
+            return d[name]
+        except KeyError:
+            d[name] = val = func(self._get(i))
+            return val
+
+    def _summaries_array(self, name, func):
+        return np.array(
+            [self._summary(i, name, func) for i in range(len(self))])
+
+    ##################################################
+    #copy
+    def copy(self, lnpis=None, mus=None):
+        """
+        create shallow copy of self
+
+        Parameters
+        ----------
+        lnpis : list of lnpi_phases, optional
+            if passed, return an (eager) lnPi_collection of lnpis
+
+        mus : array-like, optional
+            mu values of new collection.  Default is self.mus.
+            New collection shares built objects and summaries with self.
+        """
+        if lnpis is not None:
+            return lnPi_collection(lnpis=lnpis)
+
+        if mus is None:
+            mus = self._mus
+
+        new = lnPi_collection_lazy(
+            self.ref, mus, maxsize=self.maxsize,
+            reweight_kwargs=self.reweight_kwargs)
+        new._lru = self._lru
+        new._pinned = self._pinned
+        new._summaries = self._summaries
+        return new
+
+    ##################################################
+    #properties
+    @property
+    def _lnpis(self):
+        #builds everything.  Prefer indexing or summaries
+        return [self._get(i) for i in range(len(self))]
+
+    @_lnpis.setter
+    def _lnpis(self, val):
+        self._mus = [np.asarray(x.mu, dtype=float) for x in val]
+        for x in val:
+            self._set(x)
+        self._mu_index_reset()
+
+    def _set(self, x):
+        """
+        store x as the object at its mu, dropping stale summaries
+        """
+        key = self._key(x.mu)
+        self._summaries.pop(key, None)
+        self._lru.pop(key, None)
+        self._pinned[key] = x
+
+    def __len__(self):
+        return len(self._mus)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            if i < -len(self) or i >= len(self):
+                raise IndexError('index %s out of range' % i)
+            return self._get(i)
+
+        elif type(i) is slice:
+            mus = self._mus[i]
+
+        elif isinstance(i, (list, np.ndarray)):
+            idx = np.array(i)
+
+            if np.issubdtype(idx.dtype, np.integer):
+                mus = [self._mus[j] for j in idx]
+
+            elif np.issubdtype(idx.dtype, np.bool_):
+                assert idx.shape == self.shape
+                mus = [m for m, mm in zip(self._mus, idx) if mm]
+
+            else:
+                raise KeyError('bad key')
+        else:
+            raise KeyError('bad key')
+
+        return self.copy(mus=mus)
+
+    def __setitem__(self, i, val):
+        val = self._parse_lnpi(val)
+        self._mus[i] = np.asarray(val.mu, dtype=float)
+        self._set(val)
+        self._mu_index_reset()
+
+    def append(self, val, unique=True, decimals=5):
+        """append a lnpi_phases to self"""
+        val = self._parse_lnpi(val)
+        if unique and len(self._unique_mus(val.mu, decimals)) == 0:
+            return
+        self._mus.append(np.asarray(val.mu, dtype=float))
+        self._mu_index_add(val.mu)
+        self._set(val)
+
+    def __add__(self, x):
+        new = self.copy()
+        new += x
+        return new
+
+    def __iadd__(self, x):
+        self.extend(x, unique=False)
+        return self
+
+    def extend(self, x, unique=True, decimals=5):
+        """extend by list of lnpi_phases or collection"""
+        if isinstance(x, lnPi_collection_lazy) and x.ref is self.ref:
+            self.extend_by_mu_iter(self.ref, x.mus, unique=unique, decimals=decimals)
+        elif isinstance(x, (lnPi_collection, list)):
+            for val in x:
+                self.append(val, unique=unique, decimals=decimals)
+        else:
+            raise ValueError('only lists or lnPi_collections can be added')
+
+    def extend_by_mu_iter(self, ref, mus, unique=True, decimals=5, **kwargs):
+        """extend by mus (objects are not built)"""
+        if ref is not self.ref or kwargs:
+            return super(lnPi_collection_lazy, self).extend_by_mu_iter(
+                ref, mus, unique=unique, decimals=decimals, **kwargs)
+
+        if unique:
+            mus = self._unique_mus(mus, decimals=decimals)
+        for m in np.atleast_2d(mus):
+            self._mus.append(np.asarray(m, dtype=float))
+            self._mu_index_add(m)
+
+    def sort_by_mu(self, comp=0, inplace=False):
+        """
+        sort self by mu[:,comp]
+        """
+        order = np.argsort(self.mus[:, comp])
+        mus = [self._mus[i] for i in order]
+        if inplace:
+            self._mus = mus
+            self._mu_index_reset()
+        else:
+            return self.copy(mus=mus)
+
+    def drop_duplicates(self, decimals=5):
+        """
+        drop doubles of given mu
+        """
+        keep = MuIndex.first_mask(self._mus, decimals)
+        self._mus = [x for x, m in zip(self._mus, keep) if m]
+        self._mu_index_reset()
+
+    def _mu_source(self):
+        return self._mus
+
+    @staticmethod
+    def _mu_of(x):
+        return x
+
+    ##################################################
+    #calculations/props
+    @property
+    def mus(self):
+        return np.array(self._mus)
+
+    @property
+    def nphases(self):
+        return self._summaries_array('nphase', lambda x: x.nphase)
+
+    @property
+    def has_phaseIDs(self):
+        return self._summaries_array('has_phaseIDs', lambda x: x.has_phaseIDs)
+
+    @property
+    def molfracs_phaseIDs(self):
+        return self._summaries_array('molfracs_phaseIDs',
+                                     lambda x: x.molfracs_phaseIDs)
+
+    @property
+    def Naves_phaseIDs(self):
+        return self._summaries_array('Naves_phaseIDs',
+                                     lambda x: x.Naves_phaseIDs)
+
+    @property
+    def molfracs(self):
+        return self._summaries_array('molfracs', lambda x: x.molfracs)
+
+    @property
+    def Naves(self):
+        return self._summaries_array('Naves', lambda x: x.Naves)
+
+    def Omegas(self, zval=None):
+        if zval is not None:
+            return super(lnPi_collection_lazy, self).Omegas(zval)
+        return self._summaries_array('Omegas', lambda x: x.Omegas())
+
+    @property
+    def densities_phaseIDs(self):
+        return self._summaries_array('densities_phaseIDs',
+                                     lambda x: x.densities_phaseIDs)
+
+    def Omegas_phaseIDs(self, zval=None):
+        if zval is not None:
+            return super(lnPi_collection_lazy, self).Omegas_phaseIDs(zval)
+        return self._summaries_array('Omegas_phaseIDs',
+                                     lambda x: x.Omegas_phaseIDs())
+
+    def DeltabetaE_phaseIDs(self, vmin=0.0, vmax=1e20, **kwargs):
+        name = ('DeltabetaE_phaseIDs', vmin, vmax, repr(sorted(kwargs.items())))
+        return self._summaries_array(
+            name, lambda x: x.DeltabetaE_phaseIDs(vmin, vmax, **kwargs))
+
+    def _repr_html_(self):
+        return 'lnPi_collection_lazy: %s (%s built)' % (
+            len(self), len(self._lru) + len(self._pinned))
+
+    ##################################################
+    #builders
+    @classmethod
+    def from_mu_iter(cls, ref, mus, maxsize=32, **kwargs):
+        """
+        build lazy collection from mus
+
+        Parameters
+        ----------
+        ref : lnpi_phases object
+
+        mus : iterable
+            chem. pots.
+
+        maxsize : int (Default 32)
+            max number of built objects to keep
+
+        **kwargs : arguments to ref.reweight
+        """
+        assert isinstance(ref, lnPi_phases)
+        return cls(ref, mus, maxsize=maxsize, reweight_kwargs=kwargs)
+
+    @classmethod
+    def from_mu_adaptive(cls, ref, mu, x, dx_min, maxsize=32,
+                         full_output=False, **kwargs):
+        """
+        build lazy collection on adaptively refined mu grid
+
+        see lnPi_collection.from_mu_adaptive.  Objects built during
+        refinement seed the LRU.
+        """
+        assert isinstance(ref, lnPi_phases)
+        L, info = get_lnpis_adaptive(
+            ref, mu, x, dx_min, full_output=True, **kwargs)
+
+        new = cls(ref, [p.mu for p in L], maxsize=maxsize,
+                  reweight_kwargs=kwargs.get('reweight_kwargs', None))
+        for p in L[-maxsize:]:
+            new._put(new._key(p.mu), p)
+
+        if full_output:
+            return new, info
+        else:
+            return new
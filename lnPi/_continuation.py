@@ -0,0 +1,156 @@
+"""
+pseudo-arclength continuation of level sets g(mu)==0 in a plane of mu
+"""
+
+import numpy as np
+
+
+def _corrector(ref, fgrad, mu, direction, comps, xtol=1e-8, ftol=1e-10,
+               maxiter=5, reweight_kwargs={}):
+    """
+    Newton solve of g==0 along mu + s*direction
+
+    Parameters
+    ----------
+    fgrad : callable
+        fgrad(lnpi_phases) -> (g, gradient of g over comps)
+
+    mu : array
+        starting mu (full)
+
+    direction : array
+        unit vector over comps
+
+    Returns
+    -------
+    c : lnPi_phases or None
+        solution (None if failed)
+
+    g, grad : value and gradient at c
+
+    niter : int
+        number of reweights used
+    """
+    mu = np.array(mu, dtype=float)
+    for i in range(maxiter):
+        c = ref.reweight(mu, **reweight_kwargs)
+        g, grad = fgrad(c)
+        if not np.isfinite(g):
+            return None, g, grad, i + 1
+        if abs(g) < ftol:
+            return c, g, grad, i + 1
+        dg = np.dot(grad, direction)
+        if dg == 0:
+            return None, g, grad, i + 1
+        ds = -g / dg
+        mu[comps] += ds * direction
+        if abs(ds) < xtol:
+            c = ref.reweight(mu, **reweight_kwargs)
+            g, grad = fgrad(c)
+            if not np.isfinite(g):
+                return None, g, grad, i + 2
+            return c, g, grad, i + 2
+    return None, g, grad, maxiter
+
+
+def _trace_level_set(ref, fgrad, start, comps=(0, 1), direction=+1, ds=0.1,
+                     ds_min=1e-4, ds_max=1.0, npoints=100, mu_min=None,
+                     mu_max=None, corrector_kwargs={}, reweight_kwargs={},
+                     control=None, full_output=False):
+    """
+    follow g(mu)==0 in plane comps.  see binodal.trace_binodal for parameters
+
+    start may also be a list of lnPi_phases objects already on the curve (a
+    previous output).  In that case the trace resumes from start[-1] without
+    correcting it, continuing in the direction of the last step.
+
+    control : callable, optional
+        control(output, ds) -> ds, called before each step.  Return the step
+        to take, or None to stop (status 'control')
+    """
+
+    comps = list(comps)
+    reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+    corrector_kwargs = dict(corrector_kwargs, reweight_kwargs=reweight_kwargs)
+
+    tangent = None
+    if isinstance(start, (list, tuple)):
+        output = list(start)
+        g, grad = fgrad(output[-1])
+        nfev = 0
+        if len(output) > 1:
+            tangent = output[-1].mu[comps] - output[-2].mu[comps]
+    else:
+        mu0 = np.array(getattr(start, 'mu', start), dtype=float)
+
+        #make sure start is on the curve.  correct along gradient
+        c = ref.reweight(mu0, **reweight_kwargs)
+        g, grad = fgrad(c)
+        nfev = 1
+        if not np.isfinite(g):
+            raise ValueError('condition not defined at start')
+        normal = grad / np.linalg.norm(grad)
+        c, g, grad, n = _corrector(ref, fgrad, mu0, normal, comps,
+                                   **corrector_kwargs)
+        nfev += n
+        if c is None:
+            raise RuntimeError('could not converge start to curve')
+        output = [c]
+
+    steps = []
+    status = 'npoints'
+
+    while len(output) < npoints:
+        normal = grad / np.linalg.norm(grad)
+        t = np.array([-normal[1], normal[0]])
+        if tangent is None:
+            t *= direction * np.sign(t[1]) if t[1] != 0 else direction
+        elif np.dot(t, tangent) < 0:
+            t = -t
+        tangent = t
+
+        if control is not None:
+            ds = control(output, ds)
+            if ds is None:
+                status = 'control'
+                break
+
+        while True:
+            mu_pred = output[-1].mu.copy()
+            mu_pred[comps] += ds * tangent
+
+            new, g_new, grad_new, n = _corrector(ref, fgrad, mu_pred, normal,
+                                                 comps, **corrector_kwargs)
+            nfev += n
+
+            if new is not None:
+                break
+
+            ds *= 0.5
+            if ds < ds_min:
+                status = 'phase_lost' if not np.isfinite(g_new) else 'ds_min'
+                break
+
+        if new is None:
+            break
+
+        if (mu_min is not None and np.any(new.mu < mu_min)) or \
+           (mu_max is not None and np.any(new.mu > mu_max)):
+            status = 'bounds'
+            break
+
+        output.append(new)
+        steps.append(ds)
+        g, grad = g_new, grad_new
+
+        #adapt step size
+        if n <= 2:
+            ds = min(1.5 * ds, ds_max)
+        elif n >= 4:
+            ds = max(0.5 * ds, ds_min)
+
+    if full_output:
+        info = dict(status=status, function_calls=nfev, ds=steps)
+        return output, info
+    else:
+        return output
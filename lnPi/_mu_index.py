@@ -0,0 +1,99 @@
+"""
+spatial index of mu values
+"""
+
+import itertools
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class MuIndex(object):
+    """
+    hash grid of mu values with cell size equal to the duplicate tolerance
+
+    A mu is a duplicate of a stored value if their distance is <= tol, with
+    tol = 0.5*10**(-decimals).  Duplicates can only be in the same or a
+    neighboring cell, so lookups check 3**ndim cells independent of the
+    number of stored values.
+
+    Parameters
+    ----------
+    mus : iterable, optional
+        initial mu values
+
+    decimals : int (Default 5)
+    """
+
+    def __init__(self, mus=None, decimals=5):
+        self.decimals = decimals
+        self.tol = 0.5 * 10**(-decimals)
+        self._cells = {}
+        self._mus = []
+        self._tree = None
+
+        if mus is not None:
+            for mu in mus:
+                self.add(mu)
+
+    def __len__(self):
+        return len(self._mus)
+
+    def _cell(self, mu):
+        return tuple(np.floor(mu / self.tol).astype(int).tolist())
+
+    def _neighbors(self, cell):
+        for offset in itertools.product((-1, 0, 1), repeat=len(cell)):
+            yield tuple(c + o for c, o in zip(cell, offset))
+
+    def add(self, mu):
+        """
+        add mu.  returns its index
+        """
+        mu = np.asarray(mu, dtype=float)
+        i = len(self._mus)
+        self._mus.append(mu)
+        self._cells.setdefault(self._cell(mu), []).append(i)
+        self._tree = None
+        return i
+
+    def find(self, mu):
+        """
+        index of stored value within tol of mu, or None
+        """
+        mu = np.asarray(mu, dtype=float)
+        for cell in self._neighbors(self._cell(mu)):
+            for i in self._cells.get(cell, ()):
+                if np.sqrt(((self._mus[i] - mu)**2).sum()) <= self.tol:
+                    return i
+        return None
+
+    def __contains__(self, mu):
+        return self.find(mu) is not None
+
+    def nearest(self, mu, k=1):
+        """
+        k nearest stored values to mu
+
+        Returns
+        -------
+        dist, index : as from scipy.spatial.cKDTree.query
+        """
+        if len(self._mus) == 0:
+            raise ValueError('empty index')
+        if self._tree is None:
+            self._tree = cKDTree(np.array(self._mus))
+        return self._tree.query(np.asarray(mu, dtype=float), k=k)
+
+    @classmethod
+    def first_mask(cls, mus, decimals=5):
+        """
+        mask which is False where mus[i] duplicates any mus[j], j<i
+        """
+        idx = cls(decimals=decimals)
+        keep = np.ones(len(mus), dtype=bool)
+        for i, mu in enumerate(mus):
+            if idx.find(mu) is not None:
+                keep[i] = False
+            idx.add(mu)
+        return keep
@@ -113,3 +113,88 @@ def sort_lnPis(input,comp=0):
     output = [input[i] for i in order]
 
     return output
+
+
+class MuLine(object):
+    """
+    straight line in mu space, mu(x) = origin + x*direction
+
+    Parameters
+    ----------
+    origin : array
+
+    direction : array
+    """
+
+    def __init__(self, origin, direction):
+        self.origin = np.array(origin, dtype=float)
+        self.direction = np.array(direction, dtype=float)
+
+    def __call__(self, x):
+        return self.origin + x * self.direction
+
+    def x_of(self, mu):
+        """
+        coordinate of (projection of) mu along line
+        """
+        d = self.direction
+        return np.dot(np.asarray(mu, dtype=float) - self.origin, d) / np.dot(d, d)
+
+    @classmethod
+    def from_mu_in(cls, mu_in):
+        """
+        line from list with one element equal to None (see get_mu_iter).
+        x is the value of the None component
+        """
+        idx = list(mu_in).index(None)
+        origin = np.array([0.0 if m is None else m for m in mu_in], dtype=float)
+        direction = np.zeros(len(mu_in))
+        direction[idx] = 1.0
+        return cls(origin, direction)
+
+    @classmethod
+    def from_points(cls, muA, muB):
+        """
+        line through muA and muB.
+
+        if only one component differs, x is the value of that component.
+        otherwise, x is the distance from muA (unit direction toward muB)
+        """
+        muA = np.array(muA, dtype=float)
+        muB = np.array(muB, dtype=float)
+        msk = muA != muB
+        if msk.sum() == 0:
+            raise ValueError('muA and muB are equal')
+        elif msk.sum() == 1:
+            mu_in = list(muA)
+            mu_in[np.where(msk)[0][0]] = None
+            return cls.from_mu_in(mu_in)
+        else:
+            d = muB - muA
+            return cls(muA, d / np.sqrt((d**2).sum()))
+
+
+def as_mu_line(mu_in):
+    """
+    convert mu_in (MuLine or list with one None) to MuLine
+    """
+    if isinstance(mu_in, MuLine):
+        return mu_in
+    return MuLine.from_mu_in(mu_in)
+
+
+def _root_results(root, iterations, function_calls, flag, method=None):
+    """
+    scipy.optimize.RootResults for solvers in this package
+
+    newer scipy requires `method` (and no longer exposes RootResults in
+    scipy.optimize.zeros), older scipy does not accept it
+    """
+    from scipy.optimize import RootResults
+    try:
+        return RootResults(root=root, iterations=iterations,
+                           function_calls=function_calls, flag=flag,
+                           method=method)
+    except TypeError:
+        return RootResults(root=root, iterations=iterations,
+                           function_calls=function_calls, flag=flag)
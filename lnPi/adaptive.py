@@ -0,0 +1,203 @@
+"""
+routines to build mu grids adaptively
+
+Start from a coarse grid and bisect only those intervals over which the phase
+behavior changes or the grand potential varies quickly.  This gives the same
+bracketing information for spinodals and binodals as a uniform fine grid with
+far fewer reweight/segmentation calls.
+
+Since dOmega/dmu = -<N>, the error of linear interpolation of beta*Omega over
+an interval of width dx is about beta*|<N>_B - <N>_A|*dx/8.  This is the
+quantity compared with omega_tol.
+"""
+
+import itertools
+
+import numpy as np
+
+from lnPi._utils import get_mu_iter
+from lnPi.instrument import progress
+
+__all__ = ['get_lnpis_adaptive']
+
+
+class _Point(object):
+    """
+    state point and the summaries used to decide refinement
+    """
+
+    def __init__(self, x, lnpi, efac, DeltabetaE_kwargs, mu_idx):
+        self.x = x
+        self.lnpi = lnpi
+        self.nphase = lnpi.nphase
+        self.has = lnpi.has_phaseIDs
+        self.Omegas = lnpi.Omegas_phaseIDs()
+        self.molfracs = lnpi.molfracs_phaseIDs
+        self.N = lnpi.Naves_phaseIDs[:, mu_idx]
+        self.beta = lnpi.base.beta
+        self._efac = efac
+        self._DeltabetaE_kwargs = DeltabetaE_kwargs
+        self._dE = None
+
+    @property
+    def dE(self):
+        """
+        DeltabetaE_phaseIDs - efac (computed on first use)
+
+        Only the sign is used.  A single phase has no barrier, so its value is
+        vmax - efac without building the transition matrix
+        """
+        if self._dE is None:
+            if self.nphase == 1:
+                vmax = self._DeltabetaE_kwargs.get('vmax', 1e20)
+                self._dE = np.where(self.has, vmax - self._efac, np.nan)
+            else:
+                self._dE = self.lnpi.DeltabetaE_phaseIDs(
+                    **self._DeltabetaE_kwargs) - self._efac
+        return self._dE
+
+
+def _needs_refine(A, B, molfrac_tol, omega_tol):
+    """
+    True if phase behavior changes between points A and B, or if Omega or the
+    molfracs vary quickly
+    """
+    if A.nphase != B.nphase:
+        return True
+
+    if np.any(A.has != B.has):
+        return True
+
+    both = A.has & B.has
+    ids = np.where(both)[0]
+
+    #fast variation
+    if omega_tol is not None and len(ids) > 0:
+        err = A.beta * np.abs(B.N[ids] - A.N[ids]) * abs(B.x - A.x) / 8.0
+        if np.nanmax(err) > omega_tol:
+            return True
+
+    if molfrac_tol is not None and len(ids) > 0:
+        if np.nanmax(np.abs(A.molfracs[ids] - B.molfracs[ids])) > molfrac_tol:
+            return True
+
+    #binodal condition crossed
+    for i, j in itertools.combinations(ids, 2):
+        if np.sign(A.Omegas[i] - A.Omegas[j]) != np.sign(B.Omegas[i] -
+                                                         B.Omegas[j]):
+            return True
+
+    #spinodal condition crossed (last, as it needs the barriers)
+    if np.any(np.sign(A.dE[both]) != np.sign(B.dE[both])):
+        return True
+
+    return False
+
+
+def get_lnpis_adaptive(ref,
+                       mu,
+                       x,
+                       dx_min,
+                       efac=1.0,
+                       molfrac_tol=0.1,
+                       omega_tol=1.0,
+                       maxeval=1000,
+                       reweight_kwargs=None,
+                       DeltabetaE_kwargs=None,
+                       full_output=False):
+    """
+    build list of lnpi_phases with adaptively refined mu grid
+
+    Parameters
+    ----------
+    ref : lnpi_phases object
+        object to reweight
+
+    mu : list
+        list with one element equal to None (see get_mu_iter)
+
+    x : array
+        initial (coarse) values of variable component
+
+    dx_min : float
+        do not bisect intervals narrower than this
+
+    efac : float (Default 1.0)
+        bisect if DeltabetaE_phaseIDs - efac changes sign
+
+    molfrac_tol : float or None (Default 0.1)
+        if not None, also bisect if molfracs_phaseIDs change by more than this
+
+    omega_tol : float or None (Default 1.0)
+        if not None, also bisect if the estimated error of linear
+        interpolation of beta*Omega_phaseIDs over the interval exceeds this
+
+    maxeval : int (Default 1000)
+        max number of state points to evaluate
+
+    reweight_kwargs : dict, optional
+        extra arguments to ref.reweight.  Default ZeroMax=True
+
+    DeltabetaE_kwargs : dict, optional
+        extra arguments to DeltabetaE_phaseIDs
+
+    full_output : bool (Default False)
+        if True, also return final grid and number of evaluations
+
+    Returns
+    -------
+    output : list of lnpi_phases, sorted by x
+
+    info : dict (optional, returned if full_output is True)
+        x : final grid
+        nevals : number of state points evaluated
+        converged : False if maxeval was reached before dx_min
+    """
+
+    if reweight_kwargs is None:
+        reweight_kwargs = {}
+    if DeltabetaE_kwargs is None:
+        DeltabetaE_kwargs = {}
+    reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+    mu_idx = [i for i, m in enumerate(mu) if m is None][0]
+
+    def build(xx):
+        m = get_mu_iter(mu, [xx])[0]
+        p = _Point(xx, ref.reweight(m, **reweight_kwargs), efac,
+                   DeltabetaE_kwargs, mu_idx)
+        progress('adaptive', x=xx, mu=m)
+        return p
+
+    points = [build(xx) for xx in sorted(np.asarray(x, dtype=float))]
+    nevals = len(points)
+
+    #stack of intervals to check
+    stack = [(a, b) for a, b in zip(points[:-1], points[1:])]
+    converged = True
+    while stack:
+        A, B = stack.pop()
+
+        if B.x - A.x <= dx_min or not _needs_refine(A, B, molfrac_tol, omega_tol):
+            continue
+
+        if nevals >= maxeval:
+            converged = False
+            break
+
+        M = build(0.5 * (A.x + B.x))
+        nevals += 1
+        points.append(M)
+        stack.append((M, B))
+        stack.append((A, M))
+
+    points.sort(key=lambda p: p.x)
+    output = [p.lnpi for p in points]
+
+    if full_output:
+        info = dict(
+            x=np.array([p.x for p in points]),
+            nevals=nevals,
+            converged=converged)
+        return output, info
+    else:
+        return output
@@ -0,0 +1,403 @@
+"""
+routines to solve many lines at once
+
+All lines advance in lockstep.  Each iteration is a single batched reweight
+(one numpy operation over the stacked data) followed by an evaluation of
+the active lines.
+"""
+
+import numpy as np
+
+from lnPi.state_cache import get_state_cache
+from lnPi._utils import MuLine
+
+__all__ = [
+    'reweight_batch', 'chandrupatla', 'get_binodal_points_batch',
+    'find_mu_molfrac_batch', 'solve_spinodal_batch'
+]
+
+
+def reweight_batch(ref, mus, ZeroMax=True, Pad=False):
+    """
+    reweight ref to many mu at once
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+
+    mus : array of shape (nmu,ncomp)
+
+    ZeroMax, Pad : bool
+        see lnPi.reweight
+
+    Returns
+    -------
+    output : list of lnPi_phases objects (phases built on demand).
+        consults the state cache if enabled
+    """
+
+    mus = np.atleast_2d(np.asarray(mus, dtype=float))
+
+    cache = get_state_cache()
+    if cache is not None:
+        keys = [cache.key(ref, mu, ZeroMax, Pad) for mu in mus]
+        output = [cache.get(k) for k in keys]
+        miss = [i for i, x in enumerate(output) if x is None]
+        if miss:
+            for i, x in zip(miss, _reweight_batch(ref, mus[miss], ZeroMax,
+                                                  Pad)):
+                cache.put(keys[i], x)
+                output[i] = x
+        return output
+
+    return _reweight_batch(ref, mus, ZeroMax, Pad)
+
+
+def _reweight_batch(ref, mus, ZeroMax, Pad):
+    base = ref.base
+    dmu = mus - base.mu[None, :]
+
+    #shift[m,...] = beta * sum_i N_i * dmu[m,i]
+    shift = np.tensordot(dmu, base.coords, axes=(1, 0)) * base.beta
+    data = base.data[None, ...] + shift
+
+    mask = np.ma.getmaskarray(base)
+    if ZeroMax:
+        axes = tuple(range(1, data.ndim))
+        vmax = np.ma.array(data, mask=np.broadcast_to(mask, data.shape))\
+                 .max(axis=axes).filled(0.0)
+        data -= vmax.reshape((-1, ) + (1, ) * base.ndim)
+
+    output = []
+    for d, mu in zip(data, mus):
+        new = type(base).from_state(
+            dict(
+                data=d,
+                mask=mask.copy(),
+                fill_value=base.fill_value,
+                optinfo=dict(base._optinfo, mu=mu)))
+        if Pad:
+            new.Pad(inplace=True)
+        new = ref.copy(base=new, phases='get', argmax='get')
+        if hasattr(ref, '_root_hash') and not Pad:
+            new._root_hash = ref._root_hash
+        output.append(new)
+    return output
+
+
+def chandrupatla(f, a, b, fa=None, fb=None, xtol=1e-8, ftol=0.0, maxiter=50):
+    """
+    vectorized bracketing root finder (Chandrupatla's method)
+
+    Parameters
+    ----------
+    f : callable
+        f(x, index) -> array of function values.  x is array of trial values
+        for lines `index` (integer array into a/b)
+
+    a, b : arrays
+        brackets for each line.  f(a) and f(b) must differ in sign
+
+    fa, fb : arrays, optional
+        f(a), f(b) if already known
+
+    xtol : float (Default 1e-8)
+        absolute tolerance in x
+
+    ftol : float (Default 0.0)
+        converged if abs(f) <= ftol
+
+    maxiter : int (Default 50)
+
+    Returns
+    -------
+    x : array
+        roots (nan for lines without sign change)
+
+    info : dict
+        converged : bool array
+        iterations : int array
+        function_calls : total number of line evaluations
+    """
+
+    x1 = np.array(a, dtype=float)
+    x2 = np.array(b, dtype=float)
+    n = len(x1)
+    allidx = np.arange(n)
+
+    nfev = 0
+    if fa is None:
+        fa = f(x1, allidx)
+        nfev += n
+    if fb is None:
+        fb = f(x2, allidx)
+        nfev += n
+    f1 = np.array(fa, dtype=float)
+    f2 = np.array(fb, dtype=float)
+
+    x3 = x2.copy()
+    f3 = f2.copy()
+
+    root = np.empty(n) * np.nan
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=int)
+
+    #lines already at root
+    for x, fx in [(x1, f1), (x2, f2)]:
+        done = (fx == 0) & ~converged
+        root[done] = x[done]
+        converged[done] = True
+
+    active = ~converged & (np.sign(f1) != np.sign(f2)) & \
+             np.isfinite(f1) & np.isfinite(f2)
+    t = np.ones(n) * 0.5
+    eps = np.finfo(float).eps
+
+    for it in range(maxiter):
+        idx = np.where(active)[0]
+        if len(idx) == 0:
+            break
+
+        xt = x1[idx] + t[idx] * (x2[idx] - x1[idx])
+        ft = np.asarray(f(xt, idx), dtype=float)
+        nfev += len(idx)
+        iterations[idx] += 1
+
+        same = np.sign(ft) == np.sign(f1[idx])
+        #if same sign: x3 <- x1, else x3 <- x2, x2 <- x1
+        x3[idx] = np.where(same, x1[idx], x2[idx])
+        f3[idx] = np.where(same, f1[idx], f2[idx])
+        x2[idx] = np.where(same, x2[idx], x1[idx])
+        f2[idx] = np.where(same, f2[idx], f1[idx])
+        x1[idx] = xt
+        f1[idx] = ft
+
+        use1 = np.abs(f1[idx]) < np.abs(f2[idx])
+        xm = np.where(use1, x1[idx], x2[idx])
+        fm = np.where(use1, f1[idx], f2[idx])
+
+        tol = 2 * eps * np.abs(xm) + 0.5 * xtol
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tlim = tol / np.abs(x2[idx] - x1[idx])
+
+        done = (tlim > 0.5) | (np.abs(fm) <= ftol) | ~np.isfinite(ft)
+        root[idx[done]] = np.where(np.isfinite(ft[done]), xm[done], np.nan)
+        converged[idx[done]] = np.isfinite(ft[done])
+        active[idx[done]] = False
+
+        #next t: inverse quadratic if safe, else bisection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            i1, i2, i3 = x1[idx], x2[idx], x3[idx]
+            g1, g2, g3 = f1[idx], f2[idx], f3[idx]
+            xi = (i1 - i2) / (i3 - i2)
+            phi = (g1 - g2) / (g3 - g2)
+            tq = g1 / (g2 - g1) * g3 / (g2 - g3) + \
+                 (i3 - i1) / (i2 - i1) * g1 / (g3 - g1) * g2 / (g3 - g2)
+            iqi = (phi**2 < xi) & ((1 - phi)**2 < 1 - xi)
+            tn = np.where(iqi & np.isfinite(tq), tq, 0.5)
+            tn = np.minimum(np.maximum(tn, tlim), 1 - tlim)
+        t[idx] = np.where(np.isfinite(tn), tn, 0.5)
+
+    #lines still active at maxiter
+    idx = np.where(active)[0]
+    use1 = np.abs(f1[idx]) < np.abs(f2[idx])
+    root[idx] = np.where(use1, x1[idx], x2[idx])
+
+    info = dict(
+        converged=converged, iterations=iterations, function_calls=nfev)
+    return root, info
+
+
+################################################################################
+#line solvers
+################################################################################
+def _parse_lines(muAs, muBs):
+    """
+    lines between muAs[i] and muBs[i] (see MuLine.from_points)
+
+    Returns
+    -------
+    origins, directions : arrays of shape (nline,ncomp)
+
+    a,b : arrays of shape (nline,)
+        positions of muAs and muBs along each line
+    """
+    muAs = np.atleast_2d(np.asarray(muAs, dtype=float))
+    muBs = np.atleast_2d(np.asarray(muBs, dtype=float))
+
+    lines = [MuLine.from_points(A, B) for A, B in zip(muAs, muBs)]
+    origins = np.array([x.origin for x in lines])
+    directions = np.array([x.direction for x in lines])
+    a = np.array([x.x_of(A) for x, A in zip(lines, muAs)])
+    b = np.array([x.x_of(B) for x, B in zip(lines, muBs)])
+    return origins, directions, a, b
+
+
+def _solve_lines(ref, muAs, muBs, value, reweight_kwargs, solve_kwargs):
+    """
+    solve value(lnpi_phases, line) == 0 along each line
+    """
+    if reweight_kwargs is None:
+        reweight_kwargs = {}
+    if solve_kwargs is None:
+        solve_kwargs = {}
+
+    origins, directions, a, b = _parse_lines(muAs, muBs)
+
+    def get_mus(x, idx):
+        return origins[idx] + np.asarray(x)[:, None] * directions[idx]
+
+    def f(x, idx):
+        L = reweight_batch(ref, get_mus(x, idx), **reweight_kwargs)
+        return np.array([value(c, i) for c, i in zip(L, idx)])
+
+    root, info = chandrupatla(f, a, b, **solve_kwargs)
+
+    #final objects at roots
+    ok = np.isfinite(root)
+    idx = np.where(ok)[0]
+    output = [None] * len(root)
+    if len(idx) > 0:
+        for i, c in zip(idx, reweight_batch(ref, get_mus(root[idx], idx),
+                                            **reweight_kwargs)):
+            output[i] = c
+    info['root'] = root
+    return output, info
+
+
+def get_binodal_points_batch(ref, IDs, muAs, muBs, reweight_kwargs=None,
+                             full_output=False, **kwargs):
+    """
+    binodal points Omega[IDs[0]]==Omega[IDs[1]] along many lines
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+
+    IDs : (ID0,ID1)
+
+    muAs, muBs : arrays of shape (nline,ncomp)
+        brackets for each line.  if more than one component differs, solve
+        along the straight line between them
+
+    reweight_kwargs : dict, optional
+        arguments to reweight_batch
+
+    full_output : bool (Default False)
+        if True, return info dict
+
+    **kwargs : extra arguments to chandrupatla
+
+    Returns
+    -------
+    output : list of lnPi_phases (None if not found)
+
+    info : dict (optional)
+    """
+
+    def value(c, i):
+        Omegas = c.Omegas_phaseIDs()
+        return Omegas[IDs[0]] - Omegas[IDs[1]]
+
+    output, info = _solve_lines(ref, muAs, muBs, value, reweight_kwargs,
+                                kwargs)
+    if full_output:
+        return output, info
+    else:
+        return output
+
+
+def find_mu_molfrac_batch(ref, phaseID, targets, muAs, muBs, comp=0,
+                          reweight_kwargs=None, full_output=False, **kwargs):
+    """
+    mu with molfracs_phaseIDs[phaseID,comp]==targets[i] along many lines
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+
+    phaseID : int
+
+    targets : float or array of shape (nline,)
+
+    muAs, muBs : arrays of shape (nline,ncomp)
+        brackets for each line.  if more than one component differs, solve
+        along the straight line between them
+
+    comp : int (Default 0)
+
+    reweight_kwargs : dict, optional
+
+    full_output : bool (Default False)
+
+    **kwargs : extra arguments to chandrupatla
+
+    Returns
+    -------
+    output : list of lnPi_phases (None if not found)
+
+    info : dict (optional)
+    """
+
+    targets = np.broadcast_to(np.asarray(targets, dtype=float),
+                              (len(np.atleast_2d(muAs)), ))
+
+    def value(c, i):
+        if c.nphase == 1:
+            mf = c.molfracs[0, comp]
+        else:
+            mf = c.molfracs_phaseIDs[phaseID, comp]
+        return mf - targets[i]
+
+    output, info = _solve_lines(ref, muAs, muBs, value, reweight_kwargs,
+                                kwargs)
+    if full_output:
+        return output, info
+    else:
+        return output
+
+
+def solve_spinodal_batch(ref, ID, muAs, muBs, efac=1.0, reweight_kwargs=None,
+                         DeltabetaE_kwargs=None, full_output=False, **kwargs):
+    """
+    spinodal points DeltabetaE_phaseIDs[ID]==efac along many lines
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+
+    ID : int
+        phaseID
+
+    muAs, muBs : arrays of shape (nline,ncomp)
+        brackets for each line (e.g., from spinodal bracket refinement)
+
+    efac : float (Default 1.0)
+
+    reweight_kwargs : dict, optional
+
+    DeltabetaE_kwargs : dict, optional
+
+    full_output : bool (Default False)
+
+    **kwargs : extra arguments to chandrupatla
+
+    Returns
+    -------
+    output : list of lnPi_phases (None if not found)
+
+    info : dict (optional)
+    """
+
+    if DeltabetaE_kwargs is None:
+        DeltabetaE_kwargs = {}
+
+    def value(c, i):
+        return c.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID] - efac
+
+    output, info = _solve_lines(ref, muAs, muBs, value, reweight_kwargs,
+                                kwargs)
+    if full_output:
+        return output, info
+    else:
+        return output
@@ -5,9 +5,22 @@ routines to find binodal point between two phases
 import numpy as np
 from scipy import optimize
 
+from lnPi.frozen import solve_frozen
+from lnPi._utils import MuLine, _root_results
+from lnPi._continuation import _corrector, _trace_level_set
+from lnPi.trace import SolveInfo, record_eval, record_message, with_trace
+
+__all__ = [
+    'get_binodal_point', 'get_binodal_point_newton', 'trace_binodal',
+    'get_multiphase_point'
+]
+
+
+@with_trace('get_binodal_point')
 def get_binodal_point(ref,IDs,muA,muB,
                       reweight_kwargs={},
                       full_output=False,
+                      frozen=False,
                       **kwargs):
     """
     calculate binodal point where Omega[ID[0]]==Omega[ID[1]]
@@ -20,7 +33,8 @@ def get_binodal_point(ref,IDs,muA,muB,
     IDs : (ID0,ID1)
         phaseIDs of pair to equate
 
-    muA,muB : mu arrays bracketing solution
+    muA,muB : mu arrays bracketing solution.
+        if more than one component differs, solve along the line between them
 
     reweight_kwargs : dict
         extra arguments to reweight
@@ -28,50 +42,497 @@ def get_binodal_point(ref,IDs,muA,muB,
     full_output : bool (Default False)
         if True, return solve stats
 
+    frozen : bool (Default False)
+        if True, solve with the phase partition from a bracket endpoint held
+        fixed (see lnPi.frozen), re-segmenting only to verify the root or when
+        a phase maximum reaches its border.  Falls back to the full solve if
+        the partition cannot be verified
+
     **kwargs : extra arguments to scipy.optimize.brentq
 
     Returns
     -------
     binodal : lnPi_phases object at binodal point
 
-    stats : solve stats object from brentq (optional, returned if full_output is True)
+    stats : SolveInfo (optional, returned if full_output is True)
+        brentq results, with residual (Omega difference at root).
+        stats.trace is a SolverTrace of the solve
      """
 
     assert len(IDs)==2
 
-    muA = np.asarray(muA)
-    muB = np.asarray(muB)
-    
-    
-    msk = muA != muB
-    if msk.sum()!=1:
-        raise ValueError('only one value can vary between muA and muB')
+    line = MuLine.from_points(muA, muB)
+    a,b = sorted([line.x_of(muA), line.x_of(muB)])
 
-    mu_idx = np.where(msk)[0][0]
-    mu_in = muA.copy()
-
-    a,b = sorted([x[mu_idx] for x in [muA,muB]])
-    
     reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
 
+    def value(c):
+        Omegas = c.Omegas_phaseIDs()
+        return Omegas[IDs[0]] - Omegas[IDs[1]]
+
+    if frozen:
+        c,r = solve_frozen(ref,value,line,a,b,IDs=list(IDs),
+                           reweight_kwargs=reweight_kwargs,**kwargs)
+        if c is not None and r.consistent:
+            if full_output:
+                return c,r
+            else:
+                return c
     
     def f(x):
-        mu = mu_in[:]
-        mu[mu_idx] = x
-        c = ref.reweight(mu,**reweight_kwargs)
+        c = ref.reweight(line(x),**reweight_kwargs)
         f.lnpi = c
         
-        Omegas = c.Omegas_phaseIDs()
-        
-        return Omegas[IDs[0]] - Omegas[IDs[1]]
+        v = value(c)
+        record_eval('solve',c.mu,v)
+        return v
 
 
     xx,r = optimize.brentq(f,a,b,full_output=True,**kwargs)
 
-    r.residual = f(xx)
+    r = SolveInfo(r,residual=f(xx))
 
     if full_output:
         return f.lnpi,r
     else:
         return f.lnpi
 
+
+
+@with_trace('get_binodal_point_newton')
+def get_binodal_point_newton(ref,IDs,muA,muB,
+                             x0=None,
+                             xtol=1e-8,
+                             ftol=1e-10,
+                             maxiter=20,
+                             halley=True,
+                             reweight_kwargs={},
+                             disp=True,
+                             full_output=False):
+    """
+    calculate binodal point where Omega[ID[0]]==Omega[ID[1]] using derivatives
+
+    Uses the exact derivatives of Omega along the line mu(x) = mu0 + x*d
+    between muA and muB,
+
+    dOmega_i/dx = -<N>_i . d
+    d^2 Omega_i/dx^2 = -beta * d . cov(N)_i . d
+
+    so each iteration costs a single reweight (plus two for the bracket
+    ends).  The bracket is shrunk by the sign of the residual at each
+    iterate, and steps leaving it are replaced by bisection.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    IDs : (ID0,ID1)
+        phaseIDs of pair to equate
+
+    muA,muB : mu arrays bracketing solution.
+        if more than one component differs, solve along the line between them
+
+    x0 : float, optional
+        initial position along line (see MuLine.from_points).  Default is
+        midpoint of bracket
+
+    xtol : float (Default 1e-8)
+        converged if the bracket is narrower than xtol
+
+    ftol : float (Default 1e-10)
+        converged if abs(Omega[ID0]-Omega[ID1]) is less than ftol
+
+    maxiter : int (Default 20)
+        max number of iterations
+
+    halley : bool (Default True)
+        if True, use Halley's method (uses cov(N)).  else Newton
+
+    reweight_kwargs : dict
+        extra arguments to reweight
+
+    disp : bool (Default True)
+        if True, raise RuntimeError if not converged (as brentq does).
+        else return the last iterate (check stats.flag)
+
+    full_output : bool (Default False)
+        if True, return solve stats
+
+    Returns
+    -------
+    binodal : lnPi_phases object at binodal point (or last iterate)
+
+    stats : SolveInfo (optional, returned if full_output is True)
+        flag==0 if converged.  root is the position of binodal along the
+        line, and residual its Omega difference.  If the brentq fallback was
+        used, also newton_iterations
+
+    Notes
+    -----
+    If either phase is absent at an iterate, the remaining bracket is
+    solved with get_binodal_point (brentq)
+    """
+
+    assert len(IDs)==2
+
+    line = MuLine.from_points(muA, muB)
+    d = line.direction
+    lo, hi = sorted([line.x_of(muA), line.x_of(muB)])
+    reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
+
+    def evaluate(x):
+        c = ref.reweight(line(x),**reweight_kwargs)
+        Omegas = c.Omegas_phaseIDs()
+        return c, Omegas[IDs[0]] - Omegas[IDs[1]]
+
+    #values at bracket ends.  The bracket is shrunk by the sign of f
+    c_lo, f_lo = evaluate(lo)
+    c_hi, f_hi = evaluate(hi)
+    nfev = 2
+    if not (np.isfinite(f_lo) and np.isfinite(f_hi)) or f_lo*f_hi > 0:
+        raise ValueError('f(a) and f(b) must be finite and have different signs')
+
+    if x0 is None:
+        x0 = 0.5*(lo+hi)
+
+    #start from the better bracket end if it already satisfies ftol
+    if abs(f_lo) <= abs(f_hi):
+        x, c, f = lo, c_lo, f_lo
+    else:
+        x, c, f = hi, c_hi, f_hi
+    converged = abs(f) < ftol
+    i = -1
+
+    x_new = x0
+    for i in range(0 if converged else maxiter):
+        x = x_new
+        c, f = evaluate(x)
+        nfev += 1
+
+        if not np.isfinite(f):
+            #lost a phase. fall back to bracketing solve
+            c, r = get_binodal_point(ref,IDs,line(lo),line(hi),
+                                     reweight_kwargs=reweight_kwargs,
+                                     full_output=True)
+            r = SolveInfo(r.results,residual=r.residual,newton_iterations=i)
+            if full_output:
+                return c, r
+            else:
+                return c
+
+        if abs(f) < ftol:
+            converged = True
+            break
+
+        #keep root bracketed: replace the end with the same sign as f
+        if np.sign(f) == np.sign(f_lo):
+            lo, f_lo, c_lo = x, f, c
+        else:
+            hi, f_hi, c_hi = x, f, c
+
+        if hi - lo < xtol:
+            #root is within xtol.  report the better end
+            if abs(f_lo) <= abs(f_hi):
+                x, c, f = lo, c_lo, f_lo
+            else:
+                x, c, f = hi, c_hi, f_hi
+            converged = True
+            break
+
+        N = np.dot(c.Naves_phaseIDs[list(IDs),:], d)
+        df = -(N[0] - N[1])
+
+        if df == 0:
+            x_new = 0.5*(lo+hi)
+        else:
+            if halley:
+                var = np.dot(np.dot(c.Ncovs_phaseIDs[list(IDs)], d), d)
+                d2f = -c.beta * (var[0] - var[1])
+                step = 2*f*df/(2*df*df - f*d2f)
+            else:
+                step = f/df
+            x_new = x - step
+
+            #a step below xtol is stretched to xtol, so that the next
+            #iterate lands across the root and closes the bracket
+            if abs(x_new - x) < xtol:
+                x_new = x - np.sign(step)*xtol
+
+        if not (lo < x_new < hi):
+            x_new = 0.5*(lo+hi)
+
+    r = SolveInfo(_root_results(root=x, iterations=i+1, function_calls=nfev,
+                                flag=0 if converged else -2, method='newton'),
+                  residual=f)
+
+    if not converged and disp:
+        msg = 'binodal newton did not converge after %i iterations: ' \
+              'x=%s, residual=%s' % (maxiter, x, f)
+        record_message(msg)
+        raise RuntimeError(msg)
+
+    if full_output:
+        return c,r
+    else:
+        return c
+
+
+def _binodal_grad(c, IDs, comps):
+    """
+    value and gradient (over comps) of Omega[ID0]-Omega[ID1]
+
+    d(Omega_0 - Omega_1)/dmu_k = -(<N_k>_0 - <N_k>_1)
+    """
+    Omegas = c.Omegas_phaseIDs()
+    g = Omegas[IDs[0]] - Omegas[IDs[1]]
+    N = c.Naves_phaseIDs[list(IDs),:][:,comps]
+    grad = -(N[0] - N[1])
+    return g, grad
+
+
+def _binodal_corrector(ref,IDs,mu,direction,comps,
+                       xtol=1e-8,ftol=1e-10,maxiter=5,
+                       reweight_kwargs={}):
+    """
+    Newton solve of Omega[ID0]==Omega[ID1] along mu + s*direction
+
+    see _continuation._corrector
+    """
+    return _corrector(ref,lambda c: _binodal_grad(c,IDs,comps),mu,direction,
+                      comps,xtol=xtol,ftol=ftol,maxiter=maxiter,
+                      reweight_kwargs=reweight_kwargs)
+
+
+def trace_binodal(ref,IDs,start,
+                  comps=(0,1),
+                  direction=+1,
+                  ds=0.1,
+                  ds_min=1e-4,
+                  ds_max=1.0,
+                  npoints=100,
+                  mu_min=None,
+                  mu_max=None,
+                  corrector_kwargs={},
+                  reweight_kwargs={},
+                  full_output=False):
+    """
+    trace binodal curve Omega[ID0]==Omega[ID1] by pseudo-arclength continuation
+
+    Along the coexistence curve d(Omega_0 - Omega_1) = 0, so the tangent is
+    perpendicular to the difference in <N> of the two phases (a Clapeyron
+    like relation).  Each step predicts along the tangent, then corrects with
+    Newton iterations along the normal.  The step size grows after easy
+    corrections and shrinks after hard or failed ones.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    IDs : (ID0,ID1)
+        phaseIDs of pair
+
+    start : lnPi_phases object or array
+        point on binodal (e.g., from get_binodal_point), or mu near one
+
+    comps : tuple of two ints (Default (0,1))
+        components of mu which vary.  others are fixed at start values
+
+    direction : +1 or -1 (Default +1)
+        initial direction along curve.  +1 means initial tangent has
+        positive component comps[1]
+
+    ds : float (Default 0.1)
+        initial arclength step (in mu units)
+
+    ds_min, ds_max : floats
+        limits of step size. Tracing stops if step falls below ds_min
+
+    npoints : int (Default 100)
+        max number of points
+
+    mu_min, mu_max : arrays, optional
+        stop when a point leaves these bounds
+
+    corrector_kwargs : dict
+        extra arguments (xtol,ftol,maxiter) to corrector
+
+    reweight_kwargs : dict
+        extra arguments to reweight
+
+    full_output : bool (Default False)
+        if True, return info dict
+
+    Returns
+    -------
+    output : list of lnPi_phases objects along binodal
+
+    info : dict (optional, returned if full_output is True)
+        status : str, reason for stopping ('npoints', 'bounds', 'phase_lost', 'ds_min')
+        function_calls : number of reweights
+        ds : list of accepted step sizes
+    """
+
+    assert len(IDs)==2
+
+    return _trace_level_set(ref,lambda c: _binodal_grad(c,IDs,list(comps)),
+                            start,comps=comps,direction=direction,ds=ds,
+                            ds_min=ds_min,ds_max=ds_max,npoints=npoints,
+                            mu_min=mu_min,mu_max=mu_max,
+                            corrector_kwargs=corrector_kwargs,
+                            reweight_kwargs=reweight_kwargs,
+                            full_output=full_output)
+
+
+@with_trace('get_multiphase_point')
+def get_multiphase_point(ref,IDs,mu,
+                         comps=None,
+                         xtol=1e-8,
+                         ftol=1e-10,
+                         maxiter=30,
+                         nbacktrack=8,
+                         max_step=1.0,
+                         reweight_kwargs={},
+                         errors='raise',
+                         full_output=False):
+    """
+    calculate point where Omega is equal across k phases (e.g. triple point)
+
+    Solves F_m = Omega[ID0] - Omega[ID_m] = 0, m=1..k-1, over k-1
+    components of mu by damped Newton with the exact Jacobian
+
+    dF_m/dmu_j = -(<N_j>_ID0 - <N_j>_IDm)
+
+    Steps are backtracked (halved) if a phase is lost or |F| does not
+    decrease.  State points come from ref.reweight, so they share the state
+    cache if enabled.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    IDs : list of k phaseIDs
+
+    mu : array
+        initial guess
+
+    comps : list of k-1 ints, optional
+        components of mu to vary.  Default first k-1 components
+
+    xtol : float (Default 1e-8)
+        stop if max step in mu is less than xtol
+
+    ftol : float (Default 1e-10)
+        converged if max abs(F) is less than ftol.  Stopping on xtol only
+        counts as converged if this also holds
+
+    maxiter : int (Default 30)
+
+    nbacktrack : int (Default 8)
+        max number of step halvings per iteration
+
+    max_step : float (Default 1.0)
+        max norm of a single step
+
+    reweight_kwargs : dict
+        extra arguments to reweight
+
+    errors : str (Default 'raise')
+        if 'raise', raise RuntimeError if not converged.
+        if 'ignore', return last point (check r.flag)
+
+    full_output : bool (Default False)
+        if True, return solve stats
+
+    Returns
+    -------
+    output : lnPi_phases object at coexistence point
+
+    r : SolveInfo (optional, returned if full_output is True)
+        root is mu, flag 0 if converged, -2 otherwise.  Also residual (F at
+        root), mus (mu at each iteration) and norms (max abs(F) at each
+        iteration)
+    """
+
+    IDs = list(IDs)
+    k = len(IDs)
+    if k < 2:
+        raise ValueError('need at least two phaseIDs')
+    if comps is None:
+        comps = list(range(k-1))
+    comps = list(comps)
+    if len(comps) != k-1:
+        raise ValueError('need len(comps) == len(IDs)-1')
+
+    if errors not in ('raise','ignore'):
+        raise ValueError('bad errors parameter %s' % errors)
+
+    reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
+
+    def evaluate(mu):
+        c = ref.reweight(mu,**reweight_kwargs)
+        Omegas = c.Omegas_phaseIDs()
+        N = c.Naves_phaseIDs[IDs,:][:,comps]
+        F = Omegas[IDs[0]] - Omegas[IDs[1:]]
+        J = -(N[0][None,:] - N[1:])
+        return c,F,J
+
+    mu = np.array(mu,dtype=float)
+    c,F,J = evaluate(mu)
+    nfev = 1
+    if not np.all(np.isfinite(F)):
+        raise ValueError('all phases must be present at initial mu')
+
+    mus = [mu.copy()]
+    norms = [np.abs(F).max()]
+    flag = -2
+    for it in range(maxiter):
+        if norms[-1] < ftol:
+            flag = 0
+            break
+
+        try:
+            dx = np.linalg.solve(J,-F)
+        except np.linalg.LinAlgError:
+            dx = np.linalg.lstsq(J,-F,rcond=None)[0]
+
+        norm = np.linalg.norm(dx)
+        if norm > max_step:
+            dx *= max_step/norm
+
+        #backtrack
+        lam = 1.0
+        for _ in range(nbacktrack):
+            trial = mu.copy()
+            trial[comps] += lam*dx
+            ct,Ft,Jt = evaluate(trial)
+            nfev += 1
+            if np.all(np.isfinite(Ft)) and np.abs(Ft).max() < norms[-1]:
+                break
+            lam *= 0.5
+        else:
+            break
+
+        mu,c,F,J = trial,ct,Ft,Jt
+        mus.append(mu.copy())
+        norms.append(np.abs(F).max())
+
+        if np.abs(lam*dx).max() < xtol:
+            break
+
+    if norms[-1] < ftol:
+        flag = 0
+    elif errors == 'raise':
+        msg = 'multiphase point not converged: max abs(F)=%s, mu=%s' % (
+            norms[-1], mu)
+        record_message(msg)
+        raise RuntimeError(msg)
+
+    if full_output:
+        r = _root_results(root=mu,iterations=len(mus)-1,function_calls=nfev,flag=flag,method='newton')
+        r = SolveInfo(r,residual=F,mus=np.array(mus),norms=np.array(norms))
+        return c,r
+    else:
+        return c
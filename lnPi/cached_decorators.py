@@ -1,12 +1,335 @@
 """
 routines to define a cached class without needing to subclass Cached class
+
+The decorators are thread safe.  Each key is computed at most once at a time
+per object (single flight).  Other threads asking for the same key wait for
+that result.  A cache clear while a value is being computed prevents the stale
+value from being stored.
+
+``cached_func`` can be bounded by number of entries and/or bytes, in which case
+its values are kept in a per object LRU.  Hit, miss, eviction and compute time
+statistics for every decorated key are collected in a global registry (see
+``cache_stats`` and ``dump_cache_stats``).
 """
 from __future__ import absolute_import
 from builtins import object
+from collections import OrderedDict
 from functools import wraps
+import sys
+import threading
+import time
+
+
+__all__ = ['cached', 'cached_func', 'cached_clear',
+           'cache_stats', 'reset_cache_stats', 'dump_cache_stats']
+
+
+#guards creation of per object locks
+_sync_guard = threading.Lock()
+
+
+class _CacheSync(object):
+    """
+    synchronization state for a single object's cache
+
+    Attributes
+    ----------
+    lock : RLock
+        guards access to the object's _cache dict
+
+    inflight : dict
+        key -> threading.Event for values currently being computed
+
+    version : int
+        incremented on each clear
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.inflight = {}
+        self.version = 0
+
+    def __reduce__(self):
+        #locks can not be pickled.  copies (pickle, copy, deepcopy) of an
+        #object get fresh synchronization state
+        return (_CacheSync, ())
+
+
+################################################################################
+#statistics
+################################################################################
+class CacheStats(object):
+    """
+    hit/miss statistics for a single cache key
+
+    Attributes
+    ----------
+    hits, misses, evictions : int
+
+    compute_time : float
+        total seconds spent computing values on misses
+    """
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_time = 0.0
+
+    def add(self, hits=0, misses=0, evictions=0, compute_time=0.0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+            self.compute_time += compute_time
 
+    @property
+    def hit_rate(self):
+        n = self.hits + self.misses
+        if n == 0:
+            return 0.0
+        return self.hits / float(n)
+
+    def as_dict(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    compute_time=self.compute_time, hit_rate=self.hit_rate)
+
+    def __repr__(self):
+        return 'CacheStats(%s): hits=%i, misses=%i, evictions=%i, compute_time=%.3g' % (
+            self.name, self.hits, self.misses, self.evictions, self.compute_time)
+
+
+#name -> CacheStats
+_registry = {}
+
+
+def _register(func, key):
+    """
+    create (or get) CacheStats for decorated func with cache key
+    """
+    qualname = getattr(func, '__qualname__', func.__name__)
+    prefix = qualname.rsplit('.', 1)[0] + '.' if '.' in qualname else ''
+    name = '%s%s' % (prefix, key)
+    if name not in _registry:
+        _registry[name] = CacheStats(name)
+    return _registry[name]
+
+
+def cache_stats():
+    """
+    statistics for all decorated keys
+
+    Returns
+    -------
+    output : dict
+        name -> dict(hits,misses,evictions,compute_time,hit_rate)
+    """
+    return {k: v.as_dict() for k, v in _registry.items()}
+
+
+def reset_cache_stats():
+    """
+    zero all statistics
+    """
+    for v in _registry.values():
+        v.reset()
+
+
+def dump_cache_stats(sort='compute_time'):
+    """
+    table of cache statistics
+
+    Parameters
+    ----------
+    sort : str (Default 'compute_time')
+        column to sort by (descending)
+
+    Returns
+    -------
+    output : str
+    """
+    stats = sorted(_registry.values(), key=lambda x: getattr(x, sort), reverse=True)
+    lines = ['%-30s %10s %10s %10s %9s %12s' % (
+        'key', 'hits', 'misses', 'evictions', 'hit_rate', 'compute_time')]
+    for x in stats:
+        lines.append('%-30s %10i %10i %10i %9.3f %12.4g' % (
+            x.name, x.hits, x.misses, x.evictions, x.hit_rate, x.compute_time))
+    return '\n'.join(lines)
+
+
+################################################################################
+#storage
+################################################################################
+def _nbytes(x):
+    """
+    rough size of x in bytes
+    """
+    nbytes = getattr(x, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(x, (tuple, list)):
+        return sum(_nbytes(v) for v in x)
+    return sys.getsizeof(x)
+
+
+class _LRUCache(object):
+    """
+    dict like storage bounded by number of entries and/or bytes
+    """
+    def __init__(self, maxsize=None, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getitem__(self, key):
+        value, nbytes = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self.nbytes -= self._data.pop(key)[1]
+
+        nbytes = _nbytes(value) if self.maxbytes is not None else 0
+        self._data[key] = (value, nbytes)
+        self.nbytes += nbytes
+
+    def evict(self):
+        """
+        evict oldest entries until within bounds.  return number evicted
+        """
+        n = 0
+        while len(self._data) > 1 and (
+                (self.maxsize is not None and len(self._data) > self.maxsize) or
+                (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            self.nbytes -= self._data.popitem(last=False)[1][1]
+            n += 1
+        return n
+
+
+################################################################################
+#synchronization
+################################################################################
+def _get_sync(self):
+    try:
+        return self._cache_sync
+    except AttributeError:
+        pass
+
+    with _sync_guard:
+        sync = getattr(self, '_cache_sync', None)
+        if sync is None:
+            sync = self._cache_sync = _CacheSync()
+    return sync
+
+
+def _get_cache(self):
+    #call with sync.lock held
+    try:
+        return self._cache
+    except AttributeError:
+        self._cache = dict()
+        return self._cache
+
+
+def _cached_call(self, key, func, args, kwargs, stats, lru=None):
+    """
+    return cached value for key, computing func(self,*args,**kwargs) once if needed
+
+    Parameters
+    ----------
+    key : hashable
+        cache key
+
+    stats : CacheStats
+
+    lru : tuple or None
+        if not None, (name,maxsize,maxbytes).  Values are stored in
+        self._cache[name], a bounded LRU.  else, stored in self._cache[key]
+    """
+    sync = _get_sync(self)
+
+    while True:
+        with sync.lock:
+            cache = _get_cache(self)
+            if lru is None:
+                store = cache
+            else:
+                store = cache.get(lru[0])
+                if store is None:
+                    store = cache[lru[0]] = _LRUCache(*lru[1:])
+
+            try:
+                ret = store[key]
+            except KeyError:
+                pass
+            else:
+                stats.add(hits=1)
+                return ret
+
+            event = sync.inflight.get(key)
+            if event is None:
+                #this thread computes the value
+                event = sync.inflight[key] = threading.Event()
+                version = sync.version
+                break
+
+        #another thread is computing key. wait, then check cache again
+        event.wait()
+
+    try:
+        t0 = time.time()
+        ret = func(self, *args, **kwargs)
+        dt = time.time() - t0
+
+        nevict = 0
+        with sync.lock:
+            #do not store if cache cleared/replaced while computing
+            if sync.version == version and getattr(self, '_cache', None) is cache:
+                store[key] = ret
+                if lru is not None:
+                    nevict = store.evict()
+        stats.add(misses=1, evictions=nevict, compute_time=dt)
+    finally:
+        with sync.lock:
+            del sync.inflight[key]
+        event.set()
+
+    return ret
+
+
+def _clear_keys(self, keys):
+    """
+    remove keys (and function keys starting with keys) from self._cache.
+    if len(keys)==0, remove all
+    """
+    sync = _get_sync(self)
+    with sync.lock:
+        sync.version += 1
+        if len(keys) == 0 or not hasattr(self, '_cache'):
+            self._cache = dict()
+        else:
+            for name in keys:
+                try:
+                    del self._cache[name]
+                except KeyError:
+                    pass
+
+            # functions
+            keys_tuples = [k for k in self._cache if isinstance(k, tuple) and k[0] in keys]
+            for name in keys_tuples:
+                del self._cache[name]
 
-__all__ = ['cached', 'cached_func', 'cached_clear']
 
 def cached(key=None):
     """Decorator to cache a property within a class
@@ -53,28 +376,34 @@ def cached(key=None):
         # else:
         #     raise ValueError('key must be single valued or None')
 
+        stats = _register(func, _key)
+
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            try:
-                return self._cache[_key]
-            except AttributeError:
-                self._cache = dict()
-            except KeyError:
-                pass
-
-            self._cache[_key] = ret = func(self, *args, **kwargs)
-            return ret
+            return _cached_call(self, _key, func, args, kwargs, stats)
 
         return wrapper
 
     return cached_lookup
 
 
-def cached_func(key=None):
+def cached_func(key=None, maxsize=None, maxbytes=None):
     """Decorator to cache a function within a class
 
     Requires the Class to have a cache dict called ``_cache``.
 
+    Parameters
+    ----------
+    key : str, optional
+        cache key.  Default is function name
+
+    maxsize : int, optional
+        if not None, keep at most maxsize results per object (LRU eviction)
+
+    maxbytes : int, optional
+        if not None, keep at most maxbytes of results per object (LRU eviction).
+        Size of results is estimated from their nbytes attribute
+
     Notes
     -----
     Usage::
@@ -91,6 +420,7 @@ def cached_func(key=None):
                # a long calculation...
                return long_calc(self,val)
                # if already executed result in _cache[('keyname',) + args]
+               # (or in the LRU _cache['keyname'] if maxsize/maxbytes set)
 
             #no aguments implies give cache function name
             @property
@@ -112,18 +442,17 @@ def cached_func(key=None):
         else:
             _key = key
 
+        stats = _register(func, _key)
+
+        if maxsize is None and maxbytes is None:
+            lru = None
+        else:
+            lru = (_key, maxsize, maxbytes)
+
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             key_func = (_key,) + args
-            try:
-                return self._cache[key_func]
-            except AttributeError:
-                self._cache = dict()
-            except KeyError:
-                pass
-
-            self._cache[key_func] = ret = func(self, *args, **kwargs)
-            return ret
+            return _cached_call(self, key_func, func, args, kwargs, stats, lru)
 
         return wrapper
 
@@ -169,23 +498,7 @@ def cached_clear(*keys):
     def cached_clear(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            #self._clear_caches(*keys)
-            # clear out keys
-            if len(keys) == 0 or not hasattr(self, '_cache'):
-                self._cache = dict()
-            else:
-                for name in keys:
-                    try:
-                        del self._cache[name]
-                    except KeyError:
-                        pass
-
-                # functions
-                keys_tuples = [k for k in self._cache if isinstance(k, tuple) and k[0] in keys]
-                for name in keys_tuples:
-                    del self._cache[name]
-
-
+            _clear_keys(self, keys)
             return func(self, *args, **kwargs)
         return wrapper
 
@@ -0,0 +1,350 @@
+"""
+routines to locate the critical point of a pair of phases
+
+Starting from a binodal point, the coexistence curve is followed (see
+binodal.trace_binodal) toward the point where the two phases merge.  Along the
+way the free energy barrier between the phases, DeltabetaE, is monitored.  The
+step size is chosen from a secant extrapolation of the barrier to zero.  The
+continuation itself is _continuation._trace_level_set, with the barrier
+driving the step size.  It stops once the extrapolation puts the critical
+point within one step.
+
+A final corrector then solves barrier==0 together with equal Omega.  Each
+iterate is a secant step of the barrier along the binodal, put back on the
+binodal by the continuation corrector.  Steps which lose one of the phases
+bound the critical point, and are bisected.
+
+Phases with a small barrier are normally merged when they are built
+(build_phases efac), so the barrier could never reach zero.  All evaluations
+are therefore made with a copy of ref whose build_kwargs merge phases only
+once the barrier between them vanishes.
+"""
+
+import numpy as np
+
+from lnPi._continuation import _trace_level_set
+from lnPi.binodal import _binodal_grad
+from lnPi.trace import record_message
+
+__all__ = ['get_critical_point']
+
+
+def _barrier(c, IDs, DeltabetaE_kwargs):
+    """
+    min of DeltabetaE between IDs[0] and IDs[1]
+    """
+    dE = c.DeltabetaE_matrix_phaseIDs(**DeltabetaE_kwargs)
+    return min(dE[IDs[0], IDs[1]], dE[IDs[1], IDs[0]])
+
+
+def _unit(x):
+    return x / np.linalg.norm(x)
+
+
+def _bracketed_corrector(ref, fgrad, mu, normal, comps, xtol, ftol,
+                         maxiter, reweight_kwargs):
+    """
+    solve g==0 along mu + s*normal by Newton, bisecting once bracketed
+
+    Near the critical point Omega[ID0]-Omega[ID1] jumps where the boundary
+    between the phases moves by a lattice site, and plain Newton
+    (_continuation._corrector) cycles.  Here the bracket is shrunk by the
+    sign of g, so the solve ends at the jump if there is no exact root.
+
+    Returns
+    -------
+    c : lnPi_phases or None
+        solution (None if a phase was lost or no bracket was found)
+
+    nfev : int
+        number of reweights
+    """
+
+    def evaluate(s):
+        c = ref.reweight(mu + s * full, **reweight_kwargs)
+        g, grad = fgrad(c)
+        return c, g, np.dot(grad, normal)
+
+    full = np.zeros_like(mu)
+    full[comps] = normal
+
+    s = 0.0
+    lo = hi = None
+    best = None
+    for i in range(maxiter):
+        c, g, dg = evaluate(s)
+        if not np.isfinite(g):
+            return None, i + 1
+        if best is None or abs(g) < abs(best[1]):
+            best = (c, g)
+        if abs(g) < ftol:
+            return c, i + 1
+
+        if g * dg > 0:
+            hi = s if hi is None else min(hi, s)
+        else:
+            lo = s if lo is None else max(lo, s)
+        if lo is not None and hi is not None and abs(hi - lo) < xtol:
+            return best[0], i + 1
+
+        s_new = s - g / dg if dg != 0 else np.nan
+        if lo is not None and hi is not None and not (
+                min(lo, hi) < s_new < max(lo, hi)):
+            s_new = 0.5 * (lo + hi)
+        if not np.isfinite(s_new):
+            return None, i + 1
+        s = s_new
+    return None, maxiter
+
+
+def _critical_corrector(ref, fgrad, fbarrier, path, barriers, comps, btol,
+                        xtol, maxiter, corrector_kwargs):
+    """
+    secant solve of barrier==0 along the binodal from the end of path
+
+    path and barriers are extended in place with the accepted iterates.
+
+    Returns
+    -------
+    converged : bool
+        True if the last barrier is below btol, or if a step of less than
+        xtol from the last binodal point loses a phase (the binodal ends
+        there)
+
+    nfev : int
+        number of reweights
+    """
+    c, h = path[-1], barriers[-1]
+    tangent = _unit(c.mu[comps] - path[-2].mu[comps])
+    dist = np.linalg.norm(c.mu[comps] - path[-2].mu[comps])
+    slope = (barriers[-2] - h) / dist
+    if not slope > 0:
+        slope = h / dist
+
+    #distance from c to the nearest step which lost a phase
+    s_hi = None
+    nfev = 0
+    for it in range(maxiter):
+        if h < btol:
+            return True, nfev
+
+        step = h / slope
+        if s_hi is not None:
+            if s_hi < xtol:
+                return True, nfev
+            if step >= s_hi:
+                step = 0.5 * s_hi
+
+        _, grad = fgrad(c)
+        mu = c.mu.copy()
+        mu[comps] += step * tangent
+        new, n = _bracketed_corrector(ref, fgrad, mu, _unit(grad), comps,
+                                      **corrector_kwargs)
+        nfev += n
+        hn = np.nan if new is None else fbarrier(new)
+        if not np.isfinite(hn):
+            s_hi = step
+            continue
+
+        dmu = new.mu[comps] - c.mu[comps]
+        dist = np.linalg.norm(dmu)
+        if hn < h:
+            slope = (h - hn) / dist
+        if s_hi is not None:
+            s_hi = max(s_hi - dist, 0.0)
+        tangent = _unit(dmu)
+        c, h = new, hn
+        path.append(c)
+        barriers.append(h)
+
+    return h < btol, nfev
+
+
+def get_critical_point(ref,
+                       IDs,
+                       start,
+                       comps=(0, 1),
+                       direction=None,
+                       ds=0.1,
+                       ds_min=1e-4,
+                       ds_max=1.0,
+                       btol=0.05,
+                       xtol=1e-4,
+                       maxstep=50,
+                       maxiter=20,
+                       corrector_kwargs=None,
+                       reweight_kwargs=None,
+                       build_kwargs=None,
+                       DeltabetaE_kwargs=None,
+                       errors='raise',
+                       full_output=False):
+    """
+    locate critical point where binodal between IDs ends
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    IDs : (ID0,ID1)
+        phaseIDs of pair
+
+    start : lnPi_phases object or array
+        binodal point (or mu near one) to start from
+
+    comps : tuple of two ints (Default (0,1))
+        components of mu which vary
+
+    direction : +1, -1 or None (Default None)
+        direction along binodal (see trace_binodal).  If None, take a trial
+        step in the +1 direction, and keep it if the barrier decreases.
+        Otherwise go in the -1 direction
+
+    ds : float (Default 0.1)
+        initial step along binodal
+
+    ds_min, ds_max : floats
+        limits on step.  Stop if step falls below ds_min
+
+    btol : float (Default 0.05)
+        converged if barrier is below btol at a binodal point
+
+    xtol : float (Default 1e-4)
+        tolerance in mu of the binodal points of the final corrector.  Also
+        converged if a step of less than xtol from the last binodal point
+        loses a phase.  On a lattice the barrier need not reach btol before
+        the phases merge
+
+    maxstep : int (Default 50)
+        max number of accepted continuation steps
+
+    maxiter : int (Default 20)
+        max number of final corrector iterations
+
+    corrector_kwargs : dict, optional
+        extra arguments to binodal corrector (xtol,ftol,maxiter)
+
+    reweight_kwargs : dict, optional
+        extra arguments to reweight
+
+    build_kwargs : dict, optional
+        build_kwargs of the copy of ref used for all evaluations.  Default
+        ref build_kwargs with efac=0.0
+
+    DeltabetaE_kwargs : dict, optional
+        extra arguments to DeltabetaE_matrix_phaseIDs
+
+    errors : str (Default 'raise')
+        if 'raise', raise RuntimeError if not converged.
+        if 'ignore', return last point (check info status)
+
+    full_output : bool (Default False)
+        if True, return info dict
+
+    Returns
+    -------
+    mu_c : array
+        critical mu.  This is the mu of the last binodal point, where the
+        barrier is below btol (or the binodal ends)
+
+    last : lnPi_phases object
+        last binodal point found (built with build_kwargs)
+
+    info : dict (optional, returned if full_output is True)
+        status : 'barrier' (converged), 'ds_min' (continuation lost the
+            phases), 'maxstep' or 'maxiter'
+        mus, barriers : arrays along path
+        function_calls : number of reweights
+    """
+
+    if corrector_kwargs is None:
+        corrector_kwargs = {}
+    if reweight_kwargs is None:
+        reweight_kwargs = {}
+    if build_kwargs is None:
+        build_kwargs = dict(ref._build_kwargs, efac=0.0)
+    if DeltabetaE_kwargs is None:
+        DeltabetaE_kwargs = {}
+    if errors not in ('raise', 'ignore'):
+        raise ValueError('bad errors parameter %s' % errors)
+
+    assert len(IDs) == 2
+    comps = list(comps)
+    ref = ref.copy(build_kwargs=build_kwargs)
+    fgrad = lambda c: _binodal_grad(c, IDs, comps)
+    fbarrier = lambda c: _barrier(c, IDs, DeltabetaE_kwargs)
+    kws = dict(comps=comps, ds_min=ds_min, ds_max=ds_max,
+               corrector_kwargs=corrector_kwargs,
+               reweight_kwargs=reweight_kwargs)
+
+    barriers = []
+
+    def control(output, ds):
+        for c in output[len(barriers):]:
+            barriers.append(fbarrier(c))
+        if barriers[-1] < btol:
+            return None
+        #step from secant extrapolation of barrier to zero.  hand over to
+        #the final corrector once that is within one step
+        if len(output) > 1 and barriers[-2] > barriers[-1]:
+            dist = np.linalg.norm(output[-1].mu[comps] - output[-2].mu[comps])
+            s0 = dist * barriers[-1] / (barriers[-2] - barriers[-1])
+            if s0 <= ds:
+                return None
+            ds = min(ds_max, max(ds_min, 0.5 * s0), 2 * ds)
+        return ds
+
+    nfev = 0
+    if direction is None:
+        #trial step in +1 direction.  keep it if barrier decreases
+        path, info = _trace_level_set(ref, fgrad, start, direction=+1,
+                                      ds=ds, npoints=2, control=control,
+                                      full_output=True, **kws)
+        nfev += info['function_calls']
+        control(path, ds)
+        if len(path) == 1 or barriers[1] > barriers[0]:
+            path, direction = path[:1], -1
+            del barriers[1:]
+        else:
+            direction = +1
+        start = path
+
+    path, info = _trace_level_set(ref, fgrad, start, direction=direction,
+                                  ds=ds, npoints=maxstep + 1, control=control,
+                                  full_output=True, **kws)
+    nfev += info['function_calls']
+    control(path, ds)
+
+    status = {'control': 'barrier', 'npoints': 'maxstep'}.get(
+        info['status'], 'ds_min')
+    if barriers[-1] < btol:
+        status = 'barrier'
+    elif status in ('barrier', 'ds_min') and len(path) > 1:
+        #final corrector.  Also tried if the continuation lost the phases,
+        #as it brackets the end of the binodal
+        kws = dict(dict(xtol=xtol, ftol=1e-10, maxiter=20), **corrector_kwargs)
+        kws['reweight_kwargs'] = dict(dict(ZeroMax=True), **reweight_kwargs)
+        converged, n = _critical_corrector(ref, fgrad, fbarrier, path,
+                                           barriers, comps, btol, xtol,
+                                           maxiter, kws)
+        nfev += n
+        if converged:
+            status = 'barrier'
+        elif status == 'barrier':
+            status = 'maxiter'
+
+    mus = np.array([x.mu for x in path])
+    barriers = np.array(barriers)
+
+    if status != 'barrier' and errors == 'raise':
+        msg = 'critical point not found: status=%s, barrier=%s, mu=%s' % (
+            status, barriers[-1], mus[-1])
+        record_message(msg)
+        raise RuntimeError(msg)
+
+    if full_output:
+        info = dict(
+            status=status, mus=mus, barriers=barriers, function_calls=nfev)
+        return mus[-1].copy(), path[-1], info
+    else:
+        return mus[-1].copy(), path[-1]
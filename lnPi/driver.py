@@ -0,0 +1,184 @@
+"""
+routines to distribute spinodal/binodal calculations over executors
+
+Any object with a ``submit(func, *args, **kwargs)`` method returning futures
+with a ``result()`` method can be used as executor.  This includes
+concurrent.futures.ThreadPoolExecutor, ProcessPoolExecutor and
+dask.distributed.Client.  With executor=None, tasks run serially.
+
+Collections are passed to tasks directly, except for ProcessPoolExecutor.  In
+that case the first element is placed in shared memory (see lnPi.shared) and
+each worker rebuilds the collection from the handle and the mus.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import traceback
+
+import numpy as np
+
+from lnPi.shared import to_shared
+
+__all__ = ['TaskResult', 'map_tasks']
+
+
+class TaskResult(object):
+    """
+    outcome of a single task
+
+    Attributes
+    ----------
+    value : task return value (None if failed)
+
+    error : exception raised by task (None if succeeded)
+
+    traceback : str
+        formatted traceback of error
+    """
+
+    def __init__(self, value=None, error=None, traceback=None):
+        self.value = value
+        self.error = error
+        self.traceback = traceback
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """
+        return value, or raise error if task failed
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        if self.ok:
+            return 'TaskResult: ok'
+        else:
+            return 'TaskResult: error=%r' % (self.error)
+
+
+def _run_task(func, args, kwargs):
+    """
+    call func(*args,**kwargs), capturing any exception
+    """
+    try:
+        return TaskResult(value=func(*args, **kwargs))
+    except Exception as e:
+        return TaskResult(error=e, traceback=traceback.format_exc())
+
+
+def map_tasks(func, args_list, kwargs_list=None, executor=None):
+    """
+    apply func to each set of arguments
+
+    Parameters
+    ----------
+    func : callable
+        must be picklable (module level) for process based executors
+
+    args_list : list of tuples
+        positional arguments for each task
+
+    kwargs_list : list of dicts, optional
+        keyword arguments for each task
+
+    executor : executor or None
+        if None, run serially in this thread
+
+    Returns
+    -------
+    output : list of TaskResult
+        in the same order as args_list.  A failing task does not stop the
+        others
+    """
+
+    args_list = list(args_list)
+    if kwargs_list is None:
+        kwargs_list = [{}] * len(args_list)
+
+    if executor is None:
+        return [_run_task(func, a, k) for a, k in zip(args_list, kwargs_list)]
+
+    futures = [
+        executor.submit(_run_task, func, a, k)
+        for a, k in zip(args_list, kwargs_list)
+    ]
+
+    out = []
+    for fut in futures:
+        try:
+            out.append(fut.result())
+        except Exception as e:
+            #failure outside of task (e.g., pickling or worker death)
+            out.append(TaskResult(error=e, traceback=traceback.format_exc()))
+    return out
+
+
+################################################################################
+#tasks
+################################################################################
+def _attach(ref):
+    #shared memory handles are attached in the worker
+    if hasattr(ref, 'attach'):
+        ref = ref.attach()
+    return ref
+
+
+def _share_collection(C, executor):
+    """
+    task argument standing in for collection C
+
+    Returns
+    -------
+    arg : collection C, or (build,handle,mus) for process executors
+
+    handle : shared memory handle to unlink when tasks are done, or None
+    """
+    if not isinstance(executor, ProcessPoolExecutor):
+        return C, None
+    try:
+        handle = to_shared(C[0])
+    except RuntimeError:
+        #no shared memory (python < 3.8).  pickle C
+        return C, None
+    return (type(C).from_mu_iter, handle, np.asarray(C.mus)), handle
+
+
+#per process: last collection rebuilt from a shared handle
+_rebuilt = {}
+
+
+def _get_collection(C):
+    if not isinstance(C, tuple):
+        return C
+    build, ref, mus = C
+    key = (ref.name, mus.tobytes())
+    if key not in _rebuilt:
+        _rebuilt.clear()
+        _rebuilt[key] = build(_attach(ref), mus)
+    return _rebuilt[key]
+
+
+def _spinodal_task(C, ID, kwargs):
+    return _get_collection(C).get_spinodal_phaseID(
+        ID, full_output=True, **kwargs)
+
+
+def _binodal_task(C, IDs, spinodals, kwargs):
+    return _get_collection(C).get_binodal_pair(
+        IDs, spinodals, full_output=True, **kwargs)
+
+
+def _line_task(build, ref, mu, x, build_kwargs, spin_kwargs, bin_kwargs):
+    """
+    build a collection along a line and locate spinodals/binodals
+
+    failures of single phaseIDs/pairs are captured (unless errors is passed
+    in spin_kwargs/bin_kwargs) so that the rest of the line is kept
+    """
+    C = build(_attach(ref), mu, x, **build_kwargs)
+    C.get_spinodals(**dict(dict(errors='capture'), **spin_kwargs))
+    C.get_binodals(**dict(dict(errors='capture'), **bin_kwargs))
+    return C
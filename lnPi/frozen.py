@@ -0,0 +1,209 @@
+"""
+frozen partition evaluation of per phase quantities
+
+Near a binodal or constant molfrac solution the basins of the phases barely
+move with mu.  Instead of rebuilding the phases (argmax, watershed, boundaries,
+merging) at every mu, the labels from a built lnPi_phases object are reused and
+per phase quantities are evaluated directly by labeled log-sum-exp,
+
+Omega_i = (lnPi[0] - ln sum_{N in region i} exp(lnPi[N])) / beta
+
+The partition is invalid once the maximum of a region reaches its border
+with another region.  In that case (and to verify a final root) the full
+pipeline is rerun.  The borders themselves move a little with mu, but cells
+near a border carry little weight, so a root is accepted if the frozen and
+full values there agree.
+"""
+
+import numpy as np
+from scipy import ndimage as ndi
+from scipy import optimize
+
+from lnPi.trace import SolveInfo, record_eval
+
+
+class _FrozenState(object):
+    """
+    per phase quantities at a single mu (subset of lnPi_phases interface)
+    """
+
+    def __init__(self, mu, phaseIDs, Omegas, Naves, ok):
+        self.mu = mu
+        self.phaseIDs = phaseIDs
+        self._Omegas = Omegas
+        self.Naves_phaseIDs = Naves
+        self.ok = ok
+
+    @property
+    def nphase(self):
+        return len(self.phaseIDs)
+
+    def Omegas_phaseIDs(self, zval=None):
+        return self._Omegas
+
+    @property
+    def molfracs_phaseIDs(self):
+        N = self.Naves_phaseIDs
+        return N / N.sum(axis=-1)[:, None]
+
+    @property
+    def molfracs(self):
+        return self.molfracs_phaseIDs[self.phaseIDs]
+
+
+class FrozenPartition(object):
+    """
+    fixed partition of lnPi into phases, taken from lnPi_phases object
+
+    Parameters
+    ----------
+    c : lnPi_phases object
+    """
+
+    def __init__(self, c):
+        base = c.base
+        self.base = base
+        self.labels = c.labels
+        self.phaseIDs = np.array(c.phaseIDs)
+
+        self._data = np.asarray(base.data, dtype=float).ravel()
+        self._mu = np.asarray(base.mu, dtype=float)
+        self._coords = base.coords.reshape(base.ndim, -1).astype(float)
+
+        labels = self.labels.ravel()
+        structure = np.ones((3, ) * base.ndim)
+
+        self._regions = {}
+        self._edges = {}
+        for ID in self.phaseIDs:
+            msk = self.labels == ID + 1
+            others = (self.labels > 0) & ~msk
+            edge = msk & ndi.binary_dilation(others, structure=structure)
+            r = np.where(labels == ID + 1)[0]
+            self._regions[ID] = r
+            self._edges[ID] = edge.ravel()[r]
+
+    def evaluate(self, mu):
+        """
+        per phase quantities at mu
+
+        Returns
+        -------
+        state : object with Omegas_phaseIDs(), Naves_phaseIDs,
+            molfracs_phaseIDs, nphase, phaseIDs and ok.
+            ok is False if a region maximum is on a border with another region
+        """
+        base = self.base
+        mu = np.asarray(mu, dtype=float)
+        data = self._data + np.dot(mu - self._mu, self._coords) * base.beta
+
+        n = base.num_phases_max
+        Omegas = np.zeros(n) * np.nan
+        Naves = np.zeros((n, base.ndim)) * np.nan
+        ok = True
+
+        for ID in self.phaseIDs:
+            r = self._regions[ID]
+            d = data[r]
+            imax = d.argmax()
+            if self._edges[ID][imax]:
+                ok = False
+
+            w = np.exp(d - d[imax])
+            s = w.sum()
+            Omegas[ID] = (data[0] - d[imax] - np.log(s)) / base.beta
+            Naves[ID, :] = np.dot(self._coords[:, r], w) / s
+
+        return _FrozenState(mu, self.phaseIDs, Omegas, Naves, ok)
+
+
+def solve_frozen(ref, value, get_mu, a, b, IDs=None, maxseg=4, ftol=1e-8,
+                 reweight_kwargs={}, **kwargs):
+    """
+    solve value(state)==0 for x in [a,b], mu=get_mu(x), with a frozen partition
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    value : callable
+        value(state) where state is lnPi_phases or frozen state
+
+    get_mu : callable
+        get_mu(x) -> mu (e.g., MuLine)
+
+    a,b : floats
+        bracket
+
+    IDs : list, optional
+        phaseIDs which must be in the partition
+
+    maxseg : int (Default 4)
+        max number of full segmentations
+
+    ftol : float (Default 1e-8)
+        the partition is consistent if the frozen and full values at the root
+        differ by at most ftol
+
+    reweight_kwargs : dict
+        extra arguments to reweight
+
+    **kwargs : extra arguments to scipy.optimize.brentq
+
+    Returns
+    -------
+    output : lnPi_phases object at root, or None if no suitable partition
+        could be found at the bracket endpoints
+
+    r : SolveInfo
+        brentq results, with residual (exact), segmentations and consistent
+        (if the frozen value at the root is within ftol of the exact one)
+    """
+
+    reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+
+    def usable(c):
+        return IDs is None or all(i in c.phaseIDs for i in IDs)
+
+    state = dict(nseg=0, part=None)
+
+    def segment(x):
+        c = ref.reweight(get_mu(x), **reweight_kwargs)
+        state['nseg'] += 1
+        if usable(c):
+            state['part'] = FrozenPartition(c)
+        return c
+
+    for x in [a, b]:
+        segment(x)
+        if state['part'] is not None:
+            break
+    if state['part'] is None:
+        return None, None
+
+    def f(x):
+        s = state['part'].evaluate(get_mu(x))
+        if not s.ok and state['nseg'] < maxseg:
+            c = segment(x)
+            v = value(c)
+            record_eval('solve', c.mu, v)
+            return v
+        v = value(s)
+        record_eval('frozen', s.mu, v)
+        return v
+
+    while True:
+        xx, r = optimize.brentq(f, a, b, full_output=True, **kwargs)
+        part = state['part']
+        c = segment(xx)
+        if not usable(c):
+            consistent = False
+            break
+        #basin borders move with mu, so compare values rather than labels
+        consistent = abs(value(c) - value(part.evaluate(c.mu))) <= ftol
+        if consistent or state['nseg'] >= maxseg:
+            break
+
+    return c, SolveInfo(r, residual=value(c), segmentations=state['nseg'],
+                        consistent=consistent)
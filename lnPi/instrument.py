@@ -0,0 +1,264 @@
+"""
+per stage profiling of the lnPi pipeline
+
+Stages (reweight, argmax_local, watershed, boundaries, merge_phases, tagging,
+segmentation) are decorated with ``profile`` or wrapped with ``stage``.  When
+profiling is disabled (the default), a decorated call costs a check of two
+module level flags.  When enabled, call counts and cumulative time are kept
+per stage.  If memory tracking is also enabled, the net bytes allocated per
+stage are kept too (via tracemalloc).  While a SolverTrace is open the stages
+are timed into it as well (see lnPi.trace).
+
+Times and bytes are exclusive: when stages nest (e.g., tagging inside
+segmentation), the time spent in the inner stage is subtracted from the
+outer one, so the stage totals add up to the profiled time.
+
+Progress/telemetry callbacks can be registered with ``add_callback`` or the
+``callbacks`` context manager.  Long collection builds call
+``progress(event, **info)``, which passes the event name, the info and the
+current profile statistics to each callback.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+import tracemalloc
+
+from lnPi import trace as _trace
+
+__all__ = [
+    'enable_profiling', 'disable_profiling', 'profiling', 'profile_stats',
+    'reset_profile_stats', 'dump_profile_stats', 'add_callback',
+    'remove_callback', 'callbacks'
+]
+
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_lock = threading.Lock()
+
+#stage -> StageStats
+_stats = {}
+
+_callbacks = []
+
+_local = threading.local()
+
+
+class StageStats(object):
+    """
+    counters for a single stage
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.bytes = 0
+
+    def as_dict(self):
+        return dict(calls=self.calls, time=self.time, bytes=self.bytes)
+
+    def __repr__(self):
+        return 'StageStats(%s): calls=%i, time=%.3g, bytes=%i' % (
+            self.name, self.calls, self.time, self.bytes)
+
+
+def _add(name, dt, nbytes):
+    with _lock:
+        s = _stats.get(name)
+        if s is None:
+            s = _stats[name] = StageStats(name)
+        s.calls += 1
+        s.time += dt
+        s.bytes += nbytes
+
+
+def _children():
+    """
+    per thread stack of [time, bytes] spent in child stages of open stages
+    """
+    try:
+        return _local.children
+    except AttributeError:
+        _local.children = []
+        return _local.children
+
+
+def _profiling_active():
+    """
+    True if stages are recorded (profiling enabled or a SolverTrace open)
+    """
+    return _enabled or bool(_trace._stack())
+
+
+@contextmanager
+def stage(name):
+    """
+    context manager recording block as stage name
+
+    time (and bytes) of stages nested within the block are not counted
+    toward name
+    """
+    if not _profiling_active():
+        yield
+        return
+    if _memory and tracemalloc.is_tracing():
+        m0 = tracemalloc.get_traced_memory()[0]
+    else:
+        m0 = None
+    children = _children()
+    children.append([0.0, 0])
+    t0 = time.time()
+    try:
+        yield
+    finally:
+        dt = time.time() - t0
+        nbytes = 0
+        if m0 is not None and tracemalloc.is_tracing():
+            nbytes = max(tracemalloc.get_traced_memory()[0] - m0, 0)
+        child_dt, child_bytes = children.pop()
+        if children:
+            children[-1][0] += dt
+            children[-1][1] += nbytes
+        dt = max(dt - child_dt, 0.0)
+        nbytes = max(nbytes - child_bytes, 0)
+        for t in _trace._stack():
+            t.add_time(name, dt)
+        if _enabled:
+            _add(name, dt, nbytes)
+
+
+def profile(name):
+    """
+    decorator recording calls of function as stage name (see stage)
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profiling_active():
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable_profiling(memory=False):
+    """
+    enable profiling
+
+    Parameters
+    ----------
+    memory : bool (Default False)
+        if True, also track bytes allocated per stage (starts tracemalloc if
+        needed, which slows everything down)
+    """
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable_profiling():
+    """
+    disable profiling (statistics are kept)
+    """
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = False
+    _memory = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+@contextmanager
+def profiling(memory=False, reset=True):
+    """
+    context manager enabling profiling within block
+
+    yields dict of StageStats (updated in place)
+    """
+    if reset:
+        reset_profile_stats()
+    enable_profiling(memory=memory)
+    try:
+        yield _stats
+    finally:
+        disable_profiling()
+
+
+def profile_stats():
+    """
+    stage -> dict(calls,time,bytes)
+    """
+    with _lock:
+        return {k: v.as_dict() for k, v in _stats.items()}
+
+
+def reset_profile_stats():
+    with _lock:
+        _stats.clear()
+
+
+def dump_profile_stats(sort='time'):
+    """
+    table of profile statistics
+
+    Parameters
+    ----------
+    sort : str (Default 'time')
+        column to sort by (descending)
+    """
+    stats = sorted(_stats.values(), key=lambda x: getattr(x, sort),
+                   reverse=True)
+    lines = ['%-20s %10s %12s %14s' % ('stage', 'calls', 'time', 'bytes')]
+    for x in stats:
+        lines.append('%-20s %10i %12.4g %14i' % (x.name, x.calls, x.time,
+                                                 x.bytes))
+    return '\n'.join(lines)
+
+
+################################################################################
+#callbacks
+################################################################################
+def add_callback(func):
+    """
+    register func(event, info, stats) for progress/telemetry
+    """
+    _callbacks.append(func)
+
+
+def remove_callback(func):
+    _callbacks.remove(func)
+
+
+@contextmanager
+def callbacks(*funcs):
+    """
+    context manager registering callbacks within block
+    """
+    for f in funcs:
+        add_callback(f)
+    try:
+        yield
+    finally:
+        for f in funcs:
+            remove_callback(f)
+
+
+def progress(event, **info):
+    """
+    report progress to registered callbacks
+    """
+    if not _callbacks:
+        return
+    stats = profile_stats() if _enabled else None
+    for f in list(_callbacks):
+        f(event, info, stats)
@@ -6,11 +6,23 @@ routines to find constant molfracs
 import numpy as np
 from scipy import optimize
 
+from lnPi.frozen import solve_frozen
+from lnPi._utils import MuLine, _root_results
+from lnPi._continuation import _trace_level_set
+from lnPi.trace import SolveInfo, record_eval, with_trace
+
+__all__ = [
+    'find_mu_molfrac', 'find_mu_molfrac_newton', 'find_mu_molfrac_interp',
+    'trace_isopleth'
+]
+
+@with_trace('find_mu_molfrac')
 def find_mu_molfrac(ref,phaseID,target,muA,muB,
                     comp=0,
                     reweight_kwargs={},
                     full_output=False,
                     tol=1e-4,
+                    frozen=False,
                     **kwargs):
     """
     calculate mu which provides lnpi.molfracs_phaseIDs[phaseID,comp]==target
@@ -27,7 +39,8 @@ def find_mu_molfrac(ref,phaseID,target,muA,muB,
         target molfraction
 
     muA,muB : mu arrays bracketing solution
-        only one index can vary between muA and muB
+        if more than one index varies between muA and muB, solve along the
+        line between them
 
     comp : int (Default 0)
         the component ID of target molfraction
@@ -41,6 +54,11 @@ def find_mu_molfrac(ref,phaseID,target,muA,muB,
     tol : float (default 1e-4)
         solver tolerance
 
+    frozen : bool (Default False)
+        if True, solve with the phase partition from a bracket endpoint held
+        fixed (see lnPi.frozen).  Falls back to the full solve if the
+        partition cannot be verified
+
     **kwargs : extra arguments to scipy.optimize.brentq
 
     
@@ -49,7 +67,9 @@ def find_mu_molfrac(ref,phaseID,target,muA,muB,
     output : lnPi_phases object
         object with desired molfraction
 
-    info : solver info (optional, returned if full_output is `True`)
+    info : SolveInfo (optional, returned if full_output is `True`)
+        with residual (value - target).  info.trace is a SolverTrace of the
+        solve
 
 
     
@@ -57,44 +77,42 @@ def find_mu_molfrac(ref,phaseID,target,muA,muB,
     """
 
 
-    muA = np.array(muA,dtype=float)
-    muB = np.array(muB,dtype=float)
-
-    msk = muA != muB
-    if msk.sum()!=1:
-        raise ValueError('only one value can vary between muA and muB')        
-
-
-    mu_idx = np.where(msk)[0][0]
-    mu_in = muA.copy()
-
-    
-
-    a,b = sorted([x[mu_idx] for x in [muA,muB]])
+    line = MuLine.from_points(muA, muB)
+    a,b = sorted([line.x_of(muA), line.x_of(muB)])
 
     reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
 
 
-    def f(x):
-        mu = mu_in[:]
-        mu[mu_idx] = x
-
-        lnpi = ref.reweight(mu,**reweight_kwargs)
-
+    def value(lnpi):
         if lnpi.nphase==1:
             mf=lnpi.molfracs[0,comp]
         else:
             mf=lnpi.molfracs_phaseIDs[phaseID,comp]
+        return mf - target
+
+    def f(x):
+        lnpi = ref.reweight(line(x),**reweight_kwargs)
 
         f.lnpi = lnpi
 
-        return mf - target
+        v = value(lnpi)
+        record_eval('solve',lnpi.mu,v)
+        return v
 
 
+    r = None
+    if frozen:
+        lnpi,r = solve_frozen(ref,value,line,a,b,
+                              reweight_kwargs=reweight_kwargs,**kwargs)
+        if lnpi is not None and r.consistent:
+            f.lnpi = lnpi
+        else:
+            r = None
 
-    xx,r = optimize.brentq(f,a,b,full_output=True,**kwargs)
+    if r is None:
+        xx,r = optimize.brentq(f,a,b,full_output=True,**kwargs)
 
-    r.residual = f(xx)
+        r = SolveInfo(r,residual=f(xx))
 
     if np.abs(r.residual)>tol:
         raise RuntimeError('something went wrong with solve')
@@ -103,3 +121,388 @@ def find_mu_molfrac(ref,phaseID,target,muA,muB,
         return f.lnpi,r
     else:
         return f.lnpi
+
+
+def _get_value_deriv(lnpi, phaseID, comp, mu_idx, kind='molfrac'):
+    """
+    value and derivative with respect to mu[mu_idx] of molfrac or density
+
+    Uses dN_k/dmu_j = beta * cov(N_k,N_j) within the phase
+
+    Parameters
+    ----------
+    lnpi : lnPi_phases object
+
+    phaseID : int
+        if lnpi has a single phase, that phase is used
+
+    comp : int
+        component of molfrac/density
+
+    mu_idx : int or array
+        component of mu to differentiate with respect to.  If an array,
+        differentiate along that direction in mu
+
+    kind : str (Default 'molfrac')
+        'molfrac' or 'density'
+
+    Returns
+    -------
+    value, deriv : floats
+        nan if phaseID not present
+    """
+
+    if lnpi.nphase == 1:
+        i = 0
+    else:
+        IDs = list(lnpi.phaseIDs)
+        if phaseID not in IDs:
+            return np.nan, np.nan
+        i = IDs.index(phaseID)
+
+    p = lnpi[i]
+    N = p.Nave
+    if np.ndim(mu_idx) == 0:
+        dN = lnpi.beta * p.Ncov[:,mu_idx]
+    else:
+        dN = lnpi.beta * np.dot(p.Ncov, mu_idx)
+
+    if kind == 'molfrac':
+        Ntot = N.sum()
+        value = N[comp]/Ntot
+        deriv = (dN[comp]*Ntot - N[comp]*dN.sum())/Ntot**2
+    elif kind == 'density':
+        value = N[comp]/p.volume
+        deriv = dN[comp]/p.volume
+    else:
+        raise ValueError('bad kind %s' % kind)
+
+    return value, deriv
+
+
+@with_trace('find_mu_molfrac_newton')
+def find_mu_molfrac_newton(ref,phaseID,target,mu,
+                           comp=0,
+                           mu_idx=None,
+                           kind='molfrac',
+                           xtol=1e-8,
+                           ftol=1e-8,
+                           maxiter=30,
+                           max_step=1.0,
+                           reweight_kwargs={},
+                           full_output=False):
+    """
+    calculate mu which provides molfrac (or density) of comp equal to target
+
+    Safeguarded Newton iteration using the derivative from the
+    covariance of N.  No bracket is needed.  Once iterates with both signs of
+    the residual are found, they bracket the root: each new iterate replaces
+    the end with the same sign, and steps leaving the bracket are replaced by
+    bisection.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    phaseID : int
+        phaseID of the target
+
+    target : float
+        target molfraction (or density)
+
+    mu : array-like
+        initial mu.  phaseID must be present at mu
+
+    comp : int (Default 0)
+        the component ID of target molfraction
+
+    mu_idx : int, optional
+        component of mu to vary.  Default is comp
+
+    kind : str (Default 'molfrac')
+        if 'molfrac', target N[comp]/sum(N).
+        if 'density', target N[comp]/volume
+
+    xtol : float (Default 1e-8)
+        converged if step in mu less than xtol
+
+    ftol : float (Default 1e-8)
+        converged if abs(value - target) less than ftol
+
+    maxiter : int (Default 30)
+
+    max_step : float (Default 1.0)
+        max change in mu per iteration
+
+    reweight_kwargs : dict
+        extra arguments to ref.reweight
+
+    full_output : bool (Default False)
+        if True, return solver info
+
+    Returns
+    -------
+    output : lnPi_phases object
+        object with desired molfraction
+
+    info : SolveInfo (optional, returned if full_output is `True`)
+        flag==0 if converged, and residual (value - target)
+    """
+
+    if mu_idx is None:
+        mu_idx = comp
+
+    mu_in = np.array(mu,dtype=float)
+    reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
+
+    def get(x):
+        m = mu_in.copy()
+        m[mu_idx] = x
+        c = ref.reweight(m,**reweight_kwargs)
+        v, d = _get_value_deriv(c, phaseID, comp, mu_idx, kind)
+        return c, v - target, d
+
+    x = mu_in[mu_idx]
+    #last iterate with phase present, and last iterates with f<0 and f>0.
+    #once both signs are seen, the root is bracketed between them
+    good = None
+    neg, pos = None, None
+    converged = False
+    nfev = 0
+
+    for i in range(maxiter):
+        c, f, d = get(x)
+        nfev += 1
+
+        if not np.isfinite(f):
+            #phase lost. backtrack toward last good iterate
+            if good is None:
+                raise RuntimeError('phaseID %i not present at initial mu' % phaseID)
+            x = 0.5*(x + good[0])
+            continue
+
+        good = (x, c, f)
+
+        if abs(f) < ftol:
+            converged = True
+            break
+
+        if d == 0:
+            raise RuntimeError('zero derivative at mu %s' % c.mu)
+
+        #replace the bracket end with the same sign as f
+        if f < 0:
+            neg = x
+        else:
+            pos = x
+
+        step = np.clip(f/d, -max_step, max_step)
+        x_new = x - step
+        if neg is not None and pos is not None:
+            lo, hi = sorted([neg, pos])
+            if not (lo < x_new < hi):
+                x_new = 0.5*(lo+hi)
+
+        if abs(x_new - x) < xtol:
+            converged = True
+            break
+
+        x = x_new
+
+    x, c, f = good
+
+    r = SolveInfo(_root_results(root=x, iterations=i+1, function_calls=nfev,
+                                flag=0 if converged else -2, method='newton'),
+                  residual=f)
+
+    if full_output:
+        return c,r
+    else:
+        return c
+
+
+def find_mu_molfrac_interp(C,phaseID,targets,
+                           comp=0,
+                           mu_idx=None,
+                           kind='molfrac',
+                           niter=20,
+                           polish=False,
+                           polish_kwargs={}):
+    """
+    invert many targets at once from a dense sweep
+
+    Values and derivatives (from covariance of N) at each state point of C
+    define a cubic Hermite interpolant of molfrac (or density) versus
+    mu[mu_idx], which is inverted for all targets simultaneously.
+
+    Parameters
+    ----------
+    C : lnPi_collection
+        sweep along mu[mu_idx], all other components fixed
+
+    phaseID : int
+
+    targets : array-like
+        target values
+
+    comp, mu_idx, kind : see find_mu_molfrac_newton
+
+    niter : int (Default 20)
+        number of vectorized Newton/bisection iterations on interpolant
+
+    polish : bool (Default False)
+        if True, refine each estimate with find_mu_molfrac_newton
+        (using C[0] as reference)
+
+    polish_kwargs : dict
+        extra arguments to find_mu_molfrac_newton
+
+    Returns
+    -------
+    mus : array of shape (len(targets),ncomp)
+        estimated mu for each target.  Rows are nan where target is not
+        bracketed by the sweep
+
+    lnpis : list (only if polish is True)
+        polished lnPi_phases objects (None where not bracketed)
+    """
+
+    if mu_idx is None:
+        mu_idx = comp
+
+    targets = np.atleast_1d(np.asarray(targets,dtype=float))
+
+    mus = C.mus
+    order = np.argsort(mus[:,mu_idx])
+    mus = mus[order]
+    x = mus[:,mu_idx]
+
+    vd = np.array([_get_value_deriv(C[int(i)], phaseID, comp, mu_idx, kind)
+                   for i in order])
+    y, dy = vd[:,0], vd[:,1]
+
+    #find first bracketing interval for each target
+    g = y[None,:] - targets[:,None]
+    finite = np.isfinite(g[:,:-1]) & np.isfinite(g[:,1:])
+    cross = finite & (np.sign(g[:,:-1]) != np.sign(g[:,1:]))
+    has = cross.any(axis=1)
+    k = np.argmax(cross,axis=1)
+
+    h = x[k+1] - x[k]
+    y0, y1 = y[k], y[k+1]
+    m0, m1 = dy[k]*h, dy[k+1]*h
+    tgt = targets
+
+    def H(t):
+        t2, t3 = t*t, t*t*t
+        return (2*t3-3*t2+1)*y0 + (t3-2*t2+t)*m0 + (-2*t3+3*t2)*y1 + (t3-t2)*m1
+
+    def dH(t):
+        t2 = t*t
+        return (6*t2-6*t)*y0 + (3*t2-4*t+1)*m0 + (-6*t2+6*t)*y1 + (3*t2-2*t)*m1
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lo = np.zeros_like(tgt)
+        hi = np.ones_like(tgt)
+        s0 = np.sign(y0 - tgt)
+        t = np.clip((tgt - y0)/(y1 - y0), 0.0, 1.0)
+        t[~np.isfinite(t)] = 0.5
+
+        for _ in range(niter):
+            gt = H(t) - tgt
+            same = np.sign(gt) == s0
+            lo = np.where(same, t, lo)
+            hi = np.where(same, hi, t)
+
+            t_new = t - gt/dH(t)
+            bad = ~np.isfinite(t_new) | (t_new <= lo) | (t_new >= hi)
+            t = np.where(bad, 0.5*(lo+hi), t_new)
+
+    out = mus[k].copy()
+    out[:,mu_idx] = x[k] + t*h
+    out[~has,:] = np.nan
+
+    if not polish:
+        return out
+
+    lnpis = []
+    ref = C[0]
+    for m, tg, ok in zip(out, targets, has):
+        if ok:
+            lnpis.append(find_mu_molfrac_newton(ref, phaseID, tg, m,
+                                                comp=comp, mu_idx=mu_idx,
+                                                kind=kind, **polish_kwargs))
+        else:
+            lnpis.append(None)
+    out[has] = [x.mu for x in lnpis if x is not None]
+    return out, lnpis
+
+
+def trace_isopleth(ref,phaseID,target,start,
+                   comp=0,
+                   comps=(0,1),
+                   kind='molfrac',
+                   direction=+1,
+                   ds=0.1,
+                   ds_min=1e-4,
+                   ds_max=1.0,
+                   npoints=100,
+                   mu_min=None,
+                   mu_max=None,
+                   corrector_kwargs={},
+                   reweight_kwargs={},
+                   full_output=False):
+    """
+    trace curve of constant molfracs_phaseIDs[phaseID,comp]==target
+
+    Pseudo-arclength continuation in the plane of mu components comps (see
+    binodal.trace_binodal), with the exact gradient
+    d molfrac/dmu_j from beta*cov(N) (see _get_value_deriv)
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    phaseID : int
+
+    target : float
+        target molfrac (or density if kind=='density')
+
+    start : lnPi_phases object or array
+        point on isopleth (e.g., from find_mu_molfrac), or mu near one
+
+    comp : int (Default 0)
+        component of target molfrac
+
+    comps : tuple of two ints (Default (0,1))
+        components of mu which vary
+
+    kind : str (Default 'molfrac')
+        'molfrac' or 'density'
+
+    direction, ds, ds_min, ds_max, npoints, mu_min, mu_max,
+    corrector_kwargs, reweight_kwargs, full_output : see trace_binodal
+
+    Returns
+    -------
+    output : list of lnPi_phases objects along isopleth
+
+    info : dict (optional, returned if full_output is True)
+    """
+
+    comps = list(comps)
+
+    def fgrad(c):
+        vals = [_get_value_deriv(c, phaseID, comp, j, kind) for j in comps]
+        g = vals[0][0] - target
+        grad = np.array([d for v, d in vals])
+        return g, grad
+
+    return _trace_level_set(ref,fgrad,start,comps=comps,direction=direction,
+                            ds=ds,ds_min=ds_min,ds_max=ds_max,npoints=npoints,
+                            mu_min=mu_min,mu_max=mu_max,
+                            corrector_kwargs=corrector_kwargs,
+                            reweight_kwargs=reweight_kwargs,
+                            full_output=full_output)
@@ -0,0 +1,241 @@
+"""
+routines to map phase behavior over a plane of two chemical potentials
+
+The plane is evaluated on a coarse mesh.  Cells whose corners disagree in
+phase count, phaseIDs or sign of Omega differences are split into four,
+recursively, so only the neighborhood of phase boundaries is resolved finely.
+"""
+
+import itertools
+
+import numpy as np
+
+__all__ = ['phase_map', 'PhaseMap']
+
+
+class _Point(object):
+    """
+    summary of a single state point
+    """
+
+    def __init__(self, mu, lnpi):
+        self.mu = mu
+        self.nphase = lnpi.nphase
+        self.has = lnpi.has_phaseIDs
+        self.Omegas = lnpi.Omegas_phaseIDs()
+        self.Naves = lnpi.Naves_phaseIDs
+
+        sign = []
+        for i, j in itertools.combinations(range(len(self.has)), 2):
+            if self.has[i] and self.has[j]:
+                sign.append(int(np.sign(self.Omegas[i] - self.Omegas[j])))
+            else:
+                sign.append(0)
+
+        self.signature = (self.nphase, tuple(self.has.tolist()), tuple(sign))
+
+
+class PhaseMap(object):
+    """
+    result of phase_map
+
+    Attributes
+    ----------
+    points : dict
+        lattice coordinate (i,j) -> point summary with attributes
+        mu, nphase, has, Omegas, Naves, signature
+
+    cells : list of tuples
+        leaf cells (i,j,size) in lattice coordinates
+
+    depth : int
+        max refinement depth
+
+    Notes
+    -----
+    Lattice coordinate (i,j) maps to
+    mu[comps] = (mu0_range[0] + i*h0, mu1_range[0] + j*h1), with h0,h1 the
+    spacing of the finest level.
+    """
+
+    def __init__(self, points, cells, mu_of, depth):
+        self.points = points
+        self.cells = cells
+        self._mu_of = mu_of
+        self.depth = depth
+
+    def corners(self, cell):
+        i, j, size = cell
+        return [(i, j), (i + size, j), (i + size, j + size), (i, j + size)]
+
+    def is_uniform(self, cell):
+        sig = [self.points[c].signature for c in self.corners(cell)]
+        return all(x == sig[0] for x in sig[1:])
+
+    @property
+    def boundary_cells(self):
+        """
+        leaf cells whose corners disagree
+        """
+        return [c for c in self.cells if not self.is_uniform(c)]
+
+    def cell_bounds(self, cell):
+        """
+        (mu_lo, mu_hi) full mu arrays of lower left and upper right corners
+        """
+        i, j, size = cell
+        return self._mu_of(i, j), self._mu_of(i + size, j + size)
+
+    def _edges(self, cell):
+        a, b, c, d = self.corners(cell)
+        return [(a, b), (d, c), (a, d), (b, c)]
+
+    def binodal_brackets(self, IDs=(0, 1)):
+        """
+        pairs (muA,muB) on edges of boundary cells across which
+        Omega[IDs[0]]-Omega[IDs[1]] changes sign with both phases present.
+
+        Each pair differs in one component, as needed by get_binodal_point
+        """
+        i, j = IDs
+        out = []
+        seen = set()
+        for cell in self.boundary_cells:
+            for p, q in self._edges(cell):
+                if (p, q) in seen:
+                    continue
+                seen.add((p, q))
+                P, Q = self.points[p], self.points[q]
+                if not (P.has[i] and P.has[j] and Q.has[i] and Q.has[j]):
+                    continue
+                if np.sign(P.Omegas[i] - P.Omegas[j]) != np.sign(
+                        Q.Omegas[i] - Q.Omegas[j]):
+                    out.append((P.mu, Q.mu))
+        return out
+
+    def spinodal_brackets(self, ID):
+        """
+        pairs (muA,muB) on edges of boundary cells where phaseID ID
+        appears/disappears.  muA has the phase, muB does not
+        """
+        out = []
+        seen = set()
+        for cell in self.boundary_cells:
+            for p, q in self._edges(cell):
+                if (p, q) in seen:
+                    continue
+                seen.add((p, q))
+                P, Q = self.points[p], self.points[q]
+                if P.has[ID] and not Q.has[ID]:
+                    out.append((P.mu, Q.mu))
+                elif Q.has[ID] and not P.has[ID]:
+                    out.append((Q.mu, P.mu))
+        return out
+
+    def to_array(self, field='nphase'):
+        """
+        values of field on the finest lattice, nan where not evaluated
+
+        Returns
+        -------
+        out : array of shape (n0,n1)
+        """
+        n0 = max(k[0] for k in self.points) + 1
+        n1 = max(k[1] for k in self.points) + 1
+        out = np.empty((n0, n1), dtype=float) * np.nan
+        for (i, j), p in self.points.items():
+            out[i, j] = getattr(p, field)
+        return out
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return 'PhaseMap: %i points, %i cells, %i boundary cells' % (
+            len(self.points), len(self.cells), len(self.boundary_cells))
+
+
+def phase_map(ref,
+              mu0_range,
+              mu1_range,
+              n0=5,
+              n1=5,
+              depth=5,
+              mu=None,
+              reweight_kwargs=None):
+    """
+    quadtree map of phase behavior over two chemical potentials
+
+    Parameters
+    ----------
+    ref : lnpi_phases object
+        object to reweight
+
+    mu0_range, mu1_range : tuple (min,max)
+        range of the two varied chemical potentials
+
+    n0, n1 : int (Default 5)
+        number of points of coarse mesh along each direction
+
+    depth : int (Default 5)
+        max number of refinements of a coarse cell
+
+    mu : list, optional
+        list with two elements equal to None.  These are the varied
+        components (in order).  Default [None,None]
+
+    reweight_kwargs : dict, optional
+        extra arguments to ref.reweight.  Default ZeroMax=True
+
+    Returns
+    -------
+    out : PhaseMap
+    """
+
+    if mu is None:
+        mu = [None, None]
+    comps = [i for i, m in enumerate(mu) if m is None]
+    if len(comps) != 2:
+        raise ValueError('mu must have exactly two None elements')
+
+    if reweight_kwargs is None:
+        reweight_kwargs = {}
+    reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+
+    scale = 2**depth
+    h0 = (mu0_range[1] - mu0_range[0]) / float((n0 - 1) * scale)
+    h1 = (mu1_range[1] - mu1_range[0]) / float((n1 - 1) * scale)
+
+    mu_base = np.array([0.0 if m is None else m for m in mu], dtype=float)
+
+    def mu_of(i, j):
+        m = mu_base.copy()
+        m[comps[0]] = mu0_range[0] + i * h0
+        m[comps[1]] = mu1_range[0] + j * h1
+        return m
+
+    points = {}
+
+    def get(c):
+        if c not in points:
+            m = mu_of(*c)
+            points[c] = _Point(m, ref.reweight(m, **reweight_kwargs))
+        return points[c]
+
+    stack = [(i * scale, j * scale, scale)
+             for i in range(n0 - 1) for j in range(n1 - 1)]
+
+    cells = []
+    while stack:
+        i, j, size = stack.pop()
+        corners = [(i, j), (i + size, j), (i + size, j + size), (i, j + size)]
+        sig = [get(c).signature for c in corners]
+
+        if size == 1 or all(x == sig[0] for x in sig[1:]):
+            cells.append((i, j, size))
+        else:
+            half = size // 2
+            stack.extend([(i, j, half), (i + half, j, half),
+                          (i, j + half, half), (i + half, j + half, half)])
+
+    return PhaseMap(points, cells, mu_of, depth)
@@ -0,0 +1,137 @@
+"""
+cheap DeltabetaE for a single phase by tracking its maximum and saddle
+
+DeltabetaE for phaseID is the depth of the phase maximum relative to the
+highest point on its boundaries with the other phases,
+
+DeltabetaE = max{lnPi}_{phase} - max{lnPi}_{boundaries}
+
+After a reweight the maximum is updated by hill climbing from its previous
+location, and the boundary maximum by evaluating the reweighted lnPi only on
+the stored boundary points.  Neither requires rebuilding the phases.  The
+tracked value is flagged inconsistent when the maximum leaves the phase region
+or reaches the boundary, or the barrier vanishes.  The full pipeline must then
+be rerun.
+"""
+
+import itertools
+
+import numpy as np
+
+__all__ = ['SaddleTracker']
+
+
+class SaddleTracker(object):
+    """
+    track DeltabetaE_phaseIDs()[ID] across reweights
+
+    Parameters
+    ----------
+    c : lnPi_phases object
+        built object containing phaseID ID
+
+    ID : int
+        phaseID to track
+
+    **kwargs : extra arguments to c._get_boundaries_overlap
+        (i.e., DeltabetaE_kwargs without vmin/vmax)
+    """
+
+    def __init__(self, c, ID, **kwargs):
+        base = c.base
+        phaseIDs = list(c.phaseIDs)
+        if ID not in phaseIDs:
+            raise ValueError('no phaseID %i' % ID)
+        i = phaseIDs.index(ID)
+
+        self.ID = ID
+        self.shape = base.shape
+        self.beta = base.beta
+        self._mu = np.asarray(base.mu, dtype=float)
+        self._data = np.asarray(base.data, dtype=float).ravel()
+
+        #boundary points of phase i with any other phase
+        boundary = np.zeros(base.shape, dtype=bool)
+        for (p, q), b in c._get_boundaries_overlap(range(c.nphase),
+                                                   **kwargs).items():
+            if i in (p, q) and b is not None:
+                boundary |= b
+        self._boundary = boundary.ravel()
+        self._bidx = np.where(self._boundary)[0]
+        self._bcoords = np.array(
+            np.unravel_index(self._bidx, self.shape), dtype=float)
+
+        phase = c.phases[i]
+        self._valid = (~np.ma.getmaskarray(base)).ravel()
+        self._region = (~np.ma.getmaskarray(phase)).ravel()
+        self._max = int(np.argmax(phase.filled(-np.inf)))
+
+        self._offsets = np.array([
+            x for x in itertools.product((-1, 0, 1), repeat=base.ndim)
+            if any(x)
+        ])
+
+    def _values(self, idx, dmu):
+        coords = np.array(np.unravel_index(idx, self.shape), dtype=float)
+        return self._data[idx] + self.beta * np.dot(dmu, coords)
+
+    def _hill_climb(self, dmu):
+        """
+        local max of reweighted data, starting from previous max
+
+        Returns
+        -------
+        idx : int
+            flat index of max
+
+        value : float
+
+        inside : bool
+            False if the climb wanted to leave the phase region
+        """
+        shape = np.array(self.shape)
+        idx = self._max
+        v = self._values(idx, dmu)
+        for _ in range(self._data.size):
+            x = np.array(np.unravel_index(idx, self.shape))
+            nb = x[None, :] + self._offsets
+            nb = nb[np.all((nb >= 0) & (nb < shape), axis=1)]
+            nb = np.ravel_multi_index(tuple(nb.T), self.shape)
+            nb = nb[self._valid[nb]]
+            if len(nb) == 0:
+                break
+
+            vals = self._values(nb, dmu)
+            j = np.argmax(vals)
+            if vals[j] <= v:
+                break
+            if not self._region[nb[j]]:
+                return idx, v, False
+            idx, v = int(nb[j]), vals[j]
+        return idx, v, True
+
+    def evaluate(self, mu, vmax=1e20):
+        """
+        tracked DeltabetaE at mu
+
+        Returns
+        -------
+        dE : float
+            vmax if phase has no boundary with another phase
+
+        ok : bool
+            False if tracked points are no longer consistent
+        """
+        dmu = np.asarray(mu, dtype=float) - self._mu
+
+        if len(self._bidx) == 0:
+            return vmax, False
+
+        idx, vmaxphase, inside = self._hill_climb(dmu)
+        self._max = idx
+
+        vb = self._data[self._bidx] + self.beta * np.dot(dmu, self._bcoords)
+        dE = vmaxphase - vb.max()
+
+        ok = inside and not self._boundary[idx] and dE > 0
+        return dE, ok
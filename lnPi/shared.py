@@ -0,0 +1,226 @@
+"""
+routines to share lnPi objects between processes
+
+A reference lnPi is copied once into a block of shared memory.  The handle to
+that block is small and cheap to pickle, and workers attach to the block
+without copying the data.
+"""
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    #python < 3.8
+    shared_memory = None
+
+
+__all__ = ['lnPi_shared', 'lnPi_phases_shared', 'to_shared']
+
+
+#per process record of attached blocks
+#name -> (SharedMemory, lnPi)
+_attached = {}
+
+
+def _rebuild_lnPi(cls, state):
+    """
+    unpickle helper for lnPi.__reduce__
+    """
+    return cls.from_state(state)
+
+
+class lnPi_shared(object):
+    """
+    handle to lnPi data and mask held in shared memory
+
+    Parameters
+    ----------
+    lnpi : lnPi object
+        object to place in shared memory
+
+    name : str, optional
+        name of shared memory block.  If None, let system choose
+
+    Notes
+    -----
+    The process which creates the handle owns the block and must call
+    `unlink` (or use the handle as a context manager) when done.
+    Pickled copies of the handle only carry the block name and metadata.
+    Calling `attach` in a worker returns a read only lnPi viewing the block.
+    Repeated calls to `attach` in the same process return the same object.
+    """
+
+    def __init__(self, lnpi, name=None):
+        if shared_memory is None:
+            raise RuntimeError('shared memory requires python >= 3.8')
+
+        data = np.ascontiguousarray(lnpi.data)
+        mask = np.ascontiguousarray(np.ma.getmaskarray(lnpi))
+
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=True, size=max(data.nbytes + mask.nbytes, 1))
+        self._owner = True
+
+        self.name = self._shm.name
+        self.shape = data.shape
+        self.dtype = data.dtype.str
+        self.fill_value = lnpi.fill_value
+        self.optinfo = dict(lnpi._optinfo)
+        self.cls = type(lnpi)
+
+        d, m = self._get_arrays(self._shm.buf)
+        d[...] = data
+        m[...] = mask
+
+    def _get_arrays(self, buf):
+        dtype = np.dtype(self.dtype)
+        size = int(np.prod(self.shape))
+        data = np.ndarray(self.shape, dtype=dtype, buffer=buf)
+        mask = np.ndarray(
+            self.shape, dtype=bool, buffer=buf, offset=size * dtype.itemsize)
+        return data, mask
+
+    ##################################################
+    #pickling
+    def __getstate__(self):
+        return {
+            k: getattr(self, k)
+            for k in ['name', 'shape', 'dtype', 'fill_value', 'optinfo', 'cls']
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+        self._owner = False
+
+    ##################################################
+    #access
+    def attach(self):
+        """
+        return lnPi object viewing shared memory (read only)
+        """
+        if self.name in _attached:
+            return _attached[self.name][1]
+
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+
+        data, mask = self._get_arrays(self._shm.buf)
+        data.flags.writeable = False
+        mask.flags.writeable = False
+
+        state = dict(
+            data=data,
+            mask=mask,
+            fill_value=self.fill_value,
+            optinfo=self.optinfo)
+        new = self.cls.from_state(state)
+
+        _attached[self.name] = (self._shm, new)
+        return new
+
+    def close(self):
+        """
+        detach this process from the block
+        """
+        _attached.pop(self.name, None)
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                #views still alive. released when they are collected
+                pass
+
+    def unlink(self):
+        """
+        free the block.  Only the owner should call this
+        """
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def __repr__(self):
+        return 'lnPi_shared: name=%s, shape=%s' % (self.name, self.shape)
+
+
+class lnPi_phases_shared(object):
+    """
+    handle to lnPi_phases object with base in shared memory
+
+    Only the base and the phase building options are shared.  Attached
+    objects build their phases on demand.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+
+    name : str, optional
+        name of shared memory block for ref.base
+    """
+
+    def __init__(self, ref, name=None):
+        self.base = lnPi_shared(ref.base, name=name)
+        self.cls = type(ref)
+        self.kwargs = {
+            k: getattr(ref, '_' + k)
+            for k in [
+                'argmax_kwargs', 'phases_kwargs', 'build_kwargs',
+                'ftag_phases', 'ftag_phases_kwargs'
+            ]
+        }
+
+    @property
+    def name(self):
+        return self.base.name
+
+    def attach(self):
+        """
+        return lnPi_phases object with base viewing shared memory
+        """
+        return self.cls(
+            self.base.attach(), phases='get', argmax='get', **self.kwargs)
+
+    def close(self):
+        self.base.close()
+
+    def unlink(self):
+        self.base.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def __repr__(self):
+        return 'lnPi_phases_shared: name=%s' % (self.name)
+
+
+def to_shared(x, name=None):
+    """
+    create shared memory handle for lnPi or lnPi_phases object
+
+    Parameters
+    ----------
+    x : lnPi or lnPi_phases object
+
+    name : str, optional
+        name of shared memory block
+
+    Returns
+    -------
+    handle : lnPi_shared or lnPi_phases_shared
+        handle.attach() gives the object back in any process
+    """
+    if hasattr(x, '_ftag_phases'):
+        return lnPi_phases_shared(x, name=name)
+    else:
+        return lnPi_shared(x, name=name)
@@ -2,6 +2,12 @@ import numpy as np
 
 from scipy import optimize
 
+from lnPi.saddle import SaddleTracker
+from lnPi._utils import MuLine, as_mu_line, _root_results
+from lnPi.trace import SolveInfo, record_eval, record_message, with_trace
+
+__all__ = ['get_spinodal', 'trace_spinodal']
+
 
 
 def _initial_bracket_spinodal_right(C,ID,mu_in,efac=1.0,
@@ -18,9 +24,10 @@ def _initial_bracket_spinodal_right(C,ID,mu_in,efac=1.0,
     ID : int
         phaseID to work with
 
-    mu_in : list
+    mu_in : list or MuLine
         list with value of static chem pot, and None for variable. e.g.,
-        mu_in=[None,0.0] implies mu[0] is variable, and mu[1]=0.0
+        mu_in=[None,0.0] implies mu[0] is variable, and mu[1]=0.0.
+        or, MuLine for variation along arbitrary direction
 
     efac : float (Default 1.0)
         cutoff value for spinodal
@@ -56,8 +63,8 @@ def _initial_bracket_spinodal_right(C,ID,mu_in,efac=1.0,
     
     reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
 
-    #mu which varies
-    mu_idx = mu_in.index(None)
+    #line along which mu varies
+    line = as_mu_line(mu_in)
     
     
     #delta E
@@ -80,17 +87,16 @@ def _initial_bracket_spinodal_right(C,ID,mu_in,efac=1.0,
     
     if left is None:
         #need to find a new value mu bounding thing
-        new_mu = mu_in[:]
-        new_mu[mu_idx] = C[w[0]].mu[mu_idx]
-        new_mu = np.asarray(new_mu)
+        x = line.x_of(C[w[0]].mu)
         
         for i in range(ntry):
-            new_mu[mu_idx] -= step*dmu
+            x -= step*dmu
 
-            t = ref.reweight(new_mu,**reweight_kwargs)
+            t = ref.reweight(line(x),**reweight_kwargs)
+            v = t.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID]
+            record_eval('bracket',t.mu,v)
             
-            if t.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID]>efac and \
-               np.isfinite(t.Omegas_phaseIDs()[ID]):
+            if v>efac and np.isfinite(t.Omegas_phaseIDs()[ID]):
                 left = t
                 break
         if left is None:
@@ -111,14 +117,13 @@ def _initial_bracket_spinodal_right(C,ID,mu_in,efac=1.0,
         if w[-1]+1<len(C):
             right = C[w[-1]+1]
         else:
-            new_mu = mu_in[:]
-            new_mu[mu_idx] = C[w[-1]].mu[mu_idx]
-            new_mu = np.asarray(new_mu)
+            x = line.x_of(C[w[-1]].mu)
 
             for i in range(ntry):
-                new_mu[mu_idx] += step*dmu
+                x += step*dmu
 
-                t = ref.reweight(new_mu,**reweight_kwargs)
+                t = ref.reweight(line(x),**reweight_kwargs)
+                record_eval('bracket',t.mu,None)
 
                 if not t.has_phaseIDs[ID]:
                     right = t
@@ -134,6 +139,15 @@ def _refine_bracket_spinodal_right(L,R,ID,efac=1.0,nmax=30,vmax=1e20,vmin=0.0,
     """
     find refined bracket with efac<DeltabetaE_left<vmax and vmin<DeltabetaE_right<efac
 
+    DeltabetaE is evaluated once per state point.  Trial points come from
+    secant extrapolation of the last two regular left points (those with
+    vmin<DeltabetaE<vmax) in DeltabetaE**(2/3), which is close to linear in mu
+    near the limit of stability.  The secant aims midway between vmin and
+    efac, so that the trial lands in the right bracket window.  The method
+    falls back to bisection when the endpoints are in the vmin/vmax sentinel
+    regions, or when the same endpoint has been replaced twice in a row
+    (Illinois type safeguard).
+
     Parameters
     ----------
     L,R : lnpi_phases objects
@@ -164,39 +178,53 @@ def _refine_bracket_spinodal_right(L,R,ID,efac=1.0,nmax=30,vmax=1e20,vmin=0.0,
     left,right : lnpi_phases objects
         left and right phases bracketing spinodal
     
-    r : scipy.optimize.zeros.RootResults object
+    r : SolveInfo
+        with left, right and info when the bracket collapsed
+
+    values : tuple
+        DeltabetaE at left and right
     """
 
     
     ref = L
     reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)    
-    
-    doneLeft=False
-    doneRight=False
-    
-    left = L
-    right = R
+    close_kwargs = dict(dict(atol=1e-5),**close_kwargs)
 
+    def value(x):
+        return x.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID]
 
-    close_kwargs = dict(dict(atol=1e-5),**close_kwargs)
+    def is_regular(v):
+        return np.isfinite(v) and v>vmin and v<vmax
+
+    #parametrize line mu(t) = L.mu + t*(R.mu - L.mu)
+    mu0 = np.asarray(L.mu,dtype=float)
+    dmu = np.asarray(R.mu,dtype=float) - mu0
+
+    left,right = L,R
+    tL,tR = 0.0,1.0
+    vL,vR = value(left),value(right)
+    nfev = 2
+    doneLeft = doneRight = False
+
+    #regular left points for extrapolation
+    hist = [(tL,vL)] if is_regular(vL) else []
+    vaim = 0.5*(efac + max(vmin,0.0))
+    last_side = None
+    repeat = 0
+
+    def results(root,i,flag,**kws):
+        return SolveInfo(_root_results(root=root,iterations=i,function_calls=nfev,
+                                       flag=flag,method='secant'),**kws)
     
     for i in range(nmax):
-        v = left.DeltabetaE_phaseIDs()[ID]
-        if v<vmax and v>efac:
-            doneLeft=True
-            
-        v = right.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID]
-        if v>vmin and v<efac:
-            doneRight=True
-            
-
+        doneLeft = doneLeft or (vL<vmax and vL>efac)
+        doneRight = doneRight or (vR>vmin and vR<efac)
 
         #########
         #checks
         if doneLeft and doneRight:
             #find bracket
-            r = optimize.zeros.RootResults(root=None,iterations=i,function_calls=i,flag=1)
-            return left,right,r
+            return left,right,results(None,i,1),(vL,vR)
 
 
         ########
@@ -205,50 +233,56 @@ def _refine_bracket_spinodal_right(L,R,ID,efac=1.0,nmax=30,vmax=1e20,vmin=0.0,
             #we've reached a breaking point
             if doneLeft:
                 #can't find a lower bound to efac, just return where we're at
-                r = optimize.zeros.RootResults(root=left.mu,iterations=i+1,function_calls=i,flag=0)
-                setattr(r,'left',left)
-                setattr(r,'right',right)
-                setattr(r,'info','all close and doneLeft')
-                return left,right,r
+                r = results(left.mu,i+1,0,left=left,right=right,
+                            info='all close and doneLeft')
+                return left,right,r,(vL,vR)
 
             #elif not doneLeft and not doneRight:
             else:
                 #all close, and no good on either end -> no spinodal
-                r = optimize.zeros.RootResults(root=None,iterations=i+1,function_calls=i,flag=1)
-                setattr(r,'left',left)
-                setattr(r,'right',right)
-                setattr(r,'doneLeft',doneLeft)
-                setattr(r,'doneRight',doneRight)
-                setattr(r,'info','all close and not done Left')
-                return None,None,r
-
-        mu_mid = 0.5*(left.mu+right.mu)
-        #print(mu_mid)
-        mid = ref.reweight(mu_mid,**reweight_kwargs)
-        
-        v = mid.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID]
+                r = results(None,i+1,1,left=left,right=right,
+                            doneLeft=doneLeft,doneRight=doneRight,
+                            info='all close and not done Left')
+                return None,None,r,(vL,vR)
+
+        ########
+        #next trial
+        w = tR - tL
+        t = None
+        if repeat<2 and len(hist)>=2:
+            (t0,v0),(t1,v1) = hist[-2],hist[-1]
+            if v1<v0:
+                #secant root of v==vaim, inside the right bracket window.
+                #linear in v**(2/3) (barrier ~ distance**1.5 near the limit)
+                g0,g1,gaim = v0**(2./3),v1**(2./3),vaim**(2./3)
+                t = t1 + (gaim - g1)*(t1 - t0)/(g1 - g0)
+                t = min(max(t,tL+0.1*w),tR-0.1*w)
+        if t is None:
+            t = tL + 0.5*w
+
+        mid = ref.reweight(mu0 + t*dmu,**reweight_kwargs)
+        nfev += 1
+        v = value(mid)
+        record_eval('refine',mid.mu,v)
 
         if v>=efac and np.isfinite(mid.Omegas_phaseIDs()[ID]):
-            left = mid
+            left,tL,vL = mid,t,v
+            if is_regular(v):
+                hist.append((t,v))
+            side = 'left'
         else:
-            right = mid
-
+            right,tR,vR = mid,t,v
+            side = 'right'
 
-    print('i',i)
-    print(ID)
-    print('left mu',left.mu)
-    print('right mu',right.mu)
-    print('dmu',left.mu-right.mu)
-    
-    print('left DE',left.DeltabetaE_phaseIDs())
-    print('right DE',right.DeltabetaE_phaseIDs())
+        repeat = repeat+1 if side==last_side else 0
+        last_side = side
 
-    print('doneleft',doneLeft)
-    print('doneright',doneRight)
-    print('close',np.allclose(left.mu,right.mu,**close_kwargs))
 
-    raise RuntimeError('did not finish')
-        
+    msg = 'did not finish: ID=%i, iterations=%i, left mu=%s, right mu=%s, ' \
+          'left DE=%s, right DE=%s, doneLeft=%s, doneRight=%s' % (
+              ID, i+1, left.mu, right.mu, vL, vR, doneLeft, doneRight)
+    record_message(msg)
+    raise RuntimeError(msg)
 
 
 
@@ -258,26 +292,109 @@ def _solve_spinodal(ref,ID,mu_in,a,b,efac=1.0,
                 phases_kwargs={},
                 ftag_phases = None,
                 DeltabetaE_kwargs={},
+                known=None,
+                track=False,
+                ftol=1e-6,
+                nrefresh=5,
                 **kwargs):
+    """
+    solve DeltabetaE_phaseIDs()[ID]==efac for x in [a,b]
 
-    idx = mu_in.index(None)
+    known : dict, optional
+        x -> (DeltabetaE_phaseIDs()[ID], lnPi_phases object) already
+        evaluated (e.g., bracket endpoints).  evaluations are memoized, so
+        these are not recomputed
+
+    track : bool (Default False)
+        if True, evaluate DeltabetaE with a SaddleTracker, and only build
+        phases when tracking becomes inconsistent.  The tracker is rebuilt
+        from every full evaluation.  The root is verified with a full
+        evaluation; if it misses, the bracket is shrunk and the tracked solve
+        repeated (at most nrefresh times, then a full solve, noted in the
+        messages of the open SolverTrace)
+
+    ftol : float (Default 1e-6)
+        with track, accept the root if the full DeltabetaE - efac is within
+        ftol
+
+    nrefresh : int (Default 5)
+        with track, max number of tracked solves
+
+    **kwargs : extra arguments to scipy.optimize.brentq
+    """
+
+    get_mu = as_mu_line(mu_in)
     reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
+
+    cache = {}
+    if known is not None:
+        for x,(v,c) in known.items():
+            cache[x] = (v - efac, c)
         
     def f(x):
-        mu = mu_in[:]
-        mu[idx] = x
-        c = ref.reweight(mu,**reweight_kwargs)
+        if x not in cache:
+            c = ref.reweight(get_mu(x),**reweight_kwargs)
+            cache[x] = (c.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID] - efac, c)
+            record_eval('solve',c.mu,cache[x][0])
+        return cache[x][0]
+
+    if track:
+        tracker_kwargs = {k:v for k,v in DeltabetaE_kwargs.items()
+                          if k not in ('vmin','vmax')}
+        vmax = DeltabetaE_kwargs.get('vmax',1e20)
+        state = dict(tracker=None)
+
+        def set_tracker(c):
+            if ID in c.phaseIDs:
+                state['tracker'] = SaddleTracker(c,ID,**tracker_kwargs)
+
+        for v,c in cache.values():
+            set_tracker(c)
+            if state['tracker'] is not None:
+                break
 
-        f.lnpi = c
-        
-        return c.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID] - efac
+        def g(x):
+            if x in cache:
+                return cache[x][0]
+            if state['tracker'] is not None:
+                dE,ok = state['tracker'].evaluate(get_mu(x),vmax=vmax)
+                if ok:
+                    record_eval('tracked',get_mu(x),dE - efac)
+                    return dE - efac
+            v = f(x)
+            set_tracker(cache[x][1])
+            return v
+
+        #solve on tracked values, then verify the root with a full
+        #evaluation.  If it misses by more than ftol, the full value
+        #shrinks the bracket and refreshes the tracker, and the solve is
+        #repeated on the smaller bracket
+        lo,hi = a,b
+        flo = f(lo)
+        for it in range(nrefresh):
+            xx,r = optimize.brentq(g,lo,hi,full_output=True,**kwargs)
+            v = f(xx)
+            if abs(v) <= ftol:
+                break
+            set_tracker(cache[xx][1])
+            if np.sign(v) == np.sign(flo):
+                lo,flo = xx,v
+            else:
+                hi = xx
+        else:
+            record_message('tracked root not within ftol after %i refreshes, '
+                           'finished with full solve' % nrefresh)
+            xx,r = optimize.brentq(f,lo,hi,full_output=True,**kwargs)
 
-    xx,r = optimize.brentq(f,a,b,full_output=True,**kwargs)
+    else:
+        xx,r = optimize.brentq(f,a,b,full_output=True,**kwargs)
+
+    r = SolveInfo(r,residual=f(xx))
 
-    r.residual = f(xx)
-    mu = f.lnpi.mu
+    lnpi = cache[xx][1]
+    mu = lnpi.mu
     
-    return mu,r,f.lnpi
+    return mu,r,lnpi
 
 
 def _get_step(C,ID,**kwargs):
@@ -306,12 +423,14 @@ def _get_step(C,ID,**kwargs):
 
 
 
+@with_trace('get_spinodal')
 def get_spinodal(C,ID,efac=1.0,
                  dmu=0.5,vmin=0.0,vmax=1e20,ntry=20,step=None,
                  nmax=20,                 
                  reweight_kwargs={},DeltabetaE_kwargs={},
                  close_kwargs={},
-                 solve_kwargs={},full_output=False):
+                 solve_kwargs={},full_output=False,
+                 track=False):
     """
     locate spinodal point for a given phaseID
 
@@ -319,7 +438,8 @@ def get_spinodal(C,ID,efac=1.0,
     Parameters
     ----------
     C : lnPi_collection
-        initial estimates to work from.  Function assumes C is in mu sorted order
+        initial estimates to work from.  Function assumes C is in mu sorted
+        order, along a single component or any straight line in mu
 
     ID : int
         phaseID to work with
@@ -362,17 +482,25 @@ def get_spinodal(C,ID,efac=1.0,
 
 
     solve_kwargs : dict
-        extra arguments to scipy.optimize.brentq
+        extra arguments to scipy.optimize.brentq.  With track, may also hold
+        ftol (Default 1e-6), the tolerance of the full DeltabetaE at the
+        tracked root, and nrefresh (Default 5)
 
     full_output : bool (Default False)
         if true, return output info object
 
+    track : bool (Default False)
+        if True, solve with saddle tracking (see lnPi.saddle), which avoids
+        building phases at most solver iterations
+
 
     Returns
     -------
     out : lnPi_phases object at spinodal point
 
-    r : output info object (optional, returned if full_output is True)
+    r : SolveInfo (optional, returned if full_output is True)
+        with from_solve, and residual if solved.  r.trace is a SolverTrace
+        of the solve
 
     """
     assert(len(C)>1)
@@ -390,12 +518,8 @@ def get_spinodal(C,ID,efac=1.0,
         raise ValueError('bad step')
 
 
-    msk = C[0].mu != C[1].mu
-    assert msk.sum() == 1
-    
-    mu_idx = np.where(msk)[0][0]
-    mu_in = list(C[0].mu[:])
-    mu_in[mu_idx] = None
+    #line through collection.  C may vary along any (straight) direction
+    mu_in = MuLine.from_points(C[0].mu, C[1].mu)
 
 
 
@@ -407,7 +531,7 @@ def get_spinodal(C,ID,efac=1.0,
                                           DeltabetaE_kwargs=DeltabetaE_kwargs)
     
 
-    left,right,rr = _refine_bracket_spinodal_right(L,R,ID,efac=efac,nmax=nmax,
+    left,right,rr,values = _refine_bracket_spinodal_right(L,R,ID,efac=efac,nmax=nmax,
                                                   vmin=vmin,vmax=vmax,
                                                   reweight_kwargs=reweight_kwargs,
                                                   DeltabetaE_kwargs=DeltabetaE_kwargs)
@@ -425,17 +549,19 @@ def get_spinodal(C,ID,efac=1.0,
         spin = left
                 
         r = rr
-        setattr(r,'bracket_iteration',rr.iterations)
-        setattr(r,'from_solve',False)
+        r.bracket_iteration = rr.iterations
+        r.from_solve = False
 
 
     
     else:
         #solve 
+        known = {mu_in.x_of(left.mu):(values[0],left),
+                 mu_in.x_of(right.mu):(values[1],right)}
         if step == -1:
             left,right = right,left
 
-        a,b = left.mu[mu_idx],right.mu[mu_idx]
+        a,b = mu_in.x_of(left.mu),mu_in.x_of(right.mu)
 
 
         mu,r,spin = _solve_spinodal(C[0],ID,mu_in,a,b,
@@ -445,10 +571,12 @@ def get_spinodal(C,ID,efac=1.0,
                                     phases_kwargs=C[0]._phases_kwargs,
                                     ftag_phases=C[0]._ftag_phases,
                                     DeltabetaE_kwargs=DeltabetaE_kwargs,
+                                    known=known,
+                                    track=track,
                                     **solve_kwargs)
 
-        setattr(r,'bracket_iterations',rr.iterations)
-        setattr(r,'from_solve',True)
+        r = SolveInfo(r.results,residual=r.residual,
+                      bracket_iterations=rr.iterations,from_solve=True)
 
     if full_output:
         return spin,r
@@ -462,3 +590,140 @@ def get_spinodal(C,ID,efac=1.0,
 
 
 
+
+
+
+def trace_spinodal(ref,ID,start,x,comps=(0,1),efac=1.0,
+                   dmu=0.1,dmu_min=1e-3,ntry=10,order=2,
+                   reweight_kwargs={},DeltabetaE_kwargs={},
+                   solve_kwargs={},full_output=False):
+    """
+    follow spinodal locus DeltabetaE_phaseIDs()[ID]==efac across mu plane
+
+    The locus is parametrized by mu[comps[1]], which is stepped over x.  For
+    each value, mu[comps[0]] is predicted by polynomial extrapolation of the
+    previous points, bracketed locally about the prediction, and solved with
+    brentq.  The bracket half width follows the last prediction error.
+
+    Parameters
+    ----------
+    ref : lnPi_phases object
+        object to reweight
+
+    ID : int
+        phaseID to work with
+
+    start : lnPi_phases object or array
+        spinodal point to start from (e.g., from get_spinodal)
+
+    x : array
+        values of mu[comps[1]] to step over, starting near start.mu[comps[1]]
+
+    comps : tuple (Default (0,1))
+        comps[0] is solved for, comps[1] is stepped
+
+    efac : float (Default 1.0)
+        cutoff value for spinodal
+
+    dmu : float (Default 0.1)
+        initial bracket half width
+
+    dmu_min : float (Default 1e-3)
+        minimum bracket half width
+
+    ntry : int (Default 10)
+        number of times to double bracket width before stopping
+
+    order : int (Default 2)
+        max order of extrapolating polynomial
+
+    reweight_kwargs : dict
+        extra arguments to reweight
+
+    DeltabetaE_kwargs : dict
+        extra arguemtns to lnPi.DeltabetaE_phaseIDs
+
+    solve_kwargs : dict
+        extra arguments to scipy.optimize.brentq
+
+    full_output : bool (Default False)
+        if true, return info dict
+
+    Returns
+    -------
+    out : list of lnPi_phases objects at spinodal points
+
+    info : dict (optional, returned if full_output is True)
+        status : 'done' or 'no_bracket' (locus lost, e.g. past critical point)
+        function_calls : total number of reweights
+        x : values of mu[comps[1]] reached
+    """
+
+    reweight_kwargs = dict(dict(ZeroMax=True),**reweight_kwargs)
+    i0,i1 = comps
+
+    mu0 = np.array(getattr(start,'mu',start),dtype=float)
+
+    xs = [mu0[i1]]
+    ys = [mu0[i0]]
+    out = []
+    if hasattr(start,'mu'):
+        out.append(start)
+
+    nfev = 0
+    h = dmu
+    status = 'done'
+
+    for xx in x:
+        if np.isclose(xx,xs[-1]) and len(xs)==1:
+            continue
+
+        #predict
+        n = min(order+1,len(xs))
+        if n==1:
+            y_pred = ys[-1]
+        else:
+            p = np.polyfit(xs[-n:],ys[-n:],n-1)
+            y_pred = np.polyval(p,xx)
+
+        mu = mu0.copy()
+        mu[i1] = xx
+        cache = {}
+
+        def f(y):
+            if y not in cache:
+                mu[i0] = y
+                c = ref.reweight(mu,**reweight_kwargs)
+                cache[y] = (c.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID] - efac, c)
+            return cache[y][0]
+
+        #local bracket
+        bracket = None
+        hh = h
+        for i in range(ntry):
+            a,b = y_pred-hh,y_pred+hh
+            fa,fb = f(a),f(b)
+            if np.sign(fa) != np.sign(fb):
+                bracket = (a,b)
+                break
+            hh *= 2
+
+        if bracket is None:
+            nfev += len(cache)
+            status = 'no_bracket'
+            break
+
+        y = optimize.brentq(f,*bracket,**solve_kwargs)
+        f(y)
+        nfev += len(cache)
+
+        h = max(2*abs(y-y_pred),dmu_min)
+        xs.append(xx)
+        ys.append(y)
+        out.append(cache[y][1])
+
+    if full_output:
+        info = dict(status=status,function_calls=nfev,x=np.array(xs))
+        return out,info
+    else:
+        return out
@@ -0,0 +1,182 @@
+"""
+process wide cache of reweighted state points
+
+Solvers and collection builders often rebuild the same state point (e.g.,
+bracket endpoints that are revisited by brentq, or a spinodal bracket reused
+by the binodal solver).  When enabled, ``lnPi_phases.reweight`` (and
+``reweight_batch``) look up built objects here before reweighting and
+segmenting again.
+
+The key is (root hash, quantized mu, ZeroMax, Pad, phase building
+settings).  The root hash (see ``lnPi_phases.root_hash``) is the content hash
+of the object at the start of a chain of reweights, and is carried by every
+object reweighted from it.  The same state point therefore has the same key
+whether it is reached from the user's reference, a collection element or a
+bracket endpoint, and only the root is hashed.  Pad=True changes the data,
+so an object reweighted with padding starts a new chain (its own content
+hash).  With ZeroMax=False the result depends on the normalization of the
+object reweighted, so its own content hash is used instead.  Cached objects are shared between callers, so
+they should not be modified in place.
+
+The cache is disabled by default.  Use ``enable_state_cache`` or the
+``state_cache_enabled`` context manager.  Hit rates are reported with the other cache
+statistics (see ``cache_stats`` and ``dump_cache_stats``) under the name
+``state_cache``.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+import numpy as np
+
+from lnPi.cached_decorators import CacheStats, _LRUCache, _registry
+
+__all__ = [
+    'StateCache', 'enable_state_cache', 'disable_state_cache',
+    'get_state_cache', 'state_cache_enabled', 'state_cache_stats'
+]
+
+
+def _func_name(f):
+    if f is None or isinstance(f, (bytes, str)):
+        return f
+    return '%s.%s' % (getattr(f, '__module__', ''),
+                      getattr(f, '__qualname__', getattr(f, '__name__', repr(f))))
+
+
+def _kwargs_key(d):
+    if not d:
+        return ()
+    return tuple(sorted((k, repr(v)) for k, v in d.items()))
+
+
+class StateCache(object):
+    """
+    LRU cache of lnPi_phases objects
+
+    Parameters
+    ----------
+    maxsize : int (Default 256)
+        max number of state points
+
+    decimals : int (Default 12)
+        mu is rounded to this many decimals in keys
+    """
+
+    def __init__(self, maxsize=256, decimals=12):
+        self.decimals = decimals
+        self._lru = _LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+        if 'state_cache' not in _registry:
+            _registry['state_cache'] = CacheStats('state_cache')
+        self.stats = _registry['state_cache']
+
+    def __len__(self):
+        return len(self._lru)
+
+    def clear(self):
+        with self._lock:
+            self._lru = _LRUCache(maxsize=self._lru.maxsize)
+
+    def key(self, ref, mu, ZeroMax=True, Pad=False):
+        """
+        key for ref reweighted to mu
+        """
+        mu = np.round(np.asarray(mu, dtype=float), self.decimals) + 0.0
+        root = ref.root_hash if ZeroMax else ref.base.content_hash
+        return (type(ref).__name__, root,
+                tuple(mu.tolist()), bool(ZeroMax), bool(Pad),
+                _kwargs_key(ref._argmax_kwargs),
+                _kwargs_key(ref._phases_kwargs),
+                _kwargs_key(ref._build_kwargs),
+                _func_name(ref._ftag_phases),
+                _kwargs_key(ref._ftag_phases_kwargs))
+
+    def get(self, key):
+        """
+        cached object or None
+        """
+        with self._lock:
+            if key in self._lru:
+                self.stats.add(hits=1)
+                return self._lru[key]
+        self.stats.add(misses=1)
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            n = self._lru.evict()
+        if n:
+            self.stats.add(evictions=n)
+
+    def get_or_build(self, key, build):
+        """
+        cached object for key, or build() (which is then stored)
+        """
+        value = self.get(key)
+        if value is None:
+            t0 = time.time()
+            value = build()
+            self.stats.add(compute_time=time.time() - t0)
+            self.put(key, value)
+        return value
+
+
+_state_cache = None
+
+
+def get_state_cache():
+    """
+    active StateCache or None if disabled
+    """
+    return _state_cache
+
+
+def enable_state_cache(maxsize=256, decimals=12):
+    """
+    enable process wide state cache
+
+    Returns
+    -------
+    cache : StateCache
+    """
+    global _state_cache
+    _state_cache = StateCache(maxsize=maxsize, decimals=decimals)
+    return _state_cache
+
+
+def disable_state_cache():
+    """
+    disable (and drop) process wide state cache
+    """
+    global _state_cache
+    _state_cache = None
+
+
+@contextmanager
+def state_cache_enabled(maxsize=256, decimals=12):
+    """
+    context manager enabling state cache within block
+
+    previous cache (if any) is restored on exit
+    """
+    global _state_cache
+    old = _state_cache
+    cache = enable_state_cache(maxsize=maxsize, decimals=decimals)
+    try:
+        yield cache
+    finally:
+        _state_cache = old
+
+
+def state_cache_stats():
+    """
+    dict(hits,misses,evictions,compute_time,hit_rate) for state cache
+    """
+    stats = _registry.get('state_cache', None)
+    if stats is None:
+        return CacheStats('state_cache').as_dict()
+    return stats.as_dict()
@@ -0,0 +1,350 @@
+"""
+surrogate models of a collection for cheap spinodal/binodal/molfrac solves
+
+A collection along a line in mu already holds Omega, <N>, cov(N) and
+DeltabetaE for each phaseID at every state point.  Along the line
+mu(x) = mu0 + x*d the exact derivatives
+
+dOmega_i/dx = -<N>_i . d
+d<N>_i/dx = beta * cov(N)_i . d
+
+give cubic Hermite interpolants (scipy.interpolate.BPoly.from_derivatives)
+of Omega and molfracs for each phase.  DeltabetaE is interpolated with a
+monotone cubic (PchipInterpolator).  Each condition is solved on the
+surrogate, and the root is then polished with Newton (or secant) steps using
+exact evaluations.  If polishing fails, the solver falls back to brentq on
+the surrounding collection interval.
+"""
+
+import numpy as np
+from scipy import optimize
+from scipy.interpolate import BPoly, PchipInterpolator
+
+from lnPi._utils import MuLine, _root_results
+from lnPi.molfrac import _get_value_deriv
+from lnPi.trace import SolveInfo
+
+__all__ = ['Surrogate']
+
+
+def _runs(msk):
+    """
+    list of index arrays of contiguous True runs (length>1) in msk
+    """
+    out = []
+    idx = np.where(msk)[0]
+    if len(idx) == 0:
+        return out
+    for r in np.split(idx, np.where(np.diff(idx) != 1)[0] + 1):
+        if len(r) > 1:
+            out.append(r)
+    return out
+
+
+class _Piecewise(object):
+    """
+    interpolant over (possibly disjoint) runs of x
+    """
+
+    def __init__(self, x, y, dy=None, msk=None):
+        if msk is None:
+            msk = np.isfinite(y)
+        self.pieces = []
+        for r in _runs(msk):
+            if dy is None:
+                p = PchipInterpolator(x[r], y[r], extrapolate=False)
+            else:
+                p = BPoly.from_derivatives(
+                    x[r], np.array([y[r], dy[r]]).T, extrapolate=False)
+            self.pieces.append((x[r], y[r], p))
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        out = np.zeros(x.shape) * np.nan
+        for xx, _, p in self.pieces:
+            m = (x >= xx[0]) & (x <= xx[-1])
+            out[m] = p(x[m])
+        return out
+
+    def derivative(self, x):
+        for xx, _, p in self.pieces:
+            if xx[0] <= x <= xx[-1]:
+                return float(p.derivative()(x))
+        return np.nan
+
+    def roots(self, target=0.0):
+        """
+        roots of self(x)==target
+
+        Returns
+        -------
+        output : list of (x,(xl,xr))
+            root and bracketing collection nodes
+        """
+        out = []
+        for xx, yy, p in self.pieces:
+            v = yy - target
+            for i in range(len(xx) - 1):
+                if v[i] == 0:
+                    out.append((xx[i], (xx[i], xx[i + 1])))
+                elif np.sign(v[i]) * np.sign(v[i + 1]) < 0:
+                    x0 = optimize.brentq(lambda x: p(x) - target, xx[i],
+                                         xx[i + 1])
+                    out.append((x0, (xx[i], xx[i + 1])))
+        return out
+
+
+class Surrogate(object):
+    """
+    surrogate of lnPi_collection along a line in mu
+
+    Parameters
+    ----------
+    C : lnPi_collection
+        collection with mu along a straight line (sorted or not).  The line
+        is MuLine.from_points through the first state and the one furthest
+        from it, so x is the varying component if only one varies
+
+    ref : lnPi_phases object, optional
+        object to reweight for exact evaluations.  Default C[0]
+
+    reweight_kwargs : dict, optional
+        extra arguments to ref.reweight
+
+    DeltabetaE_kwargs : dict, optional
+        extra arguments to DeltabetaE_phaseIDs
+    """
+
+    def __init__(self, C, ref=None, reweight_kwargs=None,
+                 DeltabetaE_kwargs=None):
+        if reweight_kwargs is None:
+            reweight_kwargs = {}
+        if DeltabetaE_kwargs is None:
+            DeltabetaE_kwargs = {}
+        self.reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+        self.DeltabetaE_kwargs = DeltabetaE_kwargs
+
+        mus = np.asarray(C.mus, dtype=float)
+        far = mus[np.argmax(((mus - mus[0])**2).sum(axis=-1))]
+        self.line = MuLine.from_points(mus[0], far)
+        x = np.array([self.line.x_of(mu) for mu in mus])
+        if not np.allclose(mus, self.line.origin + x[:, None] *
+                           self.line.direction):
+            raise ValueError('collection is not along a line in mu')
+
+        if ref is None:
+            ref = C[0]
+        self.ref = ref
+        self.beta = ref.beta
+
+        order = np.argsort(x)
+        self.x = x[order]
+        self.has = C.has_phaseIDs[order]
+        self.Omegas = C.Omegas_phaseIDs()[order]
+        self.Naves = C.Naves_phaseIDs[order]
+        self.Ncovs = np.array([c.Ncovs_phaseIDs for c in C])[order]
+        self.DeltabetaE = C.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[order]
+
+    ##################################################
+    #interpolants
+    def Omega_diff(self, IDs):
+        """
+        interpolant of Omega[IDs[0]] - Omega[IDs[1]]
+        """
+        i, j = IDs
+        d = self.line.direction
+        y = self.Omegas[:, i] - self.Omegas[:, j]
+        dy = -np.dot(self.Naves[:, i] - self.Naves[:, j], d)
+        return _Piecewise(self.x, y, dy, msk=self.has[:, i] & self.has[:, j])
+
+    def molfrac(self, ID, comp=0):
+        """
+        interpolant of molfracs_phaseIDs[ID,comp]
+        """
+        N = self.Naves[:, ID, :]
+        dN = self.beta * np.dot(self.Ncovs[:, ID], self.line.direction)
+        Ntot = N.sum(axis=-1)
+        y = N[:, comp] / Ntot
+        dy = (dN[:, comp] * Ntot - N[:, comp] * dN.sum(axis=-1)) / Ntot**2
+        return _Piecewise(self.x, y, dy, msk=self.has[:, ID])
+
+    def DeltabetaE_phaseID(self, ID, vmin=0.0, vmax=1e20):
+        """
+        interpolant of DeltabetaE_phaseIDs[ID] (regular values only)
+        """
+        y = self.DeltabetaE[:, ID]
+        return _Piecewise(self.x, y, msk=self._regular(ID, vmin, vmax))
+
+    def _regular(self, ID, vmin, vmax):
+        y = self.DeltabetaE[:, ID]
+        return self.has[:, ID] & (y > vmin) & (y < vmax) & np.isfinite(y)
+
+    def _edge_roots(self, ID, target, vmin, vmax):
+        """
+        crossings of DeltabetaE[ID]==target between a regular node and a
+        neighbouring node where the phase is absent (or has DeltabetaE below
+        target).  These are outside every run of the interpolant.
+
+        Returns
+        -------
+        output : list of (x,(xl,xr),dsur)
+            secant estimate of root, bracketing nodes, and secant slope
+        """
+        y = self.DeltabetaE[:, ID]
+        msk = self._regular(ID, vmin, vmax)
+        out = []
+        for k in np.where(msk)[0]:
+            if y[k] <= target:
+                continue
+            for j in (k - 1, k + 1):
+                if j < 0 or j >= len(y) or msk[j]:
+                    continue
+                yj = y[j] if self.has[j, ID] and np.isfinite(y[j]) else vmin
+                if yj >= target:
+                    continue
+                slope = (y[k] - yj) / (self.x[k] - self.x[j])
+                x0 = self.x[k] + (target - y[k]) / slope
+                out.append((x0, tuple(sorted((self.x[k], self.x[j]))),
+                            lambda x, slope=slope: slope))
+        return out
+
+    ##################################################
+    #exact
+    def _get_mu(self, x):
+        return self.line(x)
+
+    def _polish(self, fexact, x0, dsur, bracket, xtol, ftol, maxiter):
+        """
+        Newton/secant iterations from surrogate root x0, falling back to
+        brentq on bracket
+        """
+        cache = {}
+
+        def f(x):
+            if x not in cache:
+                cache[x] = fexact(x)
+            return cache[x]
+
+        x = x0
+        prev = None
+        flag = None
+        for it in range(maxiter):
+            v, d, c = f(x)
+            if not np.isfinite(v):
+                break
+            if abs(v) <= ftol:
+                flag = 0
+                break
+
+            if d is None or not np.isfinite(d) or d == 0:
+                if prev is None:
+                    d = dsur(x)
+                else:
+                    d = (v - prev[1]) / (x - prev[0])
+            if not np.isfinite(d) or d == 0:
+                break
+            prev = (x, v)
+
+            dx = -v / d
+            xn = x + dx
+            if not (bracket[0] <= xn <= bracket[1]):
+                break
+            x = xn
+            if abs(dx) < xtol:
+                v, d, c = f(x)
+                flag = 0
+                break
+
+        if flag == 0:
+            r = _root_results(
+                root=x, iterations=it + 1, function_calls=len(cache), flag=0,
+                method='newton')
+            return c, SolveInfo(r, residual=v, from_surrogate=True)
+
+        #fallback
+        xx, r = optimize.brentq(
+            lambda x: f(x)[0],
+            bracket[0],
+            bracket[1],
+            full_output=True,
+            xtol=xtol)
+        v, d, c = f(xx)
+        r.function_calls = len(cache)
+        return c, SolveInfo(r, residual=v, from_surrogate=False)
+
+    def _solve(self, roots, fexact, xtol, ftol, maxiter, full_output):
+        """
+        polish roots, a list of (x0,bracket,dsur)
+        """
+        out = []
+        for x0, bracket, dsur in sorted(roots, key=lambda t: t[0]):
+            c, r = self._polish(fexact, x0, dsur, bracket, xtol, ftol,
+                                maxiter)
+            out.append((c, r))
+
+        if full_output:
+            return out
+        else:
+            return [c for c, r in out]
+
+    ##################################################
+    #solvers
+    def get_binodals(self, IDs, xtol=1e-8, ftol=1e-8, maxiter=5,
+                     full_output=False):
+        """
+        binodal points Omega[IDs[0]]==Omega[IDs[1]]
+
+        Returns
+        -------
+        output : list of lnPi_phases objects (or (lnPi_phases,SolveInfo)
+            if full_output).  The info has residual and from_surrogate (False
+            if polishing fell back to brentq)
+        """
+        i, j = IDs
+        d = self.line.direction
+
+        def fexact(x):
+            c = self.ref.reweight(self._get_mu(x), **self.reweight_kwargs)
+            Omegas = c.Omegas_phaseIDs()
+            N = c.Naves_phaseIDs
+            return Omegas[i] - Omegas[j], -np.dot(N[i] - N[j], d), c
+
+        sur = self.Omega_diff(IDs)
+        roots = [(x0, b, sur.derivative) for x0, b in sur.roots(0.0)]
+        return self._solve(roots, fexact, xtol, ftol, maxiter, full_output)
+
+    def get_spinodals(self, ID, efac=1.0, vmin=0.0, vmax=1e20, xtol=1e-8,
+                      ftol=1e-6, maxiter=5, full_output=False):
+        """
+        spinodal points DeltabetaE_phaseIDs[ID]==efac
+
+        Includes crossings between the last node with a barrier and the
+        first node without phase ID, as in get_spinodal.
+        """
+        DeltabetaE_kwargs = dict(
+            self.DeltabetaE_kwargs, vmin=vmin, vmax=vmax)
+
+        def fexact(x):
+            c = self.ref.reweight(self._get_mu(x), **self.reweight_kwargs)
+            return c.DeltabetaE_phaseIDs(**DeltabetaE_kwargs)[ID] - efac, \
+                None, c
+
+        sur = self.DeltabetaE_phaseID(ID, vmin, vmax)
+        roots = [(x0, b, sur.derivative) for x0, b in sur.roots(efac)]
+        roots += self._edge_roots(ID, efac, vmin, vmax)
+        return self._solve(roots, fexact, xtol, ftol, maxiter, full_output)
+
+    def get_molfracs(self, ID, target, comp=0, xtol=1e-8, ftol=1e-8,
+                     maxiter=5, full_output=False):
+        """
+        points with molfracs_phaseIDs[ID,comp]==target
+        """
+
+        def fexact(x):
+            c = self.ref.reweight(self._get_mu(x), **self.reweight_kwargs)
+            v, d = _get_value_deriv(c, ID, comp, self.line.direction)
+            return v - target, d, c
+
+        sur = self.molfrac(ID, comp)
+        roots = [(x0, b, sur.derivative) for x0, b in sur.roots(target)]
+        return self._solve(roots, fexact, xtol, ftol, maxiter, full_output)
@@ -0,0 +1,218 @@
+"""
+routines to sweep many mu values with bounded memory
+
+Only reduced quantities are kept.  Each state point is built, reduced and
+released before the next one, so peak memory does not grow with the number of
+mu values.
+"""
+
+import itertools
+
+import numpy as np
+
+from lnPi.instrument import progress
+
+__all__ = ['iter_reweight', 'sweep_reweight', 'HDFSink']
+
+
+#field name -> function of lnpi_phases
+FIELDS = {
+    'nphase': lambda x: x.nphase,
+    'has_phaseIDs': lambda x: x.has_phaseIDs,
+    'Omegas_phaseIDs': lambda x: x.Omegas_phaseIDs(),
+    'Naves_phaseIDs': lambda x: x.Naves_phaseIDs,
+    'Nvars_phaseIDs': lambda x: x.Nvars_phaseIDs,
+    'molfracs_phaseIDs': lambda x: x.molfracs_phaseIDs,
+    'densities_phaseIDs': lambda x: x.densities_phaseIDs,
+    'DeltabetaE_phaseIDs': lambda x: x.DeltabetaE_phaseIDs(),
+}
+
+DEFAULT_FIELDS = ('Omegas_phaseIDs', 'Naves_phaseIDs', 'molfracs_phaseIDs')
+
+
+def _get_fields(fields):
+    """
+    convert fields to dict name -> function
+    """
+    if isinstance(fields, dict):
+        out = {}
+        for k, v in fields.items():
+            out[k] = FIELDS[v] if isinstance(v, (bytes, str)) else v
+        return out
+    else:
+        return {k: FIELDS[k] for k in fields}
+
+
+def iter_reweight(ref,
+                  mus,
+                  fields=DEFAULT_FIELDS,
+                  chunksize=256,
+                  reweight_kwargs=None,
+                  out=None,
+                  sink=None):
+    """
+    iterate over reduced values of ref reweighted to each mu
+
+    Parameters
+    ----------
+    ref : lnpi_phases object
+        object to reweight
+
+    mus : iterable
+        chem. pots.  May be a generator
+
+    fields : sequence or dict
+        if sequence, names in FIELDS.
+        if dict, output name -> name in FIELDS or function of lnpi_phases.
+        'mu' is always included
+
+    chunksize : int (Default 256)
+        number of state points per chunk
+
+    reweight_kwargs : dict, optional
+        extra arguments to ref.reweight.  Default ZeroMax=True.
+        The state cache is always bypassed (cache=False)
+
+    out : dict, optional
+        output name -> preallocated array with leading dimension len(mus).
+        each chunk is written to out[name][start:stop]
+
+    sink : object, optional
+        object with method write(start, chunk) (e.g., HDFSink).
+        each chunk is passed to sink.write
+
+    Yields
+    ------
+    start : int
+        index of first state point in chunk
+
+    chunk : dict
+        name -> array of shape (n,...) for n state points in chunk
+    """
+
+    if reweight_kwargs is None:
+        reweight_kwargs = {}
+    #swept objects must not be kept alive by the state cache
+    reweight_kwargs = dict(dict(ZeroMax=True), **reweight_kwargs)
+    reweight_kwargs['cache'] = False
+
+    funcs = _get_fields(fields)
+
+    mus = iter(mus)
+    start = 0
+    while True:
+        block = list(itertools.islice(mus, chunksize))
+        if len(block) == 0:
+            break
+
+        values = {k: [] for k in funcs}
+        for mu in block:
+            x = ref.reweight(mu, **reweight_kwargs)
+            for k, f in funcs.items():
+                values[k].append(f(x))
+            #release state point before building the next one
+            del x
+
+        chunk = {k: np.array(v) for k, v in values.items()}
+        chunk['mu'] = np.array(block, dtype=float)
+
+        stop = start + len(block)
+        if out is not None:
+            for k, v in out.items():
+                v[start:stop] = chunk[k]
+        if sink is not None:
+            sink.write(start, chunk)
+        progress('iter_reweight', start=start, stop=stop)
+
+        yield start, chunk
+        start = stop
+
+
+def sweep_reweight(ref, mus, fields=DEFAULT_FIELDS, chunksize=256,
+                   reweight_kwargs=None, sink=None):
+    """
+    collect output of iter_reweight into arrays
+
+    Parameters
+    ----------
+    see iter_reweight
+
+    Returns
+    -------
+    out : dict
+        name -> array of shape (len(mus),...).
+        if sink is not None, data are only written to sink and None is returned
+    """
+
+    if sink is not None:
+        for _ in iter_reweight(ref, mus, fields, chunksize, reweight_kwargs,
+                               sink=sink):
+            pass
+        return None
+
+    n = len(mus) if hasattr(mus, '__len__') else None
+
+    out = None
+    chunks = []
+    for start, chunk in iter_reweight(ref, mus, fields, chunksize,
+                                      reweight_kwargs):
+        if n is None:
+            chunks.append(chunk)
+            continue
+
+        if out is None:
+            #preallocate from first chunk
+            out = {
+                k: np.empty((n, ) + v.shape[1:], dtype=v.dtype)
+                for k, v in chunk.items()
+            }
+        for k, v in chunk.items():
+            out[k][start:start + len(v)] = v
+
+    if n is None:
+        if len(chunks) == 0:
+            return {}
+        out = {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+    return out
+
+
+class HDFSink(object):
+    """
+    on disk sink for iter_reweight
+
+    Each field is written to a resizable dataset in group
+
+    Parameters
+    ----------
+    group : h5py.File or h5py.Group
+
+    overwrite : bool (Default False)
+        if True, delete existing datasets of the same name
+    """
+
+    def __init__(self, group, overwrite=False):
+        self.group = group
+        self.overwrite = overwrite
+        self._created = set()
+
+    def write(self, start, chunk):
+        stop = start + len(chunk['mu'])
+        for k, v in chunk.items():
+            if k not in self._created:
+                if k in self.group:
+                    if self.overwrite:
+                        del self.group[k]
+                    else:
+                        raise RuntimeError('key %s already exists' % k)
+                self.group.create_dataset(
+                    k,
+                    shape=(0, ) + v.shape[1:],
+                    maxshape=(None, ) + v.shape[1:],
+                    dtype=v.dtype,
+                    chunks=True)
+                self._created.add(k)
+
+            d = self.group[k]
+            if d.shape[0] < stop:
+                d.resize(stop, axis=0)
+            d[start:stop] = v
@@ -0,0 +1,249 @@
+"""
+structured traces of solver evaluations
+
+Solvers open a ``SolverTrace`` for the duration of a solve.  While it is open,
+evaluations (mu, function value, stage) and timings of instrumented stages
+(e.g., 'reweight' and 'segmentation') are recorded into every open trace of
+the current thread.  Nested solves therefore also show up in the trace of
+the enclosing driver.  The change in cache statistics (see ``cache_stats``,
+which includes the state cache) over the solve is stored on exit.
+
+Solvers called with full_output return a ``SolveInfo``, holding the
+RootResults of the solve, the trace, and solver specific values (e.g.,
+residual).
+
+Stage timings are added by ``lnPi.instrument.stage``, and are exclusive of
+nested stages.  Nothing is written to stdout.  With no trace open,
+``record_eval`` does almost nothing.
+"""
+
+from collections import defaultdict
+from functools import wraps
+import inspect
+import threading
+import time
+
+import numpy as np
+
+from lnPi.cached_decorators import cache_stats
+
+__all__ = ['SolverTrace', 'SolveInfo']
+
+_local = threading.local()
+
+
+def _stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _diff_stats(before, after):
+    out = {}
+    for k, v in after.items():
+        b = before.get(k, {})
+        d = {
+            x: v[x] - b.get(x, 0)
+            for x in ('hits', 'misses', 'evictions', 'compute_time')
+        }
+        if any(d.values()):
+            n = d['hits'] + d['misses']
+            d['hit_rate'] = d['hits'] / float(n) if n > 0 else 0.0
+            out[k] = d
+    return out
+
+
+class SolverTrace(object):
+    """
+    record of a single solve
+
+    Attributes
+    ----------
+    name : str
+
+    stages, mus, values : lists
+        stage name, mu and function value for each recorded evaluation
+
+    counts : dict
+        stage -> number of calls (e.g. 'reweight', 'segmentation')
+
+    timings : dict
+        stage -> total seconds
+
+    cache : dict
+        change in cache statistics over solve (see cache_stats)
+
+    elapsed : float
+        total seconds
+
+    messages : list of str
+        diagnostics (e.g., reason for failure)
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.stages = []
+        self.mus = []
+        self.values = []
+        self.counts = defaultdict(int)
+        self.timings = defaultdict(float)
+        self.cache = {}
+        self.elapsed = None
+        self.messages = []
+
+    def __enter__(self):
+        _stack().append(self)
+        self._cache0 = cache_stats()
+        self._t0 = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed = time.time() - self._t0
+        self.cache = _diff_stats(self._cache0, cache_stats())
+        _stack().remove(self)
+        return False
+
+    def record(self, stage, mu=None, value=None):
+        self.stages.append(stage)
+        self.mus.append(None if mu is None else np.array(mu, dtype=float))
+        self.values.append(value)
+
+    def add_time(self, stage, dt):
+        self.counts[stage] += 1
+        self.timings[stage] += dt
+
+    @property
+    def nevals(self):
+        return len(self.values)
+
+    def as_dict(self):
+        return dict(
+            name=self.name,
+            stages=list(self.stages),
+            mus=list(self.mus),
+            values=list(self.values),
+            counts=dict(self.counts),
+            timings=dict(self.timings),
+            cache=dict(self.cache),
+            elapsed=self.elapsed,
+            messages=list(self.messages))
+
+    def summary(self):
+        """
+        table of counts and timings
+        """
+        lines = ['%s: %i evaluations, elapsed=%s' % (
+            self.name, self.nevals,
+            'None' if self.elapsed is None else '%.4g' % self.elapsed)]
+        for k in sorted(self.timings, key=self.timings.get, reverse=True):
+            lines.append('  %-20s %8i %12.4g' % (k, self.counts[k],
+                                                 self.timings[k]))
+        for k, v in sorted(self.cache.items()):
+            lines.append('  cache %-14s hits=%i misses=%i hit_rate=%.3f' % (
+                k, v['hits'], v['misses'], v['hit_rate']))
+        for m in self.messages:
+            lines.append('  ' + m)
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return 'SolverTrace(%s, nevals=%i)' % (self.name, self.nevals)
+
+
+class SolveInfo(object):
+    """
+    solve info returned with full_output
+
+    Attributes of the RootResults (root, converged, flag, iterations,
+    function_calls) can be accessed directly from the info object
+
+    Parameters
+    ----------
+    results : RootResults, optional
+        results of the solve
+
+    trace : SolverTrace, optional
+        set by solvers which run within a trace
+
+    **kwargs : solver specific values (e.g., residual).  See the solver
+    """
+
+    def __init__(self, results=None, trace=None, **kwargs):
+        self.results = results
+        self.trace = trace
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name):
+        results = self.__dict__.get('results')
+        if results is None or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(results, name)
+
+    def __repr__(self):
+        keys = [k for k in self.__dict__ if k not in ('results', 'trace')]
+        return 'SolveInfo(%s)' % ', '.join(
+            ['results=%r' % self.results] +
+            ['%s=%r' % (k, self.__dict__[k]) for k in keys])
+
+
+def _as_info(info):
+    if isinstance(info, SolveInfo):
+        return info
+    return SolveInfo(info)
+
+
+def record_eval(stage, mu, value):
+    """
+    record evaluation in all open traces
+    """
+    for t in _stack():
+        t.record(stage, mu, value)
+
+
+def record_message(msg):
+    """
+    add diagnostic message to all open traces
+    """
+    for t in _stack():
+        t.messages.append(msg)
+
+
+def with_trace(name):
+    """
+    decorator running solver within a SolverTrace
+
+    if called with full_output=True (by keyword or position), the last
+    returned element (the solve info) is returned as a SolveInfo, with the
+    trace as attribute `trace`.  Exceptions raised by the solver also get a
+    `trace` attribute
+    """
+
+    def decorator(func):
+        sig = inspect.signature(func)
+        default = sig.parameters['full_output'].default
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            full_output = sig.bind(*args, **kwargs).arguments.get(
+                'full_output', default)
+            with SolverTrace(name) as trace:
+                try:
+                    out = func(*args, **kwargs)
+                except Exception as e:
+                    #failed solves carry their trace
+                    try:
+                        e.trace = trace
+                    except AttributeError:
+                        pass
+                    raise
+            if full_output and isinstance(out, tuple) and \
+               out[-1] is not None:
+                info = _as_info(out[-1])
+                info.trace = trace
+                out = out[:-1] + (info,)
+            return out
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,67 @@
+"""
+shared fixtures: objects built from the bundled example data
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import lnPi
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples')
+
+FILE_1D = os.path.join(EXAMPLES, '1D', 'PiofN',
+                       'ljsf.t070.bulk.v729.r1.lnpi.dat')
+FILE_2D = os.path.join(EXAMPLES, '2D', 'nahs_asym_mix.07_07_07.r1.lnpi_o.dat')
+
+#mu line for 2D collections
+MU_IN_2D = [None, 0.0]
+X_2D = np.linspace(-10.0, 10.0, 21)
+
+
+@pytest.fixture(scope='session')
+def ref_1D():
+    return lnPi.lnPi_phases.from_file(
+        FILE_1D,
+        mu=-8.6160,
+        volume=729.0,
+        beta=1.0 / 0.7,
+        num_phases_max=2,
+        argmax_kwargs=dict(min_distance=[5, 10, 20, 40]),
+        ftag_phases=lnPi.tag_phases_single)
+
+
+@pytest.fixture(scope='session')
+def ref_2D():
+    return lnPi.lnPi_phases.from_file(
+        FILE_2D,
+        mu=[0.5, 0.5],
+        fill_value=np.nan,
+        ZeroMax=True,
+        num_phases_max=2,
+        beta=1.0,
+        build_kwargs=dict(num_phases_max=5),
+        ftag_phases=lnPi.tag_phases_binary)
+
+
+@pytest.fixture
+def C_2D(ref_2D):
+    """
+    fresh collection along mu[0] (built, sorted)
+    """
+    C = lnPi.lnPi_collection.from_mu(ref_2D, MU_IN_2D, X_2D)
+    C.has_phaseIDs
+    return C
+
+
+@pytest.fixture(scope='session')
+def coexistence_2D(ref_2D):
+    """
+    (collection, spinodals, binodals) from the serial brentq solvers
+    """
+    C = lnPi.lnPi_collection.from_mu(ref_2D, MU_IN_2D, X_2D)
+    C.get_spinodals(append=False)
+    C.get_binodals(append=False)
+    return C, C.spinodals, C.binodals
@@ -0,0 +1,45 @@
+import numpy as np
+
+import lnPi
+from lnPi.adaptive import _Point, _needs_refine
+
+from conftest import MU_IN_2D
+
+X_COARSE = np.linspace(-10.0, 10.0, 5)
+DX_MIN = 0.25
+
+
+def test_adaptive_matches_uniform(ref_2D, coexistence_2D):
+    _, spinodals, binodals = coexistence_2D
+    C, info = lnPi.lnPi_collection.from_mu_adaptive(
+        ref_2D, MU_IN_2D, X_COARSE, DX_MIN, full_output=True)
+
+    assert info['converged']
+    #uniform grid at the same resolution
+    assert info['nevals'] < 0.5 * (20.0 / DX_MIN)
+    np.testing.assert_allclose(C.mus[:, 0], info['x'])
+
+    C.get_spinodals(append=False)
+    C.get_binodals(append=False)
+    assert len(C.spinodals) == len(spinodals) == 2
+    assert len(C.binodals) == len(binodals) == 1
+    for a, b in zip(C.spinodals, spinodals):
+        np.testing.assert_allclose(a.mu, b.mu, atol=1e-8)
+    for a, b in zip(C.binodals, binodals):
+        np.testing.assert_allclose(a.mu, b.mu, atol=1e-8)
+
+
+def test_unrefined_intervals_are_smooth(ref_2D):
+    L, info = lnPi.adaptive.get_lnpis_adaptive(
+        ref_2D, MU_IN_2D, X_COARSE, DX_MIN, full_output=True)
+    points = [_Point(x, lnpi, 1.0, {}, 0) for x, lnpi in zip(info['x'], L)]
+    for A, B in zip(points[:-1], points[1:]):
+        if B.x - A.x > DX_MIN:
+            assert not _needs_refine(A, B, 0.1, 1.0)
+
+
+def test_maxeval(ref_2D):
+    L, info = lnPi.adaptive.get_lnpis_adaptive(
+        ref_2D, MU_IN_2D, X_COARSE, DX_MIN, maxeval=8, full_output=True)
+    assert not info['converged']
+    assert info['nevals'] == len(L) == 8
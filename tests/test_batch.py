@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+import lnPi
+
+MU1 = np.array([-0.2, 0.0, 0.2])
+
+
+def test_reweight_batch_matches_reweight(ref_2D):
+    mus = [[-1.0, 0.0], [0.5, 0.2], [2.0, -0.3]]
+    for mu, c in zip(mus, lnPi.reweight_batch(ref_2D, mus)):
+        x = ref_2D.reweight(mu)
+        np.testing.assert_allclose(c.mu, x.mu)
+        np.testing.assert_allclose(c.base.data, x.base.data)
+        np.testing.assert_allclose(c.Omegas_phaseIDs(), x.Omegas_phaseIDs())
+
+
+def test_chandrupatla_matches_brentq():
+    c = np.array([0.5, 2.0, 7.0, -1.0])
+
+    def f(x, idx):
+        return x**3 - c[idx]
+
+    a = np.zeros(4)
+    b = np.array([3.0, 3.0, 3.0, 3.0])
+    root, info = lnPi.chandrupatla(f, a, b, xtol=1e-12)
+    for r, ci in zip(root[:3], c[:3]):
+        np.testing.assert_allclose(
+            r, optimize.brentq(lambda x: x**3 - ci, 0.0, 3.0, xtol=1e-12),
+            atol=1e-10)
+    assert np.all(info['converged'][:3])
+    #no sign change on last line
+    assert np.isnan(root[3])
+
+
+def test_binodals_batch_matches_scalar(ref_2D):
+    muAs = np.array([[-1.5, m] for m in MU1])
+    muBs = np.array([[0.5, m] for m in MU1])
+    out = lnPi.get_binodal_points_batch(ref_2D, (0, 1), muAs, muBs)
+    for c, A, B in zip(out, muAs, muBs):
+        expected = lnPi.get_binodal_point(ref_2D, (0, 1), A, B)
+        np.testing.assert_allclose(c.mu, expected.mu, atol=1e-6)
+
+
+def test_molfrac_batch_matches_scalar(ref_2D):
+    targets = np.array([1e-5, 5e-5, 1e-4])
+    muAs = np.array([[-6.0, m] for m in MU1])
+    muBs = np.array([[-1.0, m] for m in MU1])
+    out = lnPi.find_mu_molfrac_batch(ref_2D, 0, targets, muAs, muBs,
+                                     xtol=1e-12)
+    for c, t, A, B in zip(out, targets, muAs, muBs):
+        expected = lnPi.find_mu_molfrac(ref_2D, 0, t, A, B, xtol=1e-12)
+        np.testing.assert_allclose(c.mu, expected.mu, atol=1e-8)
+
+
+def test_spinodal_batch(coexistence_2D, ref_2D):
+    _, spinodals, _ = coexistence_2D
+    out, info = lnPi.solve_spinodal_batch(
+        ref_2D, 0, [[1.0, 0.0], [1.3, 0.0]], [[1.3, 0.0], [1.1, 0.0]],
+        full_output=True)
+    for c in out:
+        np.testing.assert_allclose(c.mu, spinodals[0].mu, atol=1e-6)
+    assert np.all(info['converged'])
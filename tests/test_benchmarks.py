@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from benchmarks import common, run
+
+
+@pytest.mark.parametrize('name', ['1D', '2D', 'synth-1D-500', 'synth-2D-60'])
+def test_cases_have_coexistence(name):
+    case, C = common.get_coexistence(name)
+    assert len(C.spinodals) == 2
+    assert len(C.binodals) == 1
+    b = C.binodals[0]
+    assert np.all(b.has_phaseIDs[list(case.IDs)])
+    Omegas = b.Omegas_phaseIDs()
+    assert abs(Omegas[case.IDs[0]] - Omegas[case.IDs[1]]) < 1e-6
+    #collection is left sorted
+    assert np.all(np.diff(C.mus[:, 0]) > 0)
+
+
+def test_run_all(capsys):
+    run.main(['--repeat', '1'])
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) > 0
+    assert not [x for x in out if x.endswith('skipped') or 'failed:' in x]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import lnPi
+from lnPi._utils import MuLine
+
+
+@pytest.fixture(scope='module')
+def bracket(coexistence_2D):
+    _, spinodals, _ = coexistence_2D
+    return spinodals[0].mu, spinodals[1].mu
+
+
+def _Omega_diff(c, IDs=(0, 1)):
+    Omegas = c.Omegas_phaseIDs()
+    return Omegas[IDs[0]] - Omegas[IDs[1]]
+
+
+@pytest.mark.parametrize('halley', [True, False])
+def test_newton_matches_brentq(ref_2D, coexistence_2D, bracket, halley):
+    _, _, binodals = coexistence_2D
+    c, r = lnPi.get_binodal_point_newton(ref_2D, (0, 1), *bracket,
+                                         halley=halley, full_output=True)
+    assert r.converged
+    np.testing.assert_allclose(c.mu, binodals[0].mu, atol=1e-6)
+    assert abs(_Omega_diff(c)) < 1e-6
+
+
+def test_newton_unconverged_is_consistent(ref_2D, bracket):
+    with pytest.raises(RuntimeError):
+        lnPi.get_binodal_point_newton(ref_2D, (0, 1), *bracket, maxiter=1)
+
+    c, r = lnPi.get_binodal_point_newton(ref_2D, (0, 1), *bracket,
+                                         maxiter=1, disp=False,
+                                         full_output=True)
+    assert r.flag != 0
+    line = MuLine.from_points(*bracket)
+    np.testing.assert_allclose(line(r.root), c.mu)
+    assert r.residual == _Omega_diff(c)
+
+
+def test_newton_bad_bracket(ref_2D, bracket):
+    muA = bracket[0]
+    muB = np.array(muA) + np.array([0.01, 0.0])
+    with pytest.raises(ValueError):
+        lnPi.get_binodal_point_newton(ref_2D, (0, 1), muA, muB)
+
+
+@pytest.mark.parametrize('direction', [+1, -1])
+def test_trace_binodal_matches_brentq(ref_2D, coexistence_2D, direction):
+    _, _, binodals = coexistence_2D
+    out, info = lnPi.trace_binodal(ref_2D, (0, 1), binodals[0],
+                                   direction=direction, ds=0.2, npoints=6,
+                                   full_output=True)
+    assert info['status'] == 'npoints'
+    assert len(out) == 6
+    mu1 = np.array([c.mu[1] for c in out])
+    assert np.all(direction * np.diff(mu1) > 0)
+
+    for c in out[1:]:
+        assert c.has_phaseIDs[0] and c.has_phaseIDs[1]
+        dx = np.array([0.3, 0.0])
+        expected = lnPi.get_binodal_point(ref_2D, (0, 1), c.mu - dx,
+                                          c.mu + dx, xtol=1e-12)
+        np.testing.assert_allclose(c.mu, expected.mu, atol=1e-6)
@@ -0,0 +1,123 @@
+import copy
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lnPi.cached_decorators import (cached, cached_func, cached_clear, cache_stats,
+                                    reset_cache_stats, dump_cache_stats, _get_sync)
+
+
+def test_pickle_roundtrip(ref_2D):
+    x = ref_2D.reweight([1.0, 0.0])
+    Omegas = x.Omegas_phaseIDs()
+    assert hasattr(x.base, '_cache_sync')
+
+    y = pickle.loads(pickle.dumps(x))
+    np.testing.assert_allclose(y.Omegas_phaseIDs(), Omegas)
+    np.testing.assert_array_equal(y.phaseIDs, x.phaseIDs)
+
+
+def test_deepcopy(ref_2D):
+    x = ref_2D.reweight([1.0, 0.0])
+    Omegas = x.Omegas_phaseIDs()
+
+    y = copy.deepcopy(x)
+    np.testing.assert_allclose(y.Omegas_phaseIDs(), Omegas)
+
+    b = copy.deepcopy(x.base)
+    np.testing.assert_allclose(b.Nave, x.base.Nave)
+
+
+def test_copies_get_own_sync(ref_2D):
+    x = ref_2D.reweight([1.0, 0.0])
+    x.Omegas_phaseIDs()
+    y = copy.deepcopy(x)
+    y.Omegas_phaseIDs()
+    assert _get_sync(y) is not _get_sync(x)
+    assert _get_sync(y.base) is not _get_sync(x.base)
+
+
+class _Slow(object):
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.ncalls = 0
+
+    @property
+    @cached()
+    def value(self):
+        self.ncalls += 1
+        time.sleep(self.delay)
+        return self.ncalls
+
+    @cached_clear()
+    def clear(self):
+        pass
+
+
+def test_single_flight():
+    x = _Slow()
+    with ThreadPoolExecutor(8) as pool:
+        out = list(pool.map(lambda _: x.value, range(16)))
+    assert x.ncalls == 1
+    assert out == [1] * 16
+
+
+def test_clear_while_computing_drops_stale():
+    x = _Slow(delay=0.2)
+    t = threading.Thread(target=lambda: x.value)
+    t.start()
+    time.sleep(0.05)
+    x.clear()
+    t.join()
+    assert 'value' not in x._cache
+    assert x.value == 2
+
+
+class _Squares(object):
+    def __init__(self):
+        self.ncalls = 0
+
+    @cached_func('square', maxsize=2)
+    def square(self, x):
+        self.ncalls += 1
+        return x * x
+
+    @cached_func('array', maxbytes=2 * 8 * 10)
+    def array(self, n):
+        return np.zeros(10) + n
+
+
+def test_lru_maxsize_and_stats():
+    reset_cache_stats()
+    x = _Squares()
+    assert [x.square(i) for i in (1, 2, 1, 3)] == [1, 4, 1, 9]
+    assert len(x._cache['square']) == 2
+    #2 was least recently used
+    assert ('square', 1) in x._cache['square']
+    assert ('square', 2) not in x._cache['square']
+
+    x.square(2)
+    assert x.ncalls == 4
+
+    stats = cache_stats()['_Squares.square']
+    assert stats['hits'] == 1
+    assert stats['misses'] == 4
+    assert stats['evictions'] == 2
+    assert stats['hit_rate'] == 0.2
+    assert '_Squares.square' in dump_cache_stats()
+
+    reset_cache_stats()
+    assert cache_stats()['_Squares.square']['misses'] == 0
+
+
+def test_lru_maxbytes():
+    x = _Squares()
+    for n in range(4):
+        x.array(n)
+    store = x._cache['array']
+    assert len(store) == 2
+    assert store.nbytes == 2 * 8 * 10
+    np.testing.assert_array_equal(x.array(3), 3.0)
@@ -0,0 +1,51 @@
+import numpy as np
+
+import lnPi
+
+from conftest import MU_IN_2D, X_2D
+
+
+def _lazy(ref, maxsize=4):
+    return lnPi.lnPi_collection_lazy.from_mu(ref, MU_IN_2D, X_2D,
+                                             maxsize=maxsize)
+
+
+def test_lazy_matches_eager(ref_2D, C_2D):
+    L = _lazy(ref_2D)
+    np.testing.assert_allclose(L.mus, C_2D.mus)
+    np.testing.assert_array_equal(L.has_phaseIDs, C_2D.has_phaseIDs)
+    np.testing.assert_array_equal(L.nphases, C_2D.nphases)
+    np.testing.assert_allclose(L.Omegas_phaseIDs(), C_2D.Omegas_phaseIDs())
+    np.testing.assert_allclose(L.DeltabetaE_phaseIDs(),
+                               C_2D.DeltabetaE_phaseIDs())
+    np.testing.assert_allclose(L.Naves_phaseIDs, C_2D.Naves_phaseIDs)
+    assert len(L._lru) <= 4
+
+
+def test_lazy_spinodals_match_eager(ref_2D, coexistence_2D):
+    _, spinodals, _ = coexistence_2D
+    L = _lazy(ref_2D)
+    S, _ = L.get_spinodals(append=False, inplace=False)
+    for a, b in zip(S, spinodals):
+        np.testing.assert_allclose(a.mu, b.mu, atol=1e-8)
+
+
+def test_setitem_drops_summaries(ref_2D):
+    L = _lazy(ref_2D)
+    i = int(np.where(L.nphases == 2)[0][0])
+    x = L[i].merge_phases(efac=100.0, inplace=False)
+    assert x.nphase == 1
+
+    L[i] = x
+    assert L.nphases[i] == 1
+    np.testing.assert_array_equal(L.has_phaseIDs[i], x.has_phaseIDs)
+    np.testing.assert_allclose(L.Omegas_phaseIDs()[i], x.Omegas_phaseIDs())
+
+
+def test_iadd_does_not_build(ref_2D):
+    L = _lazy(ref_2D)
+    other = lnPi.lnPi_collection_lazy.from_mu(ref_2D, MU_IN_2D, X_2D + 0.5)
+    L += other
+    assert len(L) == 2 * len(X_2D)
+    assert len(L._lru) == 0
+    assert len(other._lru) == 0
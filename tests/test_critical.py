@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import lnPi
+from lnPi.critical import _barrier
+
+
+@pytest.fixture(scope='module')
+def binodal(coexistence_2D):
+    _, _, binodals = coexistence_2D
+    return binodals[0]
+
+
+def test_critical_point(ref_2D, binodal):
+    mu_c, last, info = lnPi.get_critical_point(ref_2D, (0, 1), binodal,
+                                               full_output=True)
+    assert info['status'] == 'barrier'
+    assert info['function_calls'] < 100
+    np.testing.assert_allclose(mu_c, last.mu)
+
+    #both phases still present at the last binodal point, with a small
+    #barrier and equal Omega up to the lattice jump
+    assert set(last.phaseIDs) >= {0, 1}
+    assert _barrier(last, (0, 1), {}) < 0.05
+    Omegas = last.Omegas_phaseIDs()
+    assert abs(Omegas[0] - Omegas[1]) < 0.1
+    assert info['barriers'][-1] < info['barriers'][0]
+
+
+def test_critical_point_failure(ref_2D, binodal):
+    with pytest.raises(RuntimeError):
+        lnPi.get_critical_point(ref_2D, (0, 1), binodal, maxstep=2)
+
+    mu_c, last, info = lnPi.get_critical_point(
+        ref_2D, (0, 1), binodal, maxstep=2, errors='ignore',
+        full_output=True)
+    assert info['status'] == 'maxstep'
+    np.testing.assert_allclose(mu_c, last.mu)
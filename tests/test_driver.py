@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import lnPi
+from lnPi.driver import map_tasks
+
+from conftest import X_2D
+
+
+def _mus(L):
+    return [None if x is None else x.mu for x in L]
+
+
+def _assert_same(L, other):
+    assert len(L) == len(other)
+    for a, b in zip(_mus(L), _mus(other)):
+        if a is None:
+            assert b is None
+        else:
+            np.testing.assert_allclose(a, b, atol=1e-8)
+
+
+def _fail(x):
+    if x < 0:
+        raise ValueError('negative')
+    return x
+
+
+def test_map_tasks_captures_errors():
+    out = map_tasks(_fail, [(1, ), (-1, )])
+    assert out[0].ok and out[0].get() == 1
+    assert not out[1].ok
+    assert isinstance(out[1].error, ValueError)
+    with pytest.raises(ValueError):
+        out[1].get()
+
+
+@pytest.mark.parametrize('Executor', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_collection_solvers_on_executor(coexistence_2D, C_2D, Executor):
+    _, spinodals, binodals = coexistence_2D
+
+    with Executor(2) as executor:
+        S, _ = C_2D.get_spinodals(append=False, inplace=False,
+                                  executor=executor)
+        _assert_same(S, spinodals)
+
+        B, _ = C_2D.get_binodals(spinodals=S, append=False, inplace=False,
+                                 executor=executor)
+        _assert_same(B, binodals)
+
+
+@pytest.mark.parametrize('Executor', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_from_mu_lines_on_executor(ref_2D, Executor):
+    mu_list = [[None, 0.0], [None, 0.5]]
+    serial = lnPi.lnPi_collection.from_mu_lines(ref_2D, mu_list, X_2D)
+
+    with Executor(2) as executor:
+        out = lnPi.lnPi_collection.from_mu_lines(
+            ref_2D, mu_list, X_2D, executor=executor)
+
+    for C, D in zip(out, serial):
+        np.testing.assert_allclose(C.mus, D.mus)
+        _assert_same(C.spinodals, D.spinodals)
+        _assert_same(C.binodals, D.binodals)
+
+
+def test_from_mu_lines_shared_handle(ref_2D):
+    mu_list = [[None, 0.0], [None, 0.5]]
+    serial = lnPi.lnPi_collection.from_mu_lines(ref_2D, mu_list, X_2D)
+
+    with ref_2D.to_shared() as handle, ProcessPoolExecutor(2) as executor:
+        out = lnPi.lnPi_collection.from_mu_lines(
+            handle, mu_list, X_2D, executor=executor)
+
+    for C, D in zip(out, serial):
+        _assert_same(C.spinodals, D.spinodals)
+        _assert_same(C.binodals, D.binodals)
@@ -0,0 +1,39 @@
+import numpy as np
+
+import lnPi
+from lnPi.frozen import FrozenPartition
+
+
+def test_evaluate_matches_full(ref_2D, coexistence_2D):
+    _, _, binodals = coexistence_2D
+    c = binodals[0]
+    part = FrozenPartition(c)
+    for dmu in [0.0, 0.05, -0.05]:
+        mu = c.mu + np.array([dmu, 0.0])
+        s = part.evaluate(mu)
+        x = ref_2D.reweight(mu)
+        assert s.ok
+        np.testing.assert_allclose(s.Omegas_phaseIDs(), x.Omegas_phaseIDs())
+        np.testing.assert_allclose(s.Naves_phaseIDs, x.Naves_phaseIDs)
+        np.testing.assert_allclose(s.molfracs_phaseIDs, x.molfracs_phaseIDs)
+
+
+def test_frozen_binodal_matches_full(ref_2D, coexistence_2D):
+    _, spinodals, binodals = coexistence_2D
+    muA, muB = spinodals[0].mu, spinodals[1].mu
+    c, r = lnPi.get_binodal_point(ref_2D, (0, 1), muA, muB, frozen=True,
+                                  full_output=True)
+    np.testing.assert_allclose(c.mu, binodals[0].mu, atol=1e-8)
+    assert r.consistent
+    assert r.segmentations < r.function_calls
+    assert r.trace.stages.count('frozen') > 0
+
+
+def test_frozen_molfrac_matches_full(ref_2D):
+    muA, muB = [-4.0, 0.0], [-2.0, 0.0]
+    expected = lnPi.find_mu_molfrac(ref_2D, 0, 1e-4, muA, muB, xtol=1e-12)
+    c, r = lnPi.find_mu_molfrac(ref_2D, 0, 1e-4, muA, muB, xtol=1e-12,
+                                frozen=True, full_output=True)
+    np.testing.assert_allclose(c.mu, expected.mu, atol=1e-8)
+    assert r.consistent
+    assert r.segmentations < r.function_calls
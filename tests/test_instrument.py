@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+import lnPi
+from lnPi import instrument
+from lnPi.instrument import profile, stage
+
+
+@profile('outer')
+def _outer():
+    time.sleep(0.05)
+    with stage('inner'):
+        time.sleep(0.05)
+
+
+def test_exclusive_times():
+    with instrument.profiling() as stats:
+        t0 = time.time()
+        _outer()
+        total = time.time() - t0
+    assert stats['outer'].calls == stats['inner'].calls == 1
+    assert stats['inner'].time >= 0.045
+    assert stats['outer'].time >= 0.045
+    #inner time is not counted toward outer
+    assert stats['outer'].time + stats['inner'].time <= total
+
+
+def test_disabled_records_nothing():
+    instrument.reset_profile_stats()
+    _outer()
+    assert instrument.profile_stats() == {}
+
+
+def test_pipeline_stages(ref_2D):
+    with instrument.profiling() as stats:
+        t0 = time.time()
+        ref_2D.reweight([1.0, 0.0]).Omegas_phaseIDs()
+        total = time.time() - t0
+    for name in ['reweight', 'segmentation', 'watershed']:
+        assert stats[name].calls >= 1
+    assert sum(x.time for x in stats.values()) <= total
+    assert 'segmentation' in instrument.dump_profile_stats()
+
+
+def test_progress_callbacks(ref_2D):
+    events = []
+
+    def callback(event, info, stats):
+        events.append((event, info, stats))
+
+    with instrument.callbacks(callback):
+        lnPi.sweep_reweight(ref_2D, [[x, 0.0] for x in np.linspace(-1, 1, 5)],
+                            fields=['nphase'], chunksize=2)
+        with instrument.profiling():
+            lnPi.sweep_reweight(ref_2D, [[0.0, 0.0]], fields=['nphase'])
+
+    assert [e[1]['stop'] for e in events] == [2, 4, 5, 1]
+    assert all(e[0] == 'iter_reweight' for e in events)
+    assert events[0][2] is None
+    assert events[-1][2]['reweight']['calls'] == 1
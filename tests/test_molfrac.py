@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import lnPi
+from lnPi.molfrac import _get_value_deriv
+
+TARGET = 1e-4
+#molfrac changes by about TARGET per unit mu
+FTOL = TARGET * 1e-8
+MU_A, MU_B = [-4.0, 0.0], [-2.0, 0.0]
+
+
+@pytest.fixture(scope='module')
+def baseline(ref_2D):
+    return lnPi.find_mu_molfrac(ref_2D, 0, TARGET, MU_A, MU_B, xtol=1e-12)
+
+
+def test_derivative_matches_finite_difference(ref_2D):
+    h = 1e-5
+    c = ref_2D.reweight(MU_A)
+    v, d = _get_value_deriv(c, 0, 0, 0)
+    vp, _ = _get_value_deriv(ref_2D.reweight([MU_A[0] + h, 0.0]), 0, 0, 0)
+    vm, _ = _get_value_deriv(ref_2D.reweight([MU_A[0] - h, 0.0]), 0, 0, 0)
+    np.testing.assert_allclose(d, (vp - vm) / (2 * h), rtol=1e-5)
+
+
+def test_newton_matches_brentq(ref_2D, baseline):
+    c, r = lnPi.find_mu_molfrac_newton(ref_2D, 0, TARGET, MU_A, ftol=FTOL,
+                                       full_output=True)
+    assert r.converged
+    assert abs(r.residual) < FTOL
+    np.testing.assert_allclose(c.mu, baseline.mu, atol=1e-6)
+    assert r.function_calls < 10
+
+
+def test_interp_matches_brentq(ref_2D, baseline):
+    C = lnPi.lnPi_collection.from_mu(ref_2D, [None, 0.0],
+                                     np.linspace(-5.0, -1.0, 9))
+    mus = lnPi.find_mu_molfrac_interp(C, 0, [TARGET, 2.0])
+    np.testing.assert_allclose(mus[0], baseline.mu, atol=1e-3)
+    assert np.all(np.isnan(mus[1]))
+
+    mus, lnpis = lnPi.find_mu_molfrac_interp(
+        C, 0, [TARGET], polish=True, polish_kwargs=dict(ftol=FTOL))
+    np.testing.assert_allclose(mus[0], baseline.mu, atol=1e-6)
@@ -0,0 +1,50 @@
+import numpy as np
+
+import lnPi
+from lnPi._mu_index import MuIndex
+
+from conftest import MU_IN_2D, X_2D
+
+
+def _brute_first_mask(mus, tol):
+    keep = np.ones(len(mus), dtype=bool)
+    for i in range(len(mus)):
+        d = np.sqrt(((mus[:i] - mus[i])**2).sum(axis=-1))
+        keep[i] = not (d <= tol).any()
+    return keep
+
+
+def test_first_mask_matches_brute_force():
+    rng = np.random.RandomState(0)
+    mus = np.round(rng.uniform(-1, 1, (200, 2)), 2)
+    #near duplicates within and just outside tol
+    mus = np.concatenate((mus, mus[:20] + 4e-6, mus[20:40] + 6e-6))
+    idx = MuIndex(decimals=5)
+    np.testing.assert_array_equal(
+        MuIndex.first_mask(mus, decimals=5), _brute_first_mask(mus, idx.tol))
+
+
+def test_nearest():
+    rng = np.random.RandomState(1)
+    mus = rng.uniform(-1, 1, (100, 2))
+    idx = MuIndex(mus)
+    for mu in rng.uniform(-1, 1, (10, 2)):
+        dist, i = idx.nearest(mu)
+        assert i == np.argmin(((mus - mu)**2).sum(axis=-1))
+
+
+def test_collection_index_tracks_changes(ref_2D):
+    C = lnPi.lnPi_collection.from_mu(ref_2D, MU_IN_2D, X_2D)
+    n = len(C)
+
+    C.append(ref_2D.reweight([X_2D[3] + 1e-7, 0.0]))
+    assert len(C) == n
+    C.append(ref_2D.reweight([100.0, 0.0]))
+    assert len(C) == n + 1
+    assert C.nearest_index([99.0, 0.0]) == n
+
+    C.sort_by_mu(inplace=True)
+    assert C.nearest_index([99.0, 0.0]) == n
+    C[n] = ref_2D.reweight([-100.0, 0.0])
+    assert C.nearest_index([-99.0, 0.0]) == n
+    assert C.nearest([X_2D[3] + 0.1, 0.0]) is C[3]
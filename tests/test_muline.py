@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+import lnPi
+from lnPi._utils import MuLine
+
+#direction across the binodal of the 2D example
+DIAG = np.array([1.0, -1.0]) / np.sqrt(2.0)
+
+
+def test_from_points():
+    line = MuLine.from_points([1.0, 2.0], [3.0, 2.0])
+    np.testing.assert_allclose(line.direction, [1.0, 0.0])
+    assert line.x_of([1.5, 2.0]) == 1.5
+    np.testing.assert_allclose(line(2.5), [2.5, 2.0])
+
+    line = MuLine.from_points([0.0, 0.0], [3.0, 4.0])
+    assert line.x_of([3.0, 4.0]) == pytest.approx(5.0)
+    np.testing.assert_allclose(line(line.x_of([1.5, 2.0])), [1.5, 2.0])
+
+    with pytest.raises(ValueError):
+        MuLine.from_points([1.0, 1.0], [1.0, 1.0])
+
+
+def _diag_brentq(f, a, b):
+    x = optimize.brentq(lambda s: f(s * DIAG), a, b, xtol=1e-12)
+    return x * DIAG
+
+
+def test_diagonal_binodal(ref_2D):
+    muA, muB = -1.0 * DIAG, 0.0 * DIAG
+
+    def f(mu):
+        Omegas = ref_2D.reweight(mu).Omegas_phaseIDs()
+        return Omegas[0] - Omegas[1]
+
+    c = lnPi.get_binodal_point(ref_2D, (0, 1), muA, muB, xtol=1e-12)
+    np.testing.assert_allclose(c.mu, _diag_brentq(f, -1.0, 0.0), atol=1e-8)
+    c = lnPi.get_binodal_point_newton(ref_2D, (0, 1), muA, muB)
+    np.testing.assert_allclose(c.mu, _diag_brentq(f, -1.0, 0.0), atol=1e-6)
+
+
+def test_diagonal_spinodal(ref_2D):
+    C = lnPi.lnPi_collection.from_mu_iter(
+        ref_2D, [s * DIAG for s in np.linspace(-3.0, 3.0, 13)])
+
+    def f(mu):
+        return ref_2D.reweight(mu).DeltabetaE_phaseIDs()[0] - 1.0
+
+    s = lnPi.get_spinodal(C, 0, solve_kwargs=dict(xtol=1e-12))
+    x = np.dot(s.mu, DIAG)
+    np.testing.assert_allclose(s.mu, x * DIAG, atol=1e-12)
+    np.testing.assert_allclose(s.mu, _diag_brentq(f, x - 0.1, x + 0.1),
+                               atol=1e-8)
+
+
+def test_trace_isopleth(ref_2D):
+    target = 1e-4
+    start = lnPi.find_mu_molfrac(ref_2D, 0, target, [-4.0, 0.0], [-2.0, 0.0],
+                                 xtol=1e-12)
+    out, info = lnPi.trace_isopleth(ref_2D, 0, target, start, ds=0.2,
+                                    npoints=5, full_output=True)
+    assert len(out) == 5
+    for c in out[1:]:
+        assert c.molfracs_phaseIDs[0, 0] == pytest.approx(target, rel=1e-6)
+        expected = lnPi.find_mu_molfrac(ref_2D, 0, target,
+                                        c.mu - [0.5, 0.0], c.mu + [0.5, 0.0],
+                                        xtol=1e-12)
+        np.testing.assert_allclose(c.mu, expected.mu, atol=1e-6)
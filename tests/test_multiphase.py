@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import lnPi
+
+#three equal gaussian wells, not on a line
+CENTERS = np.array([[10.0, 10.0], [35.0, 10.0], [10.0, 35.0]])
+WIDTH = 3.0
+#basin borders move in steps with mu, so Omega is only smooth to about 1e-9
+FTOL = 1e-7
+
+
+def _tag_nearest(x):
+    N = np.asarray(x.Naves, dtype=float)
+    d = ((N[:, None, :] - CENTERS[None, :, :])**2).sum(axis=-1)
+    return np.argmin(d, axis=-1)
+
+
+@pytest.fixture(scope='module')
+def ref_3phase():
+    coords = np.indices((50, 50), dtype=float)
+    Z = np.full((50, 50), -np.inf)
+    for c in CENTERS:
+        r2 = sum((x - cc)**2 for x, cc in zip(coords, c))
+        Z = np.logaddexp(Z, -r2 / (2.0 * WIDTH**2))
+    return lnPi.lnPi_phases.from_matrix(
+        Z, mu=[0.0, 0.0], volume=1.0, beta=1.0, num_phases_max=3,
+        argmax_kwargs=dict(min_distance=[3, 6]), ftag_phases=_tag_nearest)
+
+
+def test_two_phase_matches_binodal(ref_2D, coexistence_2D):
+    _, spinodals, binodals = coexistence_2D
+    c, r = lnPi.get_multiphase_point(ref_2D, [0, 1], [-0.5, 0.0], comps=[0],
+                                     full_output=True)
+    assert r.converged
+    np.testing.assert_allclose(c.mu, binodals[0].mu, atol=1e-8)
+    assert r.function_calls < 10
+
+
+def test_triple_point(ref_3phase):
+    c, r = lnPi.get_multiphase_point(ref_3phase, [0, 1, 2], [0.05, -0.05],
+                                     ftol=FTOL, full_output=True)
+    assert r.converged
+    assert np.all(c.has_phaseIDs)
+    Omegas = c.Omegas_phaseIDs()
+    np.testing.assert_allclose(Omegas, Omegas[0], atol=FTOL)
+
+    #each pair coexists at the triple point (brentq along mu[0])
+    for IDs in [(0, 1), (1, 2)]:
+        b = lnPi.get_binodal_point(ref_3phase, IDs, c.mu - [0.05, 0.0],
+                                   c.mu + [0.05, 0.0], xtol=1e-12)
+        np.testing.assert_allclose(b.mu, c.mu, atol=1e-6)
+
+
+def test_not_converged(ref_3phase):
+    with pytest.raises(RuntimeError):
+        lnPi.get_multiphase_point(ref_3phase, [0, 1, 2], [0.05, -0.05],
+                                  maxiter=1)
+    c, r = lnPi.get_multiphase_point(ref_3phase, [0, 1, 2], [0.05, -0.05],
+                                     maxiter=1, errors='ignore',
+                                     full_output=True)
+    assert not r.converged
+    np.testing.assert_allclose(r.root, c.mu)
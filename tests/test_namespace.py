@@ -0,0 +1,16 @@
+import lnPi
+
+
+def test_helpers_not_exported():
+    for name in ['as_mu_line', 'record_eval', 'with_trace', 'SaddleTracker',
+                 'solve_frozen', 'optimize']:
+        assert not hasattr(lnPi, name), name
+
+
+def test_solvers_exported():
+    for name in ['get_spinodal', 'trace_spinodal', 'get_binodal_point',
+                 'get_binodal_point_newton', 'trace_binodal',
+                 'get_multiphase_point', 'find_mu_molfrac',
+                 'find_mu_molfrac_newton', 'find_mu_molfrac_interp',
+                 'trace_isopleth', 'MuLine']:
+        assert hasattr(lnPi, name), name
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import lnPi
+
+
+@pytest.fixture(scope='module')
+def pmap(ref_2D):
+    return lnPi.phase_map(ref_2D, (-10.0, 10.0), (-1.0, 1.0), n0=5, n1=3,
+                          depth=4)
+
+
+def test_cells_tile_plane(pmap):
+    scale = 2**pmap.depth
+    assert sum(c[2]**2 for c in pmap.cells) == 4 * 2 * scale**2
+    assert all(c[2] == 1 for c in pmap.boundary_cells)
+    assert len(pmap.boundary_cells) > 0
+    #refinement only near boundaries
+    assert len(pmap) < 0.5 * (4 * scale + 1) * (2 * scale + 1)
+
+
+def test_points_match_reweight(ref_2D, pmap):
+    for p in list(pmap.points.values())[::10]:
+        x = ref_2D.reweight(p.mu)
+        assert p.nphase == x.nphase
+        np.testing.assert_array_equal(p.has, x.has_phaseIDs)
+        np.testing.assert_allclose(p.Omegas, x.Omegas_phaseIDs())
+
+
+def test_binodal_brackets(ref_2D, pmap, coexistence_2D):
+    _, _, binodals = coexistence_2D
+    brackets = pmap.binodal_brackets()
+    assert len(brackets) > 0
+    on_line = [(a, b) for a, b in brackets if a[1] == 0.0 and b[1] == 0.0]
+    assert len(on_line) == 1
+    c = lnPi.get_binodal_point(ref_2D, (0, 1), *on_line[0])
+    np.testing.assert_allclose(c.mu, binodals[0].mu, atol=1e-8)
+
+
+def test_spinodal_brackets(pmap):
+    has = {tuple(p.mu): p.has for p in pmap.points.values()}
+    for ID in (0, 1):
+        brackets = pmap.spinodal_brackets(ID)
+        assert len(brackets) > 0
+        for a, b in brackets:
+            assert has[tuple(a)][ID]
+            assert not has[tuple(b)][ID]
@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+
+import numpy as np
+import pytest
+
+import lnPi
+
+
+def _attach_Omegas(handle, mu):
+    ref = handle.attach()
+    return ref.base.data.flags.writeable, ref.reweight(mu).Omegas_phaseIDs()
+
+
+def test_handle_pickle_is_small(ref_2D):
+    with ref_2D.to_shared() as handle:
+        s = pickle.dumps(handle)
+        assert len(s) < ref_2D.base.data.nbytes // 10
+        h = pickle.loads(s)
+        assert h.name == handle.name
+
+
+def test_attach_matches_ref(ref_2D):
+    with ref_2D.to_shared() as handle:
+        ref = handle.attach()
+        np.testing.assert_array_equal(ref.base.filled(), ref_2D.base.filled())
+        with pytest.raises(ValueError):
+            ref.base.data[0] = 0.0
+        mu = [0.0, 0.0]
+        np.testing.assert_allclose(
+            ref.reweight(mu).Omegas_phaseIDs(),
+            ref_2D.reweight(mu).Omegas_phaseIDs())
+        handle.close()
+
+
+def test_attach_in_worker(ref_2D):
+    mus = [[-1.0, 0.0], [0.0, 0.0], [1.0, 0.0]]
+    with ref_2D.to_shared() as handle:
+        with ProcessPoolExecutor(2) as ex:
+            out = list(ex.map(_attach_Omegas, [handle] * len(mus), mus))
+    for mu, (writeable, Omegas) in zip(mus, out):
+        assert not writeable
+        np.testing.assert_allclose(Omegas,
+                                   ref_2D.reweight(mu).Omegas_phaseIDs())
+
+
+def test_lnPi_pickle(ref_2D):
+    base = pickle.loads(pickle.dumps(ref_2D.base))
+    np.testing.assert_array_equal(base.filled(), ref_2D.base.filled())
+    np.testing.assert_array_equal(base.mask, ref_2D.base.mask)
+    assert base.mu.tolist() == ref_2D.base.mu.tolist()
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+import lnPi
+from lnPi._utils import MuLine
+from lnPi.spinodal import (_initial_bracket_spinodal_right,
+                           _refine_bracket_spinodal_right)
+
+from conftest import MU_IN_2D
+
+
+@pytest.mark.parametrize('ID', [0, 1])
+def test_tracked_matches_full(C_2D, coexistence_2D, ID):
+    _, spinodals, _ = coexistence_2D
+    s, r = lnPi.get_spinodal(C_2D, ID, track=True, full_output=True)
+    np.testing.assert_allclose(s.mu, spinodals[ID].mu, atol=1e-8)
+    assert r.trace.stages.count('tracked') > 0
+
+
+def test_tracked_uses_fewer_segmentations(C_2D):
+    counts = []
+    for track in [False, True]:
+        _, r = lnPi.get_spinodal(C_2D, 0, track=track, full_output=True)
+        counts.append(r.trace.counts['segmentation'])
+    assert counts[1] < counts[0]
+
+
+def _spinodal_brentq(ref, ID, mu1, a, b):
+    def f(y):
+        return ref.reweight([y, mu1]).DeltabetaE_phaseIDs()[ID] - 1.0
+    return optimize.brentq(f, a, b, xtol=1e-12)
+
+
+def test_trace_spinodal_matches_brentq(ref_2D, coexistence_2D):
+    _, spinodals, _ = coexistence_2D
+    x = np.linspace(0.0, 1.0, 6)
+    out, info = lnPi.trace_spinodal(ref_2D, 0, spinodals[0], x,
+                                    solve_kwargs=dict(xtol=1e-12),
+                                    full_output=True)
+    assert info['status'] == 'done'
+    assert len(out) == len(x)
+    np.testing.assert_allclose(info['x'], x)
+
+    for c in out[1:]:
+        y = _spinodal_brentq(ref_2D, 0, c.mu[1], c.mu[0] - 0.2,
+                             c.mu[0] + 0.2)
+        np.testing.assert_allclose(c.mu[0], y, atol=1e-8)
+
+    #extrapolated brackets need few reweights per point
+    assert info['function_calls'] < 10 * (len(x) - 1)
+
+
+
+class _Counter(object):
+    def __init__(self, monkeypatch):
+        self.n = 0
+        reweight = lnPi.lnPi_phases.reweight
+
+        def counted(obj, *args, **kwargs):
+            self.n += 1
+            return reweight(obj, *args, **kwargs)
+
+        monkeypatch.setattr(lnPi.lnPi_phases, 'reweight', counted)
+
+
+def _bisect_then_brentq(ref, ID, L, R, efac=1.0, vmax=1e20, vmin=0.0):
+    """bracket by plain bisection, then brentq (as before refinement)"""
+    def value(x):
+        c = ref.reweight([x, 0.0])
+        return c.DeltabetaE_phaseIDs()[ID], c
+
+    a, b = L.mu[0], R.mu[0]
+    va, vb = L.DeltabetaE_phaseIDs()[ID], R.DeltabetaE_phaseIDs()[ID]
+    while not (efac < va < vmax and vmin < vb < efac):
+        m = 0.5 * (a + b)
+        v, c = value(m)
+        if v >= efac and np.isfinite(c.Omegas_phaseIDs()[ID]):
+            a, va = m, v
+        else:
+            b, vb = m, v
+    return optimize.brentq(lambda x: value(x)[0] - efac, a, b)
+
+
+@pytest.mark.parametrize('ID', [0, 1])
+def test_refined_bracket_is_cheaper(ref_2D, coexistence_2D, monkeypatch, ID):
+    _, spinodals, _ = coexistence_2D
+    C = lnPi.lnPi_collection.from_mu(ref_2D, MU_IN_2D, np.linspace(-10, 10, 5))
+    C.has_phaseIDs
+    L, R = _initial_bracket_spinodal_right(
+        C if ID == 0 else C[::-1], ID, MuLine.from_points(C[0].mu, C[1].mu),
+        step=1 if ID == 0 else -1)
+
+    count = _Counter(monkeypatch)
+    x = _bisect_then_brentq(ref_2D, ID, L, R)
+    n_bisect = count.n
+    np.testing.assert_allclose(x, spinodals[ID].mu[0], atol=1e-8)
+
+    count.n = 0
+    s = lnPi.get_spinodal(C, ID)
+    np.testing.assert_allclose(s.mu, spinodals[ID].mu, atol=1e-8)
+    assert count.n < n_bisect
+
+
+@pytest.mark.parametrize('ID,muL,muR', [(0, [-5.0, 0.0], [5.0, 0.0]),
+                                        (1, [5.0, 0.0], [-5.0, 0.0])])
+def test_refined_bracket_contains_spinodal(ref_2D, coexistence_2D, ID, muL,
+                                           muR):
+    _, spinodals, _ = coexistence_2D
+    L, R = ref_2D.reweight(muL), ref_2D.reweight(muR)
+    left, right, r, (vL, vR) = _refine_bracket_spinodal_right(L, R, ID)
+    assert 1.0 < vL < 1e20
+    assert 0.0 < vR < 1.0
+    x = spinodals[ID].mu[0]
+    assert min(left.mu[0], right.mu[0]) < x < max(left.mu[0], right.mu[0])
@@ -0,0 +1,50 @@
+import numpy as np
+
+import lnPi
+from lnPi.state_cache import state_cache_enabled
+
+
+def test_module_not_shadowed():
+    import lnPi.state_cache as sc
+    assert sc.state_cache_enabled is state_cache_enabled
+    assert lnPi.get_state_cache() is None
+
+
+def test_same_state_point_shares_key(ref_2D):
+    with state_cache_enabled() as cache:
+        x = ref_2D.reweight([1.0, 0.0])
+        y = ref_2D.reweight([-1.0, 0.0])
+
+        #reached from the reference or from another reweighted object
+        assert ref_2D.reweight([1.0, 0.0]) is x
+        assert y.reweight([1.0, 0.0]) is x
+        assert y.copy().reweight([1.0, 0.0]) is x
+        assert cache.key(x, [2.0, 0.0]) == cache.key(ref_2D, [2.0, 0.0])
+
+        #different settings, different keys
+        assert ref_2D.reweight([1.0, 0.0], ZeroMax=False) is not x
+        assert cache.key(ref_2D, [1.0, 0.0]) != cache.key(ref_2D, [1.0, 0.1])
+
+    assert lnPi.get_state_cache() is None
+
+
+def test_padded_objects_start_new_chain(ref_2D):
+    with state_cache_enabled() as cache:
+        x = ref_2D.reweight([1.0, 0.0], Pad=True)
+        assert x.root_hash != ref_2D.root_hash
+        assert cache.key(x, [2.0, 0.0]) != cache.key(ref_2D, [2.0, 0.0])
+
+        y = x.reweight([2.0, 0.0])
+        z = ref_2D.reweight([2.0, 0.0])
+        assert y is not z
+        assert y.root_hash == x.root_hash
+
+
+def test_cached_matches_uncached(ref_2D):
+    mus = [[m, 0.0] for m in np.linspace(-2, 2, 5)]
+    expected = [ref_2D.reweight(mu).Omegas_phaseIDs() for mu in mus]
+    with state_cache_enabled():
+        for _ in range(2):
+            for mu, e in zip(mus, expected):
+                np.testing.assert_allclose(
+                    ref_2D.reweight(mu).Omegas_phaseIDs(), e)
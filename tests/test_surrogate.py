@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import lnPi
+
+
+@pytest.fixture(scope='module')
+def surrogate(coexistence_2D):
+    C, _, _ = coexistence_2D
+    return lnPi.Surrogate(C)
+
+
+@pytest.mark.parametrize('ID', [0, 1])
+def test_spinodal_at_phase_edge(surrogate, coexistence_2D, ID):
+    #both spinodals lie between the last node with a barrier and the first
+    #node without the phase
+    _, spinodals, _ = coexistence_2D
+    out = surrogate.get_spinodals(ID)
+    assert len(out) == 1
+    np.testing.assert_allclose(out[0].mu, spinodals[ID].mu, atol=1e-6)
+
+
+def test_binodal_matches_brentq(surrogate, coexistence_2D):
+    _, _, binodals = coexistence_2D
+    out = surrogate.get_binodals((0, 1))
+    assert len(out) == 1
+    np.testing.assert_allclose(out[0].mu, binodals[0].mu, atol=1e-6)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import lnPi
+from lnPi.state_cache import state_cache_enabled
+
+from conftest import X_2D
+
+
+def _mus():
+    return [[x, 0.0] for x in X_2D]
+
+
+def test_sweep_matches_collection(ref_2D, C_2D):
+    out = lnPi.sweep_reweight(ref_2D, _mus(), chunksize=4)
+    np.testing.assert_allclose(out['mu'], C_2D.mus)
+    np.testing.assert_allclose(out['Omegas_phaseIDs'], C_2D.Omegas_phaseIDs())
+    np.testing.assert_allclose(out['Naves_phaseIDs'], C_2D.Naves_phaseIDs)
+
+
+def test_generator_input_and_chunks(ref_2D):
+    mus = _mus()
+    expected = lnPi.sweep_reweight(ref_2D, mus, fields=['nphase'])
+
+    out = {'nphase': np.zeros(len(mus), dtype=int)}
+    starts = []
+    for start, chunk in lnPi.iter_reweight(
+            ref_2D, (mu for mu in mus), fields=['nphase'], chunksize=8,
+            out=out):
+        starts.append(start)
+        assert len(chunk['mu']) <= 8
+    assert starts == [0, 8, 16]
+    np.testing.assert_array_equal(out['nphase'], expected['nphase'])
+
+    gen = lnPi.sweep_reweight(ref_2D, (mu for mu in mus), fields=['nphase'])
+    np.testing.assert_array_equal(gen['nphase'], expected['nphase'])
+
+
+def test_sweep_bypasses_state_cache(ref_2D):
+    with state_cache_enabled() as cache:
+        lnPi.sweep_reweight(ref_2D, _mus(), fields=['nphase'])
+        assert len(cache) == 0
+
+
+def test_hdf_sink(ref_2D, tmp_path):
+    h5py = pytest.importorskip('h5py')
+    mus = _mus()
+    expected = lnPi.sweep_reweight(ref_2D, mus)
+    with h5py.File(str(tmp_path / 'sweep.h5'), 'w') as f:
+        assert lnPi.sweep_reweight(ref_2D, mus, chunksize=5,
+                                   sink=lnPi.HDFSink(f)) is None
+        for k, v in expected.items():
+            np.testing.assert_allclose(f[k][...], v)
@@ -0,0 +1,58 @@
+import pickle
+
+import pytest
+
+import lnPi
+from lnPi.spinodal import _refine_bracket_spinodal_right
+from lnPi.trace import SolveInfo, SolverTrace
+
+
+def test_positional_full_output(ref_2D, coexistence_2D):
+    _, spinodals, _ = coexistence_2D
+    muA, muB = spinodals[0].mu, spinodals[1].mu
+    for out in [
+            lnPi.get_binodal_point(ref_2D, (0, 1), muA, muB, {}, True),
+            lnPi.get_binodal_point(ref_2D, (0, 1), muA, muB, full_output=True)
+    ]:
+        c, r = out
+        assert isinstance(r, SolveInfo)
+        assert isinstance(r.trace, SolverTrace)
+        assert r.trace.nevals > 0
+        assert r.converged
+        assert r.root == r.results.root
+        #extra values live on the info object, not the RootResults
+        assert not hasattr(r.results, 'residual')
+        assert not hasattr(r.results, 'trace')
+        Omegas = c.Omegas_phaseIDs()
+        assert r.residual == Omegas[0] - Omegas[1]
+
+
+def test_no_full_output(ref_2D, coexistence_2D):
+    _, spinodals, _ = coexistence_2D
+    c = lnPi.get_binodal_point(ref_2D, (0, 1), spinodals[0].mu,
+                               spinodals[1].mu)
+    assert not isinstance(c, tuple)
+
+
+def test_solve_info_pickle():
+    r = SolveInfo(trace=SolverTrace('x'), residual=1.0)
+    r2 = pickle.loads(pickle.dumps(r))
+    assert r2.residual == 1.0
+    assert r2.trace.name == 'x'
+    with pytest.raises(AttributeError):
+        r2.root
+
+
+def test_spinodal_extras_on_info(ref_2D, C_2D):
+    s, r = lnPi.get_spinodal(C_2D, 0, full_output=True)
+    assert isinstance(r, SolveInfo)
+    assert not hasattr(r.results, 'from_solve')
+
+    #collapsed bracket
+    L = ref_2D.reweight([1.19, 0.0])
+    R = ref_2D.reweight([1.19 + 1e-7, 0.0])
+    left, right, rr, values = _refine_bracket_spinodal_right(L, R, 0)
+    assert isinstance(rr, SolveInfo)
+    assert rr.info == 'all close and doneLeft'
+    assert rr.left is L
+    assert not hasattr(rr.results, 'info')